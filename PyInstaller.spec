@@ -17,10 +17,14 @@ a = Analysis(['main.py'],
                  ('assets', 'assets'), 
                  ('ui', 'ui') 
              ],
+             # MoviePy, NumPy і OpenCV імпортуються всередині функцій (не під час запуску), але аналіз PyInstaller
+             # знаходить і такі імпорти, тому додаткові hiddenimports не потрібні.
              hiddenimports=[],
              hookspath=hookspath(), 
              runtime_hooks=runtime_hooks(), 
-             excludes=[],
+             # Необов'язкові залежності moviepy.editor (перегляд у Jupyter, повзунки, pygame): без них
+             # MoviePy працює, а збірка менша і розпаковується швидше
+             excludes=['IPython', 'matplotlib', 'pygame'],
              win_no_prefer_redirects=False,
              win_private_assemblies=False,
              cipher=block_cipher,
@@ -0,0 +1,172 @@
+# app_logic/batch_processor.py
+# Пакетна обробка багатьох файлів: process_video_task виконується паралельно в ProcessPoolExecutor.
+# Прогрес і статуси з процесів-воркерів передаються через чергу менеджера multiprocessing,
+# помилка чи аварійне завершення одного завдання не зупиняє решту пакета.
+import multiprocessing
+import os
+import queue
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.managers import SyncManager
+from dataclasses import dataclass, field
+
+@dataclass
+class BatchJob:
+    input_path: str
+    output_folder: str
+    options: dict = field(default_factory=dict)
+
+@dataclass
+class BatchJobResult:
+    index: int
+    input_path: str
+    output_path: str = None
+    success: bool = False
+    error: str = ""
+    elapsed: float = 0.0
+
+def default_worker_count():
+    """ Кількість воркерів за замовчуванням: кодувальник libx264 сам використовує кілька потоків. """
+    return max(1, (os.cpu_count() or 2) // 2)
+
+def _init_worker():
+    """ Воркери та менеджер ігнорують Ctrl+C: скасування координує батьківський процес через cancel_event. """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+def _run_batch_job(index, job, event_queue, cancel_event):
+    """ Виконується в процесі-воркері. Не викидає винятків: будь-яка помилка повертається в BatchJobResult. """
+    from app_logic.video_processor import process_video_task # Імпорт у воркері, щоб не тягнути MoviePy у батьківський процес
+
+    started = time.monotonic()
+    last_status = [""]
+
+    def _emit_status(message):
+        last_status[0] = message
+        event_queue.put((index, "status", message))
+    def _emit_progress(value_0_to_1, details=None):
+        event_queue.put((index, "progress", (value_0_to_1, details)))
+    def _check_if_cancelled():
+        return cancel_event.is_set()
+
+    result = BatchJobResult(index=index, input_path=job.input_path)
+    event_queue.put((index, "started", os.getpid())) # Якщо воркер впаде, батьківський процес знатиме, які завдання виконувалися
+    try:
+        output_path = process_video_task(job.input_path, job.output_folder, job.options,
+                                         _emit_status, _emit_progress, _check_if_cancelled)
+        if output_path:
+            result.output_path = output_path
+            result.success = True
+        else:
+            result.error = last_status[0] or "Не вдалося обробити відео (невідома помилка в завданні)."
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    result.elapsed = time.monotonic() - started
+    return result
+
+def run_batch_jobs(jobs, max_workers=None,
+                   job_status_callback=None, job_progress_callback=None,
+                   job_finished_callback=None, batch_progress_callback=None,
+                   check_if_cancelled_callback=None, max_crash_retries=1, poll_interval=0.1, job_runner=None):
+    """
+    Виконує список BatchJob у пулі процесів і повертає список BatchJobResult у порядку jobs.
+    Колбеки викликаються в потоці, що викликав функцію:
+      job_status_callback(index, message), job_progress_callback(index, value_0_to_1, details),
+      job_finished_callback(result), batch_progress_callback(value_0_to_1, finished_count, total).
+    Якщо процес-воркер аварійно завершився, аварію зараховано лише завданням, що на той момент виконувалися:
+    кожне з них перезапускається окремо в пулі з одним процесом (до max_crash_retries разів), щоб знайти
+    винуватця, а завдання, які ще не почалися, повертаються в чергу без спроби.
+    job_runner - функція воркера з сигнатурою _run_batch_job (за замовчуванням вона сама); має бути
+    визначена на верхньому рівні модуля, бо передається в процеси spawn.
+    """
+    total = len(jobs)
+    results = [None] * total
+    progress = [0.0] * total
+    crash_attempts = [0] * total
+    max_workers = max_workers or default_worker_count()
+    check_if_cancelled_callback = check_if_cancelled_callback or (lambda: False)
+    job_runner = job_runner or _run_batch_job
+    ctx = multiprocessing.get_context("spawn") # Безпечно поруч із потоками GUI та однаково на всіх платформах
+
+    def _finish(result):
+        results[result.index] = result
+        progress[result.index] = 1.0
+        if job_finished_callback: job_finished_callback(result)
+
+    started = set() # Завдання, які почали виконуватися в поточному пулі
+
+    def _drain_events(event_queue):
+        while True:
+            try: index, kind, payload = event_queue.get_nowait()
+            except queue.Empty: return
+            if kind == "started": started.add(index)
+            elif kind == "status" and job_status_callback: job_status_callback(index, payload)
+            elif kind == "progress":
+                value, details = payload
+                progress[index] = max(progress[index], float(value))
+                if job_progress_callback: job_progress_callback(index, value, details)
+
+    def _report_batch_progress():
+        if batch_progress_callback:
+            finished = sum(1 for r in results if r is not None)
+            batch_progress_callback(sum(progress) / total if total else 1.0, finished, total)
+
+    remaining = list(range(total))
+    suspects = [] # Завдання, що виконувалися під час аварії: перезапускаються по одному
+    manager = SyncManager(ctx=ctx)
+    manager.start(_init_worker)
+    try:
+        event_queue = manager.Queue()
+        cancel_event = manager.Event()
+        while remaining or suspects:
+            if suspects:
+                round_indices, round_workers = [suspects.pop(0)], 1
+            else:
+                round_indices, round_workers = remaining, min(max_workers, len(remaining))
+                remaining = []
+            started.clear()
+            with ProcessPoolExecutor(max_workers=round_workers, mp_context=ctx, initializer=_init_worker) as pool:
+                futures = {pool.submit(job_runner, index, jobs[index], event_queue, cancel_event): index
+                           for index in round_indices}
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                    _drain_events(event_queue)
+                    for future in done:
+                        index = futures[future]
+                        try:
+                            _finish(future.result())
+                        except CancelledError:
+                            _finish(BatchJobResult(index=index, input_path=jobs[index].input_path, error="Скасовано."))
+                        except BrokenProcessPool:
+                            if cancel_event.is_set():
+                                _finish(BatchJobResult(index=index, input_path=jobs[index].input_path, error="Скасовано."))
+                            elif index not in started:
+                                remaining.append(index) # Ще не почалося - аварія не його
+                            else:
+                                crash_attempts[index] += 1
+                                if crash_attempts[index] <= max_crash_retries:
+                                    suspects.append(index)
+                                else:
+                                    _finish(BatchJobResult(index=index, input_path=jobs[index].input_path,
+                                                           error="Процес-воркер аварійно завершився під час обробки."))
+                        except Exception as e:
+                            _finish(BatchJobResult(index=index, input_path=jobs[index].input_path,
+                                                   error=f"{type(e).__name__}: {e}"))
+                    if not cancel_event.is_set() and check_if_cancelled_callback():
+                        cancel_event.set() # Запущені завдання перевіряють подію, ще не запущені скасовуємо
+                        for future in pending: future.cancel()
+                    _report_batch_progress()
+            _drain_events(event_queue)
+            remaining.sort()
+            suspects.sort()
+    finally:
+        manager.shutdown()
+    _report_batch_progress()
+    return results
+
+def run_batch(input_paths, output_folder, options, max_workers=None, **callbacks):
+    """ Обробляє список файлів з однаковими options. Повертає список BatchJobResult у порядку input_paths. """
+    jobs = [BatchJob(input_path=path, output_folder=output_folder, options=dict(options)) for path in input_paths]
+    return run_batch_jobs(jobs, max_workers=max_workers, **callbacks)
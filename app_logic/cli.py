@@ -0,0 +1,380 @@
+# app_logic/cli.py
+# Консольна точка входу без GUI: ніколи не імпортує Qt, тому працює на серверах без дисплея.
+# Кожна подія (статус, прогрес, результат) друкується в stdout окремим рядком JSON.
+#
+# Приклади:
+#   python cli.py input.mp4 -o out --preset tiktok_reels --uniek
+#   python cli.py --manifest jobs.jsonl -o out --workers 4
+#   python cli.py --watch inbox -o out --preset tiktok_reels --uniek   (демон: обробляє нові файли з папки)
+#   python cli.py --serve --host 0.0.0.0 --port 8765 -o out --token SECRET   (HTTP-сервіс завдань)
+#   python cli.py --queue-submit /mnt/share/queue a.mp4 b.mp4 -o /mnt/share/out --uniek   (спільна черга)
+#   python cli.py --queue-worker /mnt/share/queue --workers 2   (на кожній машині-воркері)
+# Маніфест - JSON (список завдань або {"jobs": [...]}) чи JSONL (одне завдання на рядок):
+#   {"input": "a.mp4", "output_folder": "out", "preset": "youtube_720p", "options": {"bw_filter_active": true}}
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+from app_logic import job_options
+from app_logic.video_processor import PROCESSING_ENGINES
+
+class JsonEventPrinter:
+    """ Друкує події рядками JSON. Прогрес проріджується, щоб не засмічувати вивід. """
+
+    def __init__(self, stream=None, progress_step=0.01):
+        self.stream = stream or sys.stdout
+        self.progress_step = progress_step
+        self._last_progress = {}
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        record = {"event": event, "time": round(time.time(), 3)}
+        record.update(fields)
+        with self._lock:
+            self.stream.write(json.dumps(record) + "\n")
+            self.stream.flush()
+
+    def progress(self, job_index, value, details=None, **fields):
+        last = self._last_progress.get(job_index)
+        if last is not None and value < 1.0 and value - last < self.progress_step:
+            return
+        self._last_progress[job_index] = value
+        if details:
+            fields.update(frames_done=details.get("frames_done"), total_frames=details.get("total_frames"),
+                          fps=round(details["fps"], 2) if details.get("fps") else None,
+                          eta=round(details["eta"], 1) if details.get("eta") is not None else None)
+        self.emit("progress", job=job_index, value=round(float(value), 4), **fields)
+
+def _parse_value(text):
+    """ Значення для --set: JSON (true, 3, "x", {...}) або рядок як є. """
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+def _options_from_args(args):
+    overrides = {}
+    if args.resize:
+        width, _, height = args.resize.lower().partition("x")
+        overrides.update({"resize_active": True, "width": width, "height": height})
+    if args.bw: overrides["bw_filter_active"] = True
+    if args.uniek: overrides["uniek_filter_active"] = True
+    if args.rotate is not None: overrides["rotation_angle"] = args.rotate
+    if args.flip_h: overrides["flip_h_active"] = True
+    if args.flip_v: overrides["flip_v_active"] = True
+    if args.engine: overrides["engine"] = args.engine
+    if args.noise_seed is not None: overrides["noise_seed"] = args.noise_seed
+    if args.segments: overrides["segment_parallel"] = args.segments
+    if args.profile_dir: overrides["profile_dir"] = os.path.abspath(args.profile_dir)
+    if args.variants: overrides["variant_count"] = args.variants
+    if args.variant_seed is not None: overrides["variant_seed"] = args.variant_seed
+    if args.result_cache: overrides["use_result_cache"] = True
+    if args.resumable: overrides["resumable"] = True
+    if args.memory_budget: overrides["memory_budget_mb"] = args.memory_budget
+    if args.tile_threads: overrides["tile_parallel"] = args.tile_threads if args.tile_threads == "auto" else int(args.tile_threads)
+    if args.fanout:
+        overrides["fanout_presets"] = (list(job_options.PRESET_SETTINGS) if args.fanout == "all"
+                                       else [name.strip() for name in args.fanout.split(",") if name.strip()])
+    for item in args.set or []:
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Очікується key=value у --set, отримано: {item}")
+        overrides[key] = _parse_value(value)
+    return overrides
+
+def load_manifest(path):
+    """ Читає маніфест JSON або JSONL і повертає список словників завдань. """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        data = None # Не цілий JSON - читаємо як JSONL
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        return data["jobs"] if "jobs" in data else [data]
+    return [json.loads(line) for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+
+def build_jobs(args):
+    """ Перетворює аргументи командного рядка та маніфест на список BatchJob. """
+    from app_logic.batch_processor import BatchJob
+
+    cli_overrides = _options_from_args(args)
+    entries = [{"input": path} for path in args.inputs]
+    if args.manifest:
+        entries += load_manifest(args.manifest)
+
+    jobs = []
+    if args.resume_incomplete:
+        # Перервані завдання з обробкою з відновленням: опції беруться з бази як є
+        from app_logic.job_store import get_default_job_store
+        for row in get_default_job_store().incomplete_jobs():
+            if os.path.exists(row["input_path"]):
+                jobs.append(BatchJob(input_path=row["input_path"], output_folder=row["output_folder"],
+                                     options=json.loads(row["options_json"])))
+    for entry in entries:
+        output_folder = entry.get("output_folder") or args.output_folder
+        if not output_folder:
+            raise ValueError(f"Не вказано папку збереження для {entry.get('input')} (-o або output_folder у маніфесті).")
+        overrides = dict(cli_overrides)
+        overrides.update(entry.get("options") or {})
+        options = job_options.resolve_options(entry.get("preset") or args.preset, overrides)
+        jobs.append(BatchJob(input_path=entry["input"], output_folder=output_folder, options=options))
+    return jobs
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        prog="cli.py", description="Пакетна унікалізація відео без GUI. Події друкуються рядками JSON.")
+    parser.add_argument("inputs", nargs="*", help="Вхідні відеофайли")
+    parser.add_argument("-o", "--output-folder", help="Папка збереження результатів")
+    parser.add_argument("--manifest", help="Файл завдань JSON або JSONL")
+    parser.add_argument("--preset", choices=sorted(job_options.PRESET_SETTINGS), help="Пресет платформи")
+    parser.add_argument("--resize", metavar="WxH", help="Змінити роздільну здатність, напр. 1280x720")
+    parser.add_argument("--bw", action="store_true", help="Чорно-білий фільтр")
+    parser.add_argument("--uniek", action="store_true", help="Комплекс фільтрів 'Унік'")
+    parser.add_argument("--rotate", type=int, choices=[0, 90, -90, 180], help="Поворот (додатний - проти годинникової)")
+    parser.add_argument("--flip-h", action="store_true", help="Дзеркально по горизонталі")
+    parser.add_argument("--flip-v", action="store_true", help="Дзеркально по вертикалі")
+    parser.add_argument("--engine", choices=PROCESSING_ENGINES, help="Рушій обробки")
+    parser.add_argument("--noise-seed", type=int, help="Зерно шуму 'Унік' для відтворюваних результатів")
+    parser.add_argument("--segments", metavar="N|auto", help="Кодувати довге відео паралельними сегментами")
+    parser.add_argument("--fanout", metavar="PRESETS|all",
+                        help="Кілька пресетів (через кому) за одне декодування; результат - список файлів")
+    parser.add_argument("--variants", type=int, default=0, metavar="N",
+                        help="N варіантів 'Унік' з випадковими параметрами за одне декодування")
+    parser.add_argument("--variant-seed", type=int, help="Зерно вибору параметрів варіантів")
+    parser.add_argument("--tile-threads", metavar="N|auto",
+                        help="Ч/Б, гамма/контраст і шум смугами кадру в N потоках (рушії fused, opencv, pipes)")
+    parser.add_argument("--result-cache", action="store_true",
+                        help="Не обробляти повторно той самий файл з тими самими опціями: взяти результат з кешу")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="Потоковий режим з обмеженою пам'яттю: кількість кадрів в обробці за бюджетом у МБ")
+    parser.add_argument("--resumable", action="store_true",
+                        help="Кодувати сегментами зі збереженням стану: після збою продовжити з готових сегментів")
+    parser.add_argument("--resume-incomplete", action="store_true",
+                        help="Перезапустити всі незавершені завдання з відновленням із бази завдань")
+    parser.add_argument("--list-jobs", action="store_true", help="Вивести завдання з бази завдань і вийти")
+    parser.add_argument("--profile-dir", help="Зберігати профіль етапів (Chrome trace + таблиця) у цю папку")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Довільна опція завдання (значення як JSON)")
+    parser.add_argument("--workers", type=int, default=0, help="Кількість процесів (0 - автоматично)")
+    parser.add_argument("--list-presets", action="store_true", help="Вивести пресети та опції за замовчуванням і вийти")
+    watch = parser.add_argument_group("режим демона (--watch)")
+    watch.add_argument("--watch", metavar="INBOX", help="Стежити за папкою й обробляти кожен новий файл до Ctrl+C")
+    watch.add_argument("--done-dir", help="Куди переносити оброблені оригінали (за замовчуванням INBOX/done)")
+    watch.add_argument("--failed-dir", help="Куди переносити файли з помилкою (за замовчуванням INBOX/failed)")
+    watch.add_argument("--queue-size", type=int, default=16, help="Найбільше файлів у черзі очікування")
+    watch.add_argument("--stable-seconds", type=float, default=5.0,
+                       help="Скільки секунд розмір файлу має не змінюватися, щоб вважати копіювання завершеним")
+    watch.add_argument("--poll-interval", type=float, default=1.0, help="Інтервал сканування папки, с")
+    serve = parser.add_argument_group("HTTP-сервіс завдань (--serve)")
+    serve.add_argument("--serve", action="store_true", help="Приймати завдання по HTTP до Ctrl+C")
+    serve.add_argument("--host", default="127.0.0.1", help="Адреса сервісу (0.0.0.0 - доступ з інших машин)")
+    serve.add_argument("--port", type=int, default=8765, help="Порт сервісу")
+    serve.add_argument("--token", help="Вимагати заголовок Authorization: Bearer TOKEN")
+    serve.add_argument("--max-queued", type=int, default=1000, help="Найбільше завдань у черзі (далі відповідь 503)")
+    shared = parser.add_argument_group("спільна черга на мережевому диску")
+    shared.add_argument("--queue-submit", metavar="ROOT", help="Поставити завдання (вхідні файли/маніфест) у чергу ROOT")
+    shared.add_argument("--queue-worker", metavar="ROOT", help="Виконувати завдання з черги ROOT до Ctrl+C (--workers процесів)")
+    shared.add_argument("--queue-status", metavar="ROOT", help="Вивести кількість завдань у кожному стані")
+    shared.add_argument("--lease-seconds", type=float, default=60.0,
+                        help="Через скільки секунд без пульсу завдання повертається в чергу")
+    shared.add_argument("--exit-when-empty", action="store_true", help="Воркер завершується, коли черга порожня")
+    return parser
+
+def _run_jobs(jobs, args, printer, cancel_flag):
+    """ Одне завдання виконується в поточному процесі (швидший старт), кілька - в пулі процесів. """
+    from app_logic.batch_processor import BatchJobResult, run_batch_jobs
+
+    def _on_finished(result):
+        printer.emit("result", job=result.index, input=result.input_path, output=result.output_path,
+                     success=result.success, error=result.error, elapsed=round(result.elapsed, 3))
+
+    if len(jobs) == 1 and args.workers <= 1:
+        from app_logic.video_processor import process_video_task
+        job = jobs[0]
+        last_status = [""]
+        def _emit_status(message):
+            last_status[0] = message
+            printer.emit("status", job=0, message=message)
+        started = time.monotonic()
+        output_path = process_video_task(job.input_path, job.output_folder, job.options,
+                                         _emit_status, lambda value, details=None: printer.progress(0, value, details),
+                                         cancel_flag.is_set)
+        result = BatchJobResult(index=0, input_path=job.input_path, output_path=output_path,
+                                success=bool(output_path), error="" if output_path else last_status[0],
+                                elapsed=time.monotonic() - started)
+        _on_finished(result)
+        return [result]
+
+    return run_batch_jobs(
+        jobs, max_workers=args.workers or None,
+        job_status_callback=lambda index, message: printer.emit("status", job=index, message=message),
+        job_progress_callback=printer.progress,
+        job_finished_callback=_on_finished,
+        batch_progress_callback=lambda value, finished, total: printer.progress(
+            "batch", value, finished=finished, total=total),
+        check_if_cancelled_callback=cancel_flag.is_set)
+
+def _run_watch(args, printer, cancel_flag):
+    """ Режим демона: опції з --preset та прапорців застосовуються до кожного файлу з папки. """
+    from app_logic.watch_folder import WatchConfig, WatchFolderDaemon
+
+    if not args.output_folder:
+        printer.emit("error", message="Для --watch потрібна папка збереження (-o).")
+        return 2
+    config = WatchConfig(inbox=args.watch, output_folder=args.output_folder,
+                         options=job_options.resolve_options(args.preset, _options_from_args(args)),
+                         done_folder=args.done_dir, failed_folder=args.failed_dir, workers=args.workers,
+                         queue_size=max(1, args.queue_size), poll_interval=args.poll_interval,
+                         stable_seconds=args.stable_seconds)
+
+    def _on_event(event, **fields):
+        if event == "progress":
+            printer.progress(fields["job"], fields["value"], fields.get("details"))
+        else:
+            printer.emit(event, **fields)
+
+    printer.emit("watch_start", inbox=config.inbox, output=config.output_folder, workers=config.workers,
+                 queue_size=config.queue_size, ledger=config.ledger_path)
+    processed, failed = WatchFolderDaemon(config, _on_event, stop_event=cancel_flag).run()
+    printer.emit("summary", succeeded=processed, failed=failed, cancelled=True)
+    return 0
+
+def _run_serve(args, printer, cancel_flag):
+    """ HTTP-сервіс: -o і --preset задають значення за замовчуванням для завдань без власних. """
+    from app_logic.job_server import run_server
+
+    run_server(args.host, args.port, cancel_flag,
+               on_started=lambda address: printer.emit("serve_start", host=address[0], port=address[1]),
+               output_folder=args.output_folder, default_preset=args.preset, workers=args.workers or None,
+               max_queued=max(1, args.max_queued), token=args.token)
+    printer.emit("summary", cancelled=True)
+    return 0
+
+def _queue_worker_process(root, worker_id, lease_seconds, exit_when_empty):
+    """ Один воркер спільної черги (у поточному або окремому процесі); події друкуються рядками JSON. """
+    from app_logic.shared_queue import run_queue_worker
+
+    printer = JsonEventPrinter()
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: stop_event.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+
+    def _on_event(event, **fields):
+        if event == "progress":
+            printer.progress(fields["job"], fields["value"], fields.get("details"), worker=worker_id)
+        else:
+            printer.emit(event, **fields)
+
+    return run_queue_worker(root, worker_id=worker_id, stop_event=stop_event, event_callback=_on_event,
+                            exit_when_empty=exit_when_empty, lease_seconds=lease_seconds)
+
+def _run_queue(args, printer):
+    """ --queue-submit, --queue-status і --queue-worker. """
+    from app_logic.shared_queue import SharedJobQueue, default_worker_id
+
+    if args.queue_submit:
+        queue = SharedJobQueue(args.queue_submit, lease_seconds=args.lease_seconds)
+        jobs = build_jobs(args)
+        if not jobs:
+            printer.emit("error", message="Не вказано жодного вхідного файлу.")
+            return 2
+        for job in jobs:
+            # Шляхи мають бути однаковими на всіх машинах (спільний диск), тому зберігаються абсолютними
+            job_id = queue.submit(os.path.abspath(job.input_path), os.path.abspath(job.output_folder), job.options)
+            printer.emit("submitted", id=job_id, input=job.input_path)
+        printer.emit("queue", **queue.counts())
+        return 0
+    if args.queue_status:
+        printer.emit("queue", **SharedJobQueue(args.queue_status, lease_seconds=args.lease_seconds).counts())
+        return 0
+
+    worker_count = max(1, args.workers)
+    base_id = default_worker_id()
+    if worker_count == 1:
+        succeeded, failed = _queue_worker_process(args.queue_worker, base_id, args.lease_seconds, args.exit_when_empty)
+        printer.emit("summary", succeeded=succeeded, failed=failed)
+        return 0 if not failed else 1
+    import multiprocessing
+    ctx = multiprocessing.get_context("spawn")
+    processes = [ctx.Process(target=_queue_worker_process,
+                             args=(args.queue_worker, f"{base_id}-{i}", args.lease_seconds, args.exit_when_empty))
+                 for i in range(worker_count)]
+    for process in processes:
+        process.start()
+    signal.signal(signal.SIGINT, signal.SIG_IGN) # Ctrl+C отримують усі процеси групи, кожен зупиняється сам
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda signum, frame: [process.terminate() for process in processes])
+    for process in processes:
+        process.join()
+    printer.emit("summary", workers=worker_count, exit_codes=[process.exitcode for process in processes])
+    return 0
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    printer = JsonEventPrinter()
+
+    if args.list_presets:
+        printer.emit("presets", presets=job_options.PRESET_SETTINGS, default_options=job_options.DEFAULT_OPTIONS,
+                     engines=list(PROCESSING_ENGINES))
+        return 0
+
+    if args.list_jobs:
+        from app_logic.job_store import get_default_job_store
+        store = get_default_job_store()
+        for row in store.list_jobs():
+            segments = store.segments(row["id"])
+            printer.emit("job", id=row["id"], state=row["state"], input=row["input_path"], output=row["output_path"],
+                         error=row["error"], attempts=row["attempts"],
+                         segments_done=sum(1 for seg in segments if seg["state"] == "done"), segments=len(segments))
+        return 0
+
+    if args.queue_submit or args.queue_worker or args.queue_status:
+        try:
+            return _run_queue(args, printer)
+        except (ValueError, KeyError, OSError) as e:
+            printer.emit("error", message=f"{type(e).__name__}: {e}")
+            return 2
+
+    if args.watch or args.serve:
+        cancel_flag = threading.Event()
+        signal.signal(signal.SIGINT, lambda signum, frame: cancel_flag.set())
+        if hasattr(signal, "SIGTERM"):
+            signal.signal(signal.SIGTERM, lambda signum, frame: cancel_flag.set())
+        try:
+            return _run_watch(args, printer, cancel_flag) if args.watch else _run_serve(args, printer, cancel_flag)
+        except (ValueError, KeyError, OSError) as e:
+            printer.emit("error", message=f"{type(e).__name__}: {e}")
+            return 2
+
+    try:
+        jobs = build_jobs(args)
+    except (ValueError, KeyError, OSError) as e:
+        printer.emit("error", message=f"{type(e).__name__}: {e}")
+        return 2
+    if not jobs:
+        printer.emit("error", message="Не вказано жодного вхідного файлу.")
+        return 2
+    for job in jobs:
+        os.makedirs(job.output_folder, exist_ok=True)
+
+    cancel_flag = threading.Event()
+    signal.signal(signal.SIGINT, lambda signum, frame: cancel_flag.set())
+    if hasattr(signal, "SIGTERM"):
+        signal.signal(signal.SIGTERM, lambda signum, frame: cancel_flag.set())
+
+    printer.emit("start", total=len(jobs))
+    results = _run_jobs(jobs, args, printer, cancel_flag)
+    succeeded = sum(1 for r in results if r and r.success)
+    printer.emit("summary", total=len(jobs), succeeded=succeeded, failed=len(jobs) - succeeded,
+                 cancelled=cancel_flag.is_set())
+    return 0 if succeeded == len(jobs) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
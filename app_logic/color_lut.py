@@ -0,0 +1,108 @@
+# app_logic/color_lut.py
+# Кольоровий етап обробки: гамма та контраст "Унік" зводяться до однієї таблиці uint8 на 256 значень,
+# яка будується один раз на завдання; Ч/Б рахується тією ж арифметикою float64, що й vfx.blackwhite,
+# у заздалегідь виділених буферах, тож результат збігається з ланцюжком MoviePy побітово.
+import numpy as np
+
+try:
+    import cv2
+except ImportError: # OpenCV необов'язковий, без нього таблиця застосовується через np.take
+    cv2 = None
+
+from app_logic import job_options
+
+def build_color_lut(gamma=None, contrast=None, lum=0, contrast_thr=127):
+    """
+    Будує таблицю uint8[256], еквівалентну послідовності vfx.gamma_corr та vfx.lum_contrast.
+    Обчислення ті самі, що й у MoviePy (включно з відкиданням дробової частини після кожного кроку),
+    тому результат збігається з ланцюжком fx побітово.
+    """
+    values = np.arange(256, dtype=np.float64)
+    if gamma is not None:
+        values = (255 * (values / 255) ** gamma).astype(np.uint8).astype(np.float64)
+    if contrast is not None:
+        values = values + lum + contrast * (values - float(contrast_thr))
+        values = np.clip(values, 0, 255)
+    return values.astype(np.uint8)
+
+def build_lut_for_options(options):
+    """ Таблиця для комплексу "Унік" або None, якщо кольорова корекція не потрібна. """
+    if not options.get("uniek_filter_active"):
+        return None
+    params = job_options.get_uniek_params(options)
+    return build_color_lut(gamma=params["gamma"], contrast=params["contrast"])
+
+def bw_weights(rgb=(1, 1, 1)):
+    """ Ваги каналів для Ч/Б точно як у vfx.blackwhite з preserve_luminosity=True (float64, сума = 1). """
+    return tuple(1.0 * np.array(rgb) / sum(rgb))
+
+def apply_lut(src, lut, out):
+    """ Застосовує таблицю до src і записує результат в out (cv2.LUT, якщо доступний, інакше np.take). """
+    if cv2 is not None and src.flags.c_contiguous and out.flags.c_contiguous:
+        cv2.LUT(src, lut, dst=out)
+    else:
+        np.take(lut, src, out=out, mode="clip") # mode="clip" - без проміжного буфера, індекси uint8 завжди в межах
+    return out
+
+class ColorStage:
+    """
+    Кольоровий етап для одного завдання: Ч/Б та/або таблиця гамми/контрасту.
+    Проміжні буфери виділяються один раз на розмір кадру; rows дозволяє обробляти кадр смугами.
+    """
+
+    def __init__(self, bw=False, lut=None, bw_rgb=(1, 1, 1)):
+        self.bw = bw
+        self.lut = lut
+        self.bw_weights = bw_weights(bw_rgb)
+        self._acc = None
+        self._tmp = None
+        self._gray = None
+        self._out = None
+
+    @classmethod
+    def from_options(cls, options):
+        return cls(bw=bool(options.get("bw_filter_active")), lut=build_lut_for_options(options))
+
+    @property
+    def active(self):
+        return self.bw or self.lut is not None
+
+    def prepare(self, shape):
+        """ Виділяє проміжні буфери для кадру заданого розміру (H, W, 3). """
+        if self.bw and (self._gray is None or self._gray.shape != shape[:2]):
+            self._acc = np.empty(shape[:2], dtype=np.float64)
+            self._tmp = np.empty(shape[:2], dtype=np.float64)
+            self._gray = np.empty(shape[:2], dtype=np.uint8)
+
+    def _bw_gray(self, src, rows):
+        """ R*r + G*g + B*b у float64 і відкидання дробової частини - той самий порядок операцій, що й у vfx.blackwhite. """
+        acc, tmp, gray = self._acc[rows], self._tmp[rows], self._gray[rows]
+        w_r, w_g, w_b = self.bw_weights
+        np.multiply(src[..., 0], w_r, out=acc)
+        np.multiply(src[..., 1], w_g, out=tmp)
+        acc += tmp
+        np.multiply(src[..., 2], w_b, out=tmp)
+        acc += tmp
+        np.copyto(gray, acc, casting="unsafe") # Як astype('uint8'): значення в [0, 255], дробова частина відкидається
+        return gray
+
+    def apply(self, src, out, rows=slice(None)):
+        """ Обробляє src (кадр або смугу кадру) у out. rows - відповідні рядки повного кадру для буферів. """
+        if self.bw:
+            if rows == slice(None):
+                self.prepare(src.shape) # Для обробки смугами prepare() викликається заздалегідь для всього кадру
+            gray = self._bw_gray(src, rows)
+            if self.lut is not None:
+                apply_lut(gray, self.lut, gray) # Таблиця на одному каналі - втричі менше роботи
+            out[...] = gray[:, :, None]
+        elif self.lut is not None:
+            apply_lut(src, self.lut, out)
+        else:
+            np.copyto(out, src)
+        return out
+
+    def __call__(self, frame):
+        """ Варіант для clip.fl_image: результат пишеться у буфер, що повторно використовується між кадрами. """
+        if self._out is None or self._out.shape != frame.shape:
+            self._out = np.empty(frame.shape, dtype=np.uint8)
+        return self.apply(frame, self._out)
@@ -0,0 +1,77 @@
+# app_logic/encode_progress.py
+# Облік прогресу кодування за кадрами: частка виконаного, швидкість (кадрів/с) і орієнтовний залишок часу.
+# Спільний для рушіїв MoviePy (покадровий запис) та FFmpeg (розбір виводу -progress).
+import time
+
+# Підготовка (завантаження, побудова фільтрів) займає 0.0-0.15 шкали прогресу, кодування - 0.15-1.0
+ENCODE_PROGRESS_START = 0.15
+ENCODE_PROGRESS_END = 1.0
+
+def format_eta(seconds):
+    """ Залишок часу у вигляді Г:ХХ:СС або ХХ:СС. """
+    if seconds is None:
+        return "--:--"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes:02d}:{secs:02d}"
+
+class EncodeProgress:
+    """
+    Перетворює кількість закодованих кадрів на виклики progress_callback(value, details), де details -
+    словник {"frames_done", "total_frames", "fps", "eta", "elapsed"} (eta та fps можуть бути None).
+    update() повертає True, якщо користувач скасував обробку; перевірка виконується кожні check_every кадрів,
+    щоб навіть повільне кодування зупинялося не пізніше ніж через кілька кадрів.
+    """
+
+    def __init__(self, total_frames, progress_callback, check_if_cancelled_callback,
+                 start=ENCODE_PROGRESS_START, end=ENCODE_PROGRESS_END, check_every=5, report_interval=0.25):
+        self.total_frames = max(0, int(total_frames or 0))
+        self.progress_callback = progress_callback
+        self.check_if_cancelled_callback = check_if_cancelled_callback
+        self.start = start
+        self.end = end
+        self.check_every = max(1, check_every)
+        self.report_interval = report_interval
+        self.frames_done = 0
+        self.started = time.monotonic()
+        self._last_report = None
+        self._last_check_frame = 0
+
+    def details(self):
+        elapsed = time.monotonic() - self.started
+        fps = self.frames_done / elapsed if elapsed > 0 and self.frames_done else None
+        eta = None
+        if fps and self.total_frames:
+            eta = max(0.0, (self.total_frames - self.frames_done) / fps)
+        return {"frames_done": self.frames_done, "total_frames": self.total_frames,
+                "fps": fps, "eta": eta, "elapsed": elapsed}
+
+    def value(self):
+        if not self.total_frames:
+            return self.start
+        fraction = min(1.0, self.frames_done / self.total_frames)
+        return self.start + (self.end - self.start) * fraction
+
+    def report(self, force=False):
+        now = time.monotonic()
+        if not force and self._last_report is not None and now - self._last_report < self.report_interval:
+            return
+        self._last_report = now
+        self.progress_callback(self.value(), self.details())
+
+    def update(self, frames_done):
+        """ Оновлює кількість готових кадрів; повертає True, якщо обробку скасовано. """
+        self.frames_done = frames_done
+        if self.total_frames and frames_done > self.total_frames:
+            self.total_frames = frames_done # Оцінка тривалість*fps може бути на кадр меншою за фактичну
+        self.report()
+        if frames_done - self._last_check_frame >= self.check_every or frames_done == 0:
+            self._last_check_frame = frames_done
+            return bool(self.check_if_cancelled_callback())
+        return False
+
+    def finish(self):
+        if self.total_frames:
+            self.frames_done = max(self.frames_done, self.total_frames)
+        self.report(force=True)
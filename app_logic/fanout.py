@@ -0,0 +1,197 @@
+# app_logic/fanout.py
+# Одне декодування - багато результатів: кілька гілок (пресетів або варіантів "Унік") кодуються за один прохід FFmpeg.
+# Для кожної гілки будується повний ланцюжок фільтрів; їхній спільний початок виконується один раз,
+# далі фільтр split розгалужує потік, і кожна гілка виконує лише власний залишок та кодування.
+# Якщо гілки відрізняються розміром (пресети), поворот на 90°/180° і кольорові фільтри переносяться перед
+# масштабуванням (сторони масштабу переставляються), щоб їх можна було виконати спільно. Геометрія при цьому
+# збігається з окремими запусками, а кольорові таблиці застосовуються до кадру до масштабування,
+# тож результат візуально такий самий, але не побітово ідентичний окремим запускам.
+import os
+
+from app_logic import job_options
+from app_logic.encode_progress import ENCODE_PROGRESS_START, EncodeProgress
+from app_logic.ffmpeg_backend import (
+    FfmpegEngineError, build_audio_filters, build_color_filters, build_crop_filters, build_noise_filters,
+    build_speed_filters, build_transform_filters, encoder_pix_fmt, expected_output_frames, run_ffmpeg_command
+)
+from app_logic.media_probe import MediaProbeError, probe_media
+from app_logic.utils import get_ffmpeg_path_for_moviepy_ua, probe_ffmpeg_capabilities_ua
+from app_logic.video_processor import ProcessingCancelledError, process_video_task
+
+# Ключі, які визначає пресет гілки, а не спільні опції завдання
+BRANCH_OWNED_KEYS = ("resize_active", "width", "height", "fanout_presets")
+
+def resolve_branch_options(options):
+    """ Список (назва пресету, опції гілки): пресет задає розмір, решта опцій спільна для всіх гілок. """
+    shared = {k: v for k, v in options.items() if k not in BRANCH_OWNED_KEYS}
+    branches = []
+    for preset_name in options.get("fanout_presets") or []:
+        if preset_name not in job_options.PRESET_SETTINGS:
+            raise KeyError(f"Невідомий пресет: {preset_name}")
+        branch_options = job_options.resolve_options(preset_name)
+        branch_options.update(shared)
+        branches.append((preset_name, branch_options))
+    return branches
+
+def _branch_size(options, info):
+    """ Розмір кадру гілки перед обрізкою "Унік" (після масштабування та повороту). """
+    size = job_options.parse_resize(options) or info.size
+    rotation_angle = options.get("rotation_angle", 0)
+    if rotation_angle != 0:
+        size = job_options.rotated_size(size[0], size[1], rotation_angle)
+    return size
+
+def branch_video_chain(options, info, scale_last=False):
+    """
+    Повний ланцюжок відеофільтрів гілки. Звичайний порядок збігається з ffmpeg_backend.build_video_filter_chain;
+    при scale_last поворот (кратний 90°) і кольорові фільтри виконуються до масштабування.
+    """
+    resize = job_options.parse_resize(options)
+    geometry_and_color = build_transform_filters(options, resize or info.size) + build_color_filters(options)
+    if resize and scale_last:
+        width, height = resize
+        if options.get("rotation_angle", 0) % 180 != 0:
+            width, height = height, width # Кадр уже повернуто на 90°/270°
+        chain = geometry_and_color + [f"scale={width}:{height}"]
+    else:
+        chain = ([f"scale={resize[0]}:{resize[1]}"] if resize else []) + geometry_and_color
+    return (chain + build_crop_filters(options, _branch_size(options, info))
+            + build_noise_filters(options) + build_speed_filters(options, info.fps)
+            + [f"format={encoder_pix_fmt(job_options.compute_output_size(options, info.size[0], info.size[1]))}"])
+
+def _common_prefix(chains):
+    prefix = []
+    for items in zip(*chains):
+        if any(item != items[0] for item in items[1:]):
+            break
+        prefix.append(items[0])
+    return prefix
+
+def plan_fanout(branch_options_list, info):
+    """ Повертає (спільні відеофільтри, залишки для кожної гілки). """
+    resizes = {job_options.parse_resize(options) for options in branch_options_list}
+    scale_last = len(resizes) > 1 and all(options.get("rotation_angle", 0) % 90 == 0 for options in branch_options_list)
+    chains = [branch_video_chain(options, info, scale_last) for options in branch_options_list]
+    shared = _common_prefix(chains) if len(chains) > 1 else []
+    return shared, [chain[len(shared):] for chain in chains]
+
+def _split_graph(input_label, shared, rests, split_filter, passthrough, prefix):
+    """ Частина графа: спільні фільтри, split на N гілок, залишок кожної гілки. Повертає (рядки, мітки виходів). """
+    count = len(rests)
+    split_labels = [f"[{prefix}s{i}]" for i in range(count)]
+    graph = [f"{input_label}{','.join(shared + [f'{split_filter}={count}'])}{''.join(split_labels)}"]
+    out_labels = []
+    for i, rest in enumerate(rests):
+        graph.append(f"{split_labels[i]}{','.join(rest or [passthrough])}[{prefix}{i}]")
+        out_labels.append(f"[{prefix}{i}]")
+    return graph, out_labels
+
+def build_fanout_filter_complex(branch_options_list, info):
+    """ Повертає (рядок -filter_complex, мітки відеовиходів, мітки аудіовиходів або None). """
+    shared, rests = plan_fanout(branch_options_list, info)
+    graph, video_labels = _split_graph("[0:v]", shared, rests, "split", "null", "v")
+    audio_labels = None
+    if info.has_audio:
+        # Однакова обробка аудіо (пресети) виконується один раз; різна (варіанти) - після asplit
+        audio_chains = [build_audio_filters(options, info.audio_sample_rate) for options in branch_options_list]
+        audio_shared = _common_prefix(audio_chains) if len(audio_chains) > 1 else []
+        audio_graph, audio_labels = _split_graph("[0:a]", audio_shared, [c[len(audio_shared):] for c in audio_chains],
+                                                 "asplit", "anull", "a")
+        graph += audio_graph
+    return ";".join(graph), video_labels, audio_labels
+
+def build_fanout_command(input_path, output_paths, branch_options_list, info):
+    filter_complex, video_labels, audio_labels = build_fanout_filter_complex(branch_options_list, info)
+    cmd = [get_ffmpeg_path_for_moviepy_ua(), "-y", "-hide_banner", "-loglevel", "error",
+           "-i", input_path, "-filter_complex", filter_complex]
+    for i, output_path in enumerate(output_paths):
+        cmd += ["-map", video_labels[i]]
+        if audio_labels:
+            cmd += ["-map", audio_labels[i], "-c:a", "aac"]
+        output_size = job_options.compute_output_size(branch_options_list[i], info.size[0], info.size[1])
+        cmd += ["-c:v", "libx264", "-pix_fmt", encoder_pix_fmt(output_size), "-threads", "4", output_path]
+    return cmd
+
+def _remove_outputs(output_paths):
+    for path in output_paths:
+        try:
+            if os.path.exists(path): os.remove(path)
+        except OSError:
+            pass
+
+def encode_branches(input_path, output_paths, branch_options_list, info, progress_callback, check_if_cancelled_callback):
+    """
+    Кодує всі гілки одним викликом FFmpeg. При помилці чи скасуванні видаляє частково записані
+    результати всіх гілок і повторно викидає FfmpegEngineError / ProcessingCancelledError.
+    """
+    cmd = build_fanout_command(input_path, output_paths, branch_options_list, info)
+    total_frames = max((expected_output_frames(options, info) or 0) for options in branch_options_list)
+    tracker = EncodeProgress(total_frames, progress_callback, check_if_cancelled_callback)
+    try:
+        run_ffmpeg_command(cmd, output_paths[0], check_if_cancelled_callback, progress_tracker=tracker)
+    except (ProcessingCancelledError, FfmpegEngineError):
+        _remove_outputs(output_paths)
+        raise
+
+def _process_branches_separately(input_path, output_folder, branches,
+                                 status_callback, progress_callback, check_if_cancelled_callback):
+    """ Запасний шлях без FFmpeg: кожен пресет окремим process_video_task. """
+    outputs = []
+    for index, (preset_name, options) in enumerate(branches):
+        status_callback(f"Пресет {index + 1}/{len(branches)}: {preset_name}")
+        def _branch_progress(value, details=None, index=index):
+            progress_callback((index + value) / len(branches), details)
+        output_path = process_video_task(input_path, output_folder, options,
+                                         status_callback, _branch_progress, check_if_cancelled_callback)
+        if not output_path:
+            return None
+        outputs.append(output_path)
+    return outputs
+
+def process_fanout_task(input_path, output_folder, options,
+                        status_callback, progress_callback, check_if_cancelled_callback):
+    """
+    Кодує всі пресети з options['fanout_presets'] за одне декодування. Повертає список шляхів
+    у порядку пресетів або None при помилці/скасуванні. Без FFmpeg пресети обробляються по черзі.
+    """
+    try:
+        branches = resolve_branch_options(options)
+    except KeyError as e:
+        status_callback(f"Помилка: {e}")
+        return None
+    if not branches:
+        status_callback("Помилка: Не вказано жодного пресету для fan-out.")
+        return None
+
+    if not probe_ffmpeg_capabilities_ua()["available"]:
+        status_callback("FFmpeg недоступний, пресети обробляються по черзі...")
+        return _process_branches_separately(input_path, output_folder, branches,
+                                            status_callback, progress_callback, check_if_cancelled_callback)
+    try:
+        status_callback(f"Аналіз відео: {os.path.basename(input_path)}")
+        progress_callback(0.05)
+        try:
+            info = probe_media(input_path)
+        except MediaProbeError as e:
+            status_callback(f"Помилка: Не вдалося проаналізувати відео: {e}")
+            return None
+
+        branch_options_list = [branch_options for _, branch_options in branches]
+        output_paths = []
+        for branch_options in branch_options_list:
+            output_size = job_options.compute_output_size(branch_options, info.width, info.height)
+            output_paths.append(job_options.build_output_path(
+                input_path, output_folder, job_options.get_effect_tags(branch_options), output_size))
+        if len(set(output_paths)) != len(output_paths):
+            status_callback("Помилка: Кілька пресетів дають однакову назву вихідного файлу.")
+            return None
+
+        if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед кодуванням.")
+        status_callback(f"Кодування {len(output_paths)} пресетів за одне декодування...")
+        progress_callback(ENCODE_PROGRESS_START)
+        encode_branches(input_path, output_paths, branch_options_list, info, progress_callback, check_if_cancelled_callback)
+        status_callback("Усі пресети збережено: " + ", ".join(os.path.basename(p) for p in output_paths))
+        return output_paths
+    except (ProcessingCancelledError, FfmpegEngineError) as e:
+        status_callback(str(e) if str(e) else "Обробку скасовано.")
+        return None
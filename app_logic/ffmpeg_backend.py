@@ -0,0 +1,263 @@
+# app_logic/ffmpeg_backend.py
+# Альтернативний рушій обробки: компілює словник options в один -filter_complex FFmpeg
+# і виконує його окремим підпроцесом, без декодування кадрів у Python.
+import math
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+from app_logic import job_options
+from app_logic.encode_progress import ENCODE_PROGRESS_START, EncodeProgress
+from app_logic.media_probe import MediaProbeError, probe_media
+from app_logic.profiling import NULL_PROFILER
+from app_logic.utils import get_ffmpeg_path_for_moviepy_ua, get_subprocess_kwargs_ua, probe_ffmpeg_capabilities_ua
+from app_logic.video_processor import ProcessingCancelledError
+
+class FfmpegEngineError(Exception):
+    """ Рушій FFmpeg недоступний або завершився з помилкою (можна перейти на MoviePy). """
+    pass
+
+def _fmt(value):
+    """ Компактний запис числа для виразів фільтрів. """
+    return f"{value:.6g}"
+
+# --- Побудова фільтрів ---
+
+def build_resize_filters(options):
+    resize = job_options.parse_resize(options)
+    return [f"scale={resize[0]}:{resize[1]}"] if resize else []
+
+def encoder_pix_fmt(size):
+    """ Як у MoviePy: yuv420p лише для парних сторін (libx264 не кодує непарний розмір у 4:2:0), інакше yuv444p. """
+    return "yuv420p" if size[0] % 2 == 0 and size[1] % 2 == 0 else "yuv444p"
+
+def build_transform_filters(options, size=None):
+    """
+    Поворот (з expand, як у MoviePy) та дзеркала. Додатний кут у MoviePy - проти годинникової.
+    size - розмір кадру перед поворотом: тоді розмір після довільного повороту задається явно (як у PIL).
+    """
+    filters = []
+    rotation_angle = options.get("rotation_angle", 0)
+    normalized = rotation_angle % 360
+    if normalized == 90: filters.append("transpose=2")
+    elif normalized == 270: filters.append("transpose=1")
+    elif normalized == 180: filters += ["hflip", "vflip"]
+    elif normalized != 0:
+        # У FFmpeg додатний кут повертає за годинниковою, тому змінюємо знак
+        angle_expr = f"{_fmt(-rotation_angle)}*PI/180"
+        if size:
+            out_width, out_height = job_options.rotated_size(size[0], size[1], rotation_angle)
+            filters.append(f"rotate={angle_expr}:ow={out_width}:oh={out_height}:c=black")
+        else:
+            filters.append(f"rotate={angle_expr}:ow=rotw({angle_expr}):oh=roth({angle_expr}):c=black")
+    if options.get("flip_h_active"): filters.append("hflip")
+    if options.get("flip_v_active"): filters.append("vflip")
+    return filters
+
+def build_color_filters(options):
+    """ Попіксельні кольорові операції: Ч/Б (рівні ваги каналів, як vfx.blackwhite) та гамма/контраст "Унік". """
+    filters = []
+    if options.get("bw_filter_active"):
+        third = _fmt(1.0 / 3.0)
+        filters.append("colorchannelmixer=" + ":".join(
+            f"{out_ch}{in_ch}={third}" for out_ch in "rgb" for in_ch in "rgb"))
+    if options.get("uniek_filter_active"):
+        params = job_options.get_uniek_params(options)
+        gamma, contrast = params["gamma"], params["contrast"]
+        # Ті ж формули, що у vfx.gamma_corr та vfx.lum_contrast (lum=0, поріг 127), з відкиданням дробової частини
+        gamma_expr = f"floor(255*pow(val/255,{_fmt(gamma)}))"
+        lut_expr = f"clip(floor({gamma_expr}+{_fmt(contrast)}*({gamma_expr}-127)),0,255)"
+        filters.append(f"lutrgb=r='{lut_expr}':g='{lut_expr}':b='{lut_expr}'")
+    return filters
+
+def build_crop_filters(options, size):
+    """ Обрізка "Унік"; size - розмір кадру перед обрізкою. """
+    if not options.get("uniek_filter_active"):
+        return []
+    crop_px = job_options.get_uniek_params(options)["crop_px"]
+    cropped = job_options.uniek_crop_size(size[0], size[1], crop_px)
+    if not cropped:
+        return []
+    return [f"crop={cropped[0]}:{cropped[1]}:{crop_px}:{crop_px}"]
+
+def build_noise_filters(options):
+    """ Часовий шум "Унік". Гаусів шум FFmpeg має sigma ~ strength/sqrt(3). """
+    if not options.get("uniek_filter_active"):
+        return []
+    sigma = job_options.get_uniek_params(options)["noise_sigma"]
+    if sigma <= 0:
+        return []
+    strength = max(1, min(100, int(round(sigma * math.sqrt(3)))))
+    noise = f"noise=alls={strength}:allf=t"
+    if options.get("noise_seed") is not None:
+        noise += f":all_seed={int(options['noise_seed']) & 0x7FFFFFFF}"
+    return [noise]
+
+def build_speed_filters(options, fps):
+    if not options.get("uniek_filter_active"):
+        return []
+    speed = job_options.get_uniek_params(options)["speed"]
+    if speed == 1:
+        return []
+    filters = [f"setpts=PTS/{_fmt(speed)}"]
+    if fps:
+        filters.append(f"fps={_fmt(fps)}") # Як і speedx у MoviePy, зберігаємо початковий fps
+    return filters
+
+def build_audio_filters(options, sample_rate):
+    """ Гучність та швидкість аудіо. speedx у MoviePy змінює і висоту тону, тому використовуємо asetrate. """
+    if not options.get("uniek_filter_active"):
+        return []
+    params = job_options.get_uniek_params(options)
+    filters = []
+    if params["volume"] != 1:
+        filters.append(f"volume={_fmt(params['volume'])}")
+    if params["speed"] != 1:
+        if sample_rate:
+            filters += [f"asetrate={_fmt(sample_rate * params['speed'])}", f"aresample={sample_rate}"]
+        else:
+            filters.append(f"atempo={_fmt(params['speed'])}")
+    return filters
+
+def build_video_filter_chain(options, info):
+    """ Повний ланцюжок відеофільтрів у тому ж порядку, що й process_video_task. """
+    size = info.size
+    resize = job_options.parse_resize(options)
+    if resize:
+        size = resize
+    pre_rotation_size = size
+    rotation_angle = options.get("rotation_angle", 0)
+    if rotation_angle != 0:
+        size = job_options.rotated_size(size[0], size[1], rotation_angle)
+    output_size = job_options.compute_output_size(options, info.size[0], info.size[1])
+    return (build_resize_filters(options) + build_transform_filters(options, pre_rotation_size)
+            + build_color_filters(options) + build_crop_filters(options, size)
+            + build_noise_filters(options) + build_speed_filters(options, info.fps)
+            + [f"format={encoder_pix_fmt(output_size)}"])
+
+def build_filter_complex(options, info):
+    """ Повертає (рядок -filter_complex, мітка аудіовиходу або None). """
+    graph = [f"[0:v]{','.join(build_video_filter_chain(options, info))}[vout]"]
+    audio_label = None
+    if info.has_audio:
+        audio_filters = build_audio_filters(options, info.audio_sample_rate)
+        if audio_filters:
+            graph.append(f"[0:a]{','.join(audio_filters)}[aout]")
+            audio_label = "[aout]"
+    return ";".join(graph), audio_label
+
+def build_ffmpeg_command(input_path, output_path, options, info):
+    filter_complex, audio_label = build_filter_complex(options, info)
+    cmd = [get_ffmpeg_path_for_moviepy_ua(), "-y", "-hide_banner", "-loglevel", "error",
+           "-i", input_path, "-filter_complex", filter_complex, "-map", "[vout]"]
+    if audio_label:
+        cmd += ["-map", audio_label]
+    elif info.has_audio:
+        cmd += ["-map", "0:a:0"]
+    output_size = job_options.compute_output_size(options, info.size[0], info.size[1])
+    cmd += ["-c:v", "libx264", "-pix_fmt", encoder_pix_fmt(output_size), "-threads", "4"]
+    if info.has_audio:
+        cmd += ["-c:a", "aac"]
+    cmd.append(output_path)
+    return cmd
+
+def _remove_partial_file(path):
+    try:
+        if os.path.exists(path): os.remove(path)
+    except OSError:
+        pass
+
+def expected_output_frames(options, info):
+    """ Очікувана кількість кадрів результату (з урахуванням зміни швидкості "Унік") або None. """
+    if not info.duration or not info.fps:
+        return None
+    duration = info.duration
+    if options.get("uniek_filter_active"):
+        duration /= job_options.get_uniek_params(options)["speed"]
+    return int(round(duration * info.fps))
+
+def _read_progress_output(stream, state):
+    """ Читає блоки `key=value` з -progress pipe:1 у потоці, щоб основний цикл не блокувався. """
+    for raw_line in iter(stream.readline, b""):
+        key, sep, value = raw_line.decode("ascii", errors="replace").strip().partition("=")
+        if sep and key == "frame":
+            try: state["frame"] = int(value)
+            except ValueError: pass
+
+def run_ffmpeg_command(cmd, output_path, check_if_cancelled_callback, poll_interval=0.2, progress_tracker=None):
+    """
+    Запускає FFmpeg, періодично перевіряючи скасування. При помилці видаляє частковий файл.
+    Якщо передано progress_tracker (EncodeProgress), FFmpeg звітує про кадри через -progress pipe:1.
+    """
+    if progress_tracker is not None:
+        cmd = cmd[:1] + ["-progress", "pipe:1", "-nostats"] + cmd[1:]
+    progress_state = {"frame": 0}
+    with tempfile.TemporaryFile() as stderr_file:
+        try:
+            proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                                    stdout=subprocess.PIPE if progress_tracker is not None else subprocess.DEVNULL,
+                                    stderr=stderr_file, **get_subprocess_kwargs_ua())
+        except OSError as e:
+            raise FfmpegEngineError(f"Не вдалося запустити FFmpeg: {e}")
+        reader = None
+        if progress_tracker is not None:
+            reader = threading.Thread(target=_read_progress_output, args=(proc.stdout, progress_state), daemon=True)
+            reader.start()
+        while proc.poll() is None:
+            if progress_tracker is not None:
+                progress_tracker.update(progress_state["frame"])
+            if check_if_cancelled_callback(): # Опитування раз на poll_interval, незалежно від кількості кадрів
+                proc.kill()
+                proc.wait()
+                _remove_partial_file(output_path)
+                raise ProcessingCancelledError("Скасовано під час кодування FFmpeg.")
+            time.sleep(poll_interval)
+        if reader is not None:
+            reader.join(timeout=1.0)
+            proc.stdout.close()
+        if proc.returncode != 0:
+            stderr_file.seek(0)
+            error_tail = stderr_file.read().decode("utf-8", errors="replace").strip()[-500:]
+            _remove_partial_file(output_path)
+            raise FfmpegEngineError(f"FFmpeg завершився з кодом {proc.returncode}: {error_tail}")
+        if progress_tracker is not None:
+            progress_tracker.update(progress_state["frame"])
+            progress_tracker.finish()
+
+def process_video_task_ffmpeg(input_path, output_folder, options,
+                              status_callback, progress_callback, check_if_cancelled_callback, profiler=NULL_PROFILER):
+    """
+    Аналог process_video_task, що виконує всю обробку одним викликом FFmpeg.
+    Викидає FfmpegEngineError, якщо рушій недоступний, щоб викликач міг перейти на MoviePy.
+    """
+    if not probe_ffmpeg_capabilities_ua()["available"]:
+        raise FfmpegEngineError("FFmpeg не знайдено.")
+    try:
+        status_callback(f"Аналіз відео (ffprobe): {os.path.basename(input_path)}")
+        progress_callback(0.05)
+        if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано користувачем перед аналізом відео.")
+
+        try:
+            with profiler.span("probe"):
+                info = probe_media(input_path)
+        except MediaProbeError as e:
+            raise FfmpegEngineError(f"Не вдалося проаналізувати відео: {e}")
+        output_size = job_options.compute_output_size(options, info.width, info.height)
+        output_path = job_options.build_output_path(
+            input_path, output_folder, job_options.get_effect_tags(options), output_size)
+        cmd = build_ffmpeg_command(input_path, output_path, options, info)
+
+        if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед збереженням файлу.")
+        status_callback(f"Обробка FFmpeg filtergraph і збереження в: {output_path}")
+        progress_callback(ENCODE_PROGRESS_START)
+        tracker = EncodeProgress(expected_output_frames(options, info), progress_callback, check_if_cancelled_callback)
+        with profiler.span("ffmpeg_filtergraph", command=" ".join(cmd)):
+            run_ffmpeg_command(cmd, output_path, check_if_cancelled_callback, progress_tracker=tracker)
+
+        status_callback(f"Відео успішно збережено: {output_path}")
+        return output_path
+    except ProcessingCancelledError as e:
+        status_callback(str(e) if str(e) else "Обробку скасовано.")
+        return None
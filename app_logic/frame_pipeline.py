@@ -0,0 +1,73 @@
+# app_logic/frame_pipeline.py
+# Компілятор покадрового конвеєра: перетворює options в одну функцію frame -> frame,
+# яка за один виклик виконує обрізку, дзеркала, повороти на 90°, кольорові операції та шум
+# у попередньо виділений вихідний буфер (замість 5-6 шарів fx MoviePy з копіюванням кадру на кожному).
+import numpy as np
+
+from app_logic import job_options
+from app_logic.color_lut import ColorStage
+from app_logic.noise import NoiseGenerator
+from app_logic.tile_parallel import apply_color_and_noise, stripe_pool_from_options
+
+class FramePipeline:
+    """
+    Скомпільований покадровий конвеєр. Підходить для clip.fl_image(...).
+    Геометрія (поворот на 90°, дзеркала, обрізка) виконується через представлення (views) NumPy без копій,
+    кольоровий етап (ColorStage: Ч/Б і таблиця гамми/контрасту) пише результат у вихідний буфер,
+    який повторно використовується між кадрами; шум додається в тому ж буфері.
+    """
+
+    def __init__(self, options, reuse_output=True):
+        rotation_angle = options.get("rotation_angle", 0)
+        self.rotation_k = (rotation_angle // 90) % 4 # np.rot90 з додатним k повертає проти годинникової, як MoviePy
+        self.flip_h = bool(options.get("flip_h_active"))
+        self.flip_v = bool(options.get("flip_v_active"))
+        self.bw = bool(options.get("bw_filter_active"))
+        self.uniek = bool(options.get("uniek_filter_active"))
+        self.uniek_params = job_options.get_uniek_params(options)
+        self.reuse_output = reuse_output
+        self.color_stage = ColorStage.from_options(options)
+        self.noise = NoiseGenerator.from_options(options) if self.uniek and self.uniek_params["noise_sigma"] > 0 else None
+        self.stripes = stripe_pool_from_options(options) # options['tile_parallel']: колір і шум смугами в пулі потоків
+        self._out = None
+
+    @staticmethod
+    def supports(options):
+        """ Конвеєр підтримує лише повороти на кути, кратні 90°. """
+        return options.get("rotation_angle", 0) % 90 == 0
+
+    def geometry_view(self, frame):
+        """ Поворот, дзеркала та обрізка "Унік" як представлення вхідного кадру (без копіювання). """
+        view = frame
+        if self.rotation_k: view = np.rot90(view, self.rotation_k)
+        if self.flip_h: view = view[:, ::-1]
+        if self.flip_v: view = view[::-1]
+        if self.uniek:
+            crop_px = self.uniek_params["crop_px"]
+            h, w = view.shape[:2]
+            if job_options.uniek_crop_size(w, h, crop_px):
+                view = view[crop_px:h - crop_px, crop_px:w - crop_px]
+        return view
+
+    def _buffer(self, name, shape, dtype):
+        buf = getattr(self, name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype or not self.reuse_output:
+            buf = np.empty(shape, dtype=dtype)
+            setattr(self, name, buf)
+        return buf
+
+    def __call__(self, frame):
+        view = self.geometry_view(frame)
+        out = self._buffer("_out", view.shape, np.uint8)
+        if self.stripes:
+            return apply_color_and_noise(view, out, self.color_stage, self.noise, self.stripes)
+        self.color_stage.apply(view, out)
+        if self.noise:
+            self.noise.add(out, self.noise.next_noise(out.shape), out)
+        return out
+
+def compile_frame_pipeline(options, reuse_output=True):
+    """ Повертає FramePipeline для options або None, якщо опції не підтримуються конвеєром. """
+    if not FramePipeline.supports(options):
+        return None
+    return FramePipeline(options, reuse_output=reuse_output)
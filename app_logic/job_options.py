@@ -0,0 +1,140 @@
+# app_logic/job_options.py
+# Спільні описи опцій завдання, які використовують усі рушії обробки:
+# параметри комплексу "Унік", теги ефектів, фінальний розмір кадру та назва вихідного файлу.
+import math
+import os
+
+# Опції завдання за замовчуванням (ключі ті самі, що формує MainWindow.start_processing)
+DEFAULT_OPTIONS = {
+    'resize_active': False, 'width': "1280", 'height': "720",
+    'bw_filter_active': False,
+    'uniek_filter_active': False,
+    'rotation_angle': 0, 
+    'flip_h_active': False, 
+    'flip_v_active': False, 
+    'engine': "moviepy",
+}
+
+# Пресети для платформ; 'name' - назва для відображення, не опція обробки
+PRESET_SETTINGS = {
+    'tiktok_reels': {'width': "1080", 'height': "1920", 'resize_active': True, 'bw_filter_active': False, 'uniek_filter_active': False, 'name': "TikTok/Reels (1080x1920)"},
+    'instagram_portrait': {'width': "1080", 'height': "1350", 'resize_active': True, 'bw_filter_active': False, 'uniek_filter_active': False, 'name': "Instagram Портрет (1080x1350)"},
+    'instagram_square': {'width': "1080", 'height': "1080", 'resize_active': True, 'bw_filter_active': False, 'uniek_filter_active': False, 'name': "Instagram Квадрат (1080x1080)"},
+    'youtube_1080p': {'width': "1920", 'height': "1080", 'resize_active': True, 'bw_filter_active': False, 'uniek_filter_active': False, 'name': "YouTube 1080p (1920x1080)"},
+    'youtube_720p': {'width': "1280", 'height': "720", 'resize_active': True, 'bw_filter_active': False, 'uniek_filter_active': False, 'name': "YouTube 720p (1280x720)"},
+}
+
+def resolve_options(preset_name=None, overrides=None):
+    """
+    Збирає повний словник опцій: DEFAULT_OPTIONS, потім пресет (якщо вказано), потім перевизначення.
+    Викидає KeyError для невідомого пресету.
+    """
+    options = dict(DEFAULT_OPTIONS)
+    if preset_name:
+        preset_data = PRESET_SETTINGS[preset_name]
+        options.update({k: v for k, v in preset_data.items() if k != 'name'})
+    options.update(overrides or {})
+    return options
+
+# Параметри комплексу "Унік" за замовчуванням (як у початковій реалізації на MoviePy)
+UNIEK_DEFAULT_PARAMS = {
+    "crop_px": 2,         # обрізка з кожного боку, пікселі
+    "gamma": 1.03,        # vfx.gamma_corr
+    "contrast": 3,        # vfx.lum_contrast(lum=0, contrast=...)
+    "noise_sigma": 1.5,   # стандартне відхилення шуму
+    "volume": 1.02,       # afx.volumex
+    "speed": 0.995,       # speedx
+}
+
+def get_uniek_params(options):
+    """ Повертає параметри "Унік" з урахуванням перевизначень у options['uniek_params']. """
+    params = dict(UNIEK_DEFAULT_PARAMS)
+    params.update(options.get("uniek_params") or {})
+    return params
+
+def parse_resize(options):
+    """ Повертає (ширина, висота) для зміни розміру або None, якщо зміна неактивна чи значення некоректні. """
+    if not options.get("resize_active"):
+        return None
+    try:
+        width = int(options.get("width", ""))
+        height = int(options.get("height", ""))
+    except (TypeError, ValueError):
+        return None
+    if width <= 0 or height <= 0:
+        return None
+    return width, height
+
+def get_effect_tags(options):
+    """ Теги ефектів для назви файлу в тому ж порядку, в якому їх додає process_video_task. """
+    tags = []
+    rotation_angle = options.get("rotation_angle", 0)
+    if rotation_angle != 0: tags.append(f"rot{rotation_angle}")
+    if options.get("flip_h_active"): tags.append("fliph")
+    if options.get("flip_v_active"): tags.append("flipv")
+    if options.get("bw_filter_active"): tags.append("bw")
+    if options.get("uniek_filter_active"): tags.append("uniek")
+    return tags
+
+def rotated_size(width, height, angle):
+    """
+    Розмір кадру після повороту з expand=True - так само, як рахує PIL Image.rotate, яким повертає MoviePy:
+    кути кадру повертаються навколо центру (з округленням матриці до 15 знаків), розмір - ceil(max) - floor(min).
+    """
+    normalized = angle % 360
+    if normalized in (0, 180):
+        return width, height
+    if normalized in (90, 270):
+        return height, width
+    rad = -math.radians(normalized)
+    a, b = round(math.cos(rad), 15), round(math.sin(rad), 15)
+    d, e = round(-math.sin(rad), 15), a
+    cx, cy = width / 2, height / 2
+    c = a * -cx + b * -cy + cx
+    f = d * -cx + e * -cy + cy
+    corners = ((0, 0), (width, 0), (width, height), (0, height))
+    xs = [a * x + b * y + c for x, y in corners]
+    ys = [d * x + e * y + f for x, y in corners]
+    return (int(math.ceil(max(xs)) - math.floor(min(xs))), int(math.ceil(max(ys)) - math.floor(min(ys))))
+
+def uniek_crop_size(width, height, crop_px):
+    """ Розмір після обрізки "Унік" або None, якщо кадр замалий для обрізки. """
+    if width > crop_px * 2 and height > crop_px * 2:
+        return width - crop_px * 2, height - crop_px * 2
+    return None
+
+def compute_output_size(options, src_width, src_height):
+    """ Обчислює фінальний розмір кадру для заданих опцій без декодування відео. """
+    width, height = src_width, src_height
+    resize = parse_resize(options)
+    if resize:
+        width, height = resize
+    rotation_angle = options.get("rotation_angle", 0)
+    if rotation_angle != 0:
+        width, height = rotated_size(width, height, rotation_angle)
+    if options.get("uniek_filter_active"):
+        cropped = uniek_crop_size(width, height, get_uniek_params(options)["crop_px"])
+        if cropped:
+            width, height = cropped
+    return width, height
+
+def build_output_path(input_path, output_folder, active_effects_tags, size):
+    """ Формує детерміновану назву вихідного файлу: <назва>_<теги>_<ШxВ><розширення>. """
+    base_name_original, ext = os.path.splitext(os.path.basename(input_path))
+    output_parts = [base_name_original]
+
+    if active_effects_tags: # Якщо є хоч якісь теги ефектів
+        output_parts.append("-".join(active_effects_tags))
+
+    size_tag = "originalSize" # За замовчуванням, якщо розмір не відомий
+    if size:
+        size_tag = f"{size[0]}x{size[1]}"
+    output_parts.append(size_tag)
+
+    output_file_name_base = "_".join(output_parts)
+    # Прибираємо подвійні підкреслення, якщо вони утворилися
+    output_file_name_base = output_file_name_base.replace("__", "_")
+    if output_file_name_base.endswith("_"): output_file_name_base = output_file_name_base[:-1]
+    if output_file_name_base.startswith("_"): output_file_name_base = output_file_name_base[1:]
+
+    return os.path.join(output_folder, f"{output_file_name_base}{ext}")
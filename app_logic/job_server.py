@@ -0,0 +1,575 @@
+# app_logic/job_server.py
+# Локальний HTTP-сервіс завдань на asyncio (без сторонніх залежностей): інші машини надсилають завдання
+# (шлях до вхідного файлу на спільному диску, пресет, опції), сервіс виконує їх у пулі процесів
+# (ті самі воркери, що й пакетна обробка) і транслює прогрес через Server-Sent Events.
+#
+# Кінцеві точки (JSON):
+#   POST   /jobs                   {"input", "preset"?, "options"?, "output_folder"?} або список таких об'єктів -> 202
+#   GET    /jobs                   стан усіх завдань
+#   GET    /jobs/<id>              стан одного завдання
+#   GET    /jobs/<id>/events       потік SSE: status, progress, result (закривається після result)
+#   POST   /jobs/<id>/cancel       скасування (DELETE /jobs/<id> - те саме)
+#   GET    /jobs/<id>/result       шлях(и) результату; 409, доки завдання не завершено успішно
+#   GET    /jobs/<id>/result/file  вміст файлу результату (?index=N для кількох файлів)
+#   GET    /health                 кількість воркерів, завдань у черзі та в роботі
+import asyncio
+import hmac
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.managers import SyncManager
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from app_logic import job_options
+from app_logic.batch_processor import BatchJob, BatchJobResult, _init_worker, _run_batch_job, default_worker_count
+
+TERMINAL_STATES = ("done", "failed", "cancelled")
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADERS = 100
+SSE_QUEUE_SIZE = 256 # Подій на повільного клієнта SSE; прогрес понад це відкидається
+SSE_KEEPALIVE_SECONDS = 15.0
+FILE_CHUNK_SIZE = 1024 * 1024
+
+HTTP_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+                405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error",
+                503: "Service Unavailable"}
+
+class HttpError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+class ServerJob:
+    """ Стан одного завдання сервісу. Змінюється лише в потоці циклу подій. """
+
+    def __init__(self, job_id, index, batch_job, preset):
+        self.id = job_id
+        self.index = index # Номер у подіях воркерів (_run_batch_job)
+        self.job = batch_job
+        self.preset = preset
+        self.state = "queued"
+        self.progress = 0.0
+        self.message = ""
+        self.output = None
+        self.error = ""
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.cancel_event = None # Подія менеджера, створюється під час запуску у воркері
+        self.worker_started = False # Воркер почав виконання (подія "started") у поточному пулі
+        self.crash_attempts = 0
+        self.subscribers = set() # asyncio.Queue клієнтів SSE
+
+    def snapshot(self):
+        return {"id": self.id, "state": self.state, "input": self.job.input_path, "output_folder": self.job.output_folder,
+                "preset": self.preset, "progress": round(self.progress, 4), "message": self.message,
+                "output": self.output, "error": self.error, "created": round(self.created, 3),
+                "started": round(self.started, 3) if self.started else None,
+                "finished": round(self.finished, 3) if self.finished else None}
+
+class JobServer:
+    """
+    Планувальник завдань і HTTP-сервер. Завдання чекають у черзі (не більше max_queued - далі 503),
+    у пулі процесів одночасно виконується не більше workers завдань. Завершені завдання зберігаються
+    в пам'яті (не більше max_finished останніх).
+    Аварія процесу-воркера ламає весь пул, але зараховується лише завданням, що на той момент виконувалися:
+    кожне з них перезапускається окремо в пулі з одним процесом (до max_crash_retries разів), а завдання,
+    які ще не почалися, повертаються в чергу без спроби - як у batch_processor.run_batch_jobs.
+    job_runner - функція воркера з сигнатурою _run_batch_job (за замовчуванням вона сама).
+    """
+
+    def __init__(self, output_folder, default_preset=None, workers=None, max_queued=1000, max_finished=1000,
+                 token=None, progress_step=0.01, max_crash_retries=1, job_runner=None):
+        self.output_folder = output_folder
+        self.default_preset = default_preset
+        self.workers = workers or default_worker_count()
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self.token = token
+        self.progress_step = progress_step
+        self.max_crash_retries = max_crash_retries
+        self.job_runner = job_runner or _run_batch_job
+        self.jobs = OrderedDict() # id -> ServerJob
+        self._by_index = {}
+        self._pending = deque()
+        self._suspects = deque() # Завдання, що виконувалися під час аварії воркера: перезапускаються по одному
+        self._isolated = None # Завдання, що зараз виконується в окремому пулі з одним процесом
+        self._barriers = {} # Токен -> asyncio.Future, див. _sync_worker_events
+        self._tasks = set()
+        self._dispatch_lock = None
+        self._stopping = False
+        self._finished = deque()
+        self._running = 0
+        self._next_index = 0
+        self._loop = None
+        self._server = None
+        self._manager = None
+        self._events = None
+        self._pool = None
+        self._ctx = multiprocessing.get_context("spawn")
+        self._pump_stop = threading.Event()
+        self._pump_thread = None
+
+    # --- Життєвий цикл ---
+
+    async def start(self, host="127.0.0.1", port=8765):
+        self._loop = asyncio.get_running_loop()
+        self._dispatch_lock = asyncio.Lock()
+        self._manager = SyncManager(ctx=self._ctx)
+        self._manager.start(_init_worker)
+        self._events = self._manager.Queue()
+        self._pool = self._new_pool()
+        self._pump_thread = threading.Thread(target=self._pump_worker_events, name="job-server-events", daemon=True)
+        self._pump_thread.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def stop(self):
+        """ Припиняє приймати запити, скасовує завдання в черзі та запущені, чекає на воркери. """
+        self._stopping = True
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for waiting in (self._pending, self._suspects):
+            while waiting:
+                job = waiting.popleft()
+                if job.state == "queued":
+                    self._finish(job, "cancelled", error="Сервіс зупинено.")
+        for job in list(self.jobs.values()):
+            if job.state == "running":
+                await self._request_cancel(job)
+        while self._running or self._tasks:
+            await asyncio.sleep(0.1)
+        await self._loop.run_in_executor(None, self._pool.shutdown)
+        self._pump_stop.set()
+        self._pump_thread.join()
+        self._manager.shutdown()
+
+    async def serve(self, host, port, stop_event, on_started=None):
+        """ Працює, доки не встановлено stop_event (threading.Event, напр. з обробника SIGINT). """
+        address = await self.start(host, port)
+        if on_started:
+            on_started(address)
+        try:
+            while not stop_event.is_set():
+                await asyncio.sleep(0.2)
+        finally:
+            await self.stop()
+
+    def _new_pool(self, workers=None):
+        return ProcessPoolExecutor(max_workers=workers or self.workers, mp_context=self._ctx, initializer=_init_worker)
+
+    # --- Планування ---
+
+    def submit(self, entry):
+        """ Створює завдання з JSON-об'єкта запиту. Викидає HttpError для некоректних даних. """
+        return self.submit_many([entry])[0]
+
+    def submit_many(self, entries):
+        """
+        Створює завдання зі списку об'єктів запиту - все або нічого: спершу перевіряються всі записи
+        і місце в черзі для всього списку, і лише потім завдання додаються до черги.
+        """
+        validated = [self._validate_entry(entry) for entry in entries]
+        if len(self._pending) + len(validated) > self.max_queued:
+            raise HttpError(503, "Черга завдань заповнена, спробуйте пізніше.", {"Retry-After": "5"})
+        for batch_job, _preset in validated:
+            os.makedirs(batch_job.output_folder, exist_ok=True)
+
+        jobs = []
+        for batch_job, preset in validated:
+            job = ServerJob(uuid.uuid4().hex[:12], self._next_index, batch_job, preset)
+            self._next_index += 1
+            self.jobs[job.id] = job
+            self._by_index[job.index] = job
+            self._pending.append(job)
+            jobs.append(job)
+        self._dispatch()
+        return jobs
+
+    def _validate_entry(self, entry):
+        """ Перевіряє один об'єкт запиту й повертає (BatchJob, пресет). Викидає HttpError для некоректних даних. """
+        if not isinstance(entry, dict):
+            raise HttpError(400, "Завдання має бути об'єктом JSON.")
+        input_path = entry.get("input")
+        if not isinstance(input_path, str) or not input_path:
+            raise HttpError(400, "Не вказано поле 'input'.")
+        if not os.path.isfile(input_path):
+            raise HttpError(400, f"Вхідний файл не знайдено на сервері: {input_path}")
+        overrides = entry.get("options") or {}
+        if not isinstance(overrides, dict):
+            raise HttpError(400, "Поле 'options' має бути об'єктом.")
+        preset = entry.get("preset") or self.default_preset
+        try:
+            options = job_options.resolve_options(preset, overrides)
+        except KeyError:
+            raise HttpError(400, f"Невідомий пресет: {preset}")
+        output_folder = entry.get("output_folder") or self.output_folder
+        if not output_folder:
+            raise HttpError(400, "Не вказано 'output_folder', а сервіс запущено без папки за замовчуванням.")
+        return BatchJob(input_path=input_path, output_folder=output_folder, options=options), preset
+
+    def _spawn(self, coro):
+        """ Фонове завдання циклу подій; stop() чекає на завершення всіх таких завдань. """
+        task = self._loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _dispatch(self):
+        self._spawn(self._dispatch_jobs())
+
+    def _next_job(self):
+        """ Наступне завдання для запуску: (завдання, окремо) або (None, False), якщо запускати нічого. """
+        if self._stopping or self._isolated is not None:
+            return None, False
+        while self._suspects:
+            if self._running:
+                return None, False # Підозріле завдання чекає, доки пул звільниться повністю
+            job = self._suspects.popleft()
+            if job.state == "queued":
+                return job, True
+        while self._pending and self._running < self.workers:
+            job = self._pending.popleft()
+            if job.state == "queued":
+                return job, False
+        return None, False
+
+    async def _dispatch_jobs(self):
+        async with self._dispatch_lock:
+            while True:
+                job, isolated = self._next_job()
+                if job is None:
+                    return
+                job.state = "running"
+                job.started = time.time()
+                job.worker_started = False
+                self._running += 1
+                if isolated:
+                    self._isolated = job
+                # Виклик менеджера - мережевий обмін із його процесом, тож не в потоці циклу подій
+                job.cancel_event = await self._loop.run_in_executor(None, self._manager.Event)
+                if job.cancel_requested: # Скасовано, поки створювалася подія
+                    self._running -= 1
+                    if isolated:
+                        self._isolated = None
+                    self._finish(job, "cancelled", error="Скасовано до запуску.")
+                    continue
+                pool = self._new_pool(1) if isolated else self._pool
+                future = asyncio.wrap_future(pool.submit(self.job_runner, job.index, job.job, self._events, job.cancel_event))
+                future.add_done_callback(lambda f, job=job, pool=pool: self._on_job_done(job, pool, f))
+                self._publish(job, "status", {"state": job.state})
+
+    def _on_job_done(self, job, pool, future):
+        self._running -= 1
+        job.cancel_event = None # Звільняє об'єкт у процесі менеджера
+        if job is self._isolated:
+            self._isolated = None
+            pool.shutdown(wait=False)
+        if future.cancelled():
+            crashed = True # Пул зупинено після аварії до запуску завдання
+        else:
+            crashed = isinstance(future.exception(), BrokenProcessPool)
+        if crashed:
+            if pool is self._pool: # Пул зламано - наступні завдання запускаються в новому
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+            self._spawn(self._on_worker_crash(job))
+            return
+        try:
+            result = future.result()
+        except Exception as e:
+            result = BatchJobResult(index=job.index, input_path=job.job.input_path, error=f"{type(e).__name__}: {e}")
+        self._finish_result(job, result)
+        self._dispatch()
+
+    async def _on_worker_crash(self, job):
+        """ Розподіляє аварію пулу: завдання, що не почалося, - знову в чергу, що виконувалося - перезапуск окремо. """
+        await self._sync_worker_events() # Подія "started" могла ще не дійти з черги менеджера
+        if job.cancel_requested or self._stopping:
+            self._finish(job, "cancelled", error="Скасовано." if job.cancel_requested else "Сервіс зупинено.")
+        elif not job.worker_started:
+            job.state = "queued" # Ще не почалося - аварія не його
+            self._pending.appendleft(job)
+        else:
+            job.crash_attempts += 1
+            if job.crash_attempts > self.max_crash_retries:
+                self._finish(job, "failed", error="Процес-воркер аварійно завершився під час обробки.")
+            else:
+                job.state = "queued"
+                job.progress = 0.0
+                job.message = "Процес-воркер аварійно завершився, завдання буде виконано повторно окремо."
+                self._suspects.append(job)
+                self._publish(job, "status", {"state": job.state, "message": job.message})
+        self._dispatch()
+
+    async def _sync_worker_events(self):
+        """ Чекає, доки потік подій передасть у цикл усі події, які воркери надіслали до цього моменту. """
+        token = uuid.uuid4().hex
+        waiter = self._barriers[token] = self._loop.create_future()
+        await self._loop.run_in_executor(None, self._events.put, (None, "sync", token))
+        await waiter
+
+    def _finish_result(self, job, result):
+        if result.success:
+            self._finish(job, "done", output=result.output_path)
+        elif job.cancel_requested:
+            self._finish(job, "cancelled", error=result.error or "Скасовано.")
+        else:
+            self._finish(job, "failed", error=result.error)
+
+    def _finish(self, job, state, output=None, error=""):
+        job.state = state
+        job.output = output
+        job.error = error
+        job.finished = time.time()
+        if state == "done":
+            job.progress = 1.0
+        self._publish(job, "result", job.snapshot())
+        self._finished.append(job.id)
+        while len(self._finished) > self.max_finished:
+            old = self.jobs.pop(self._finished.popleft(), None)
+            if old is not None:
+                self._by_index.pop(old.index, None)
+
+    async def _request_cancel(self, job):
+        if job.state in TERMINAL_STATES or job.cancel_requested:
+            return
+        job.cancel_requested = True
+        if job.state == "queued":
+            self._finish(job, "cancelled", error="Скасовано до запуску.")
+            return
+        if job.cancel_event is None:
+            return # Подія ще створюється або воркер упав: _dispatch_jobs / _on_worker_crash врахують cancel_requested
+        job.message = "Скасування..."
+        self._publish(job, "status", {"message": job.message})
+        # Виклик менеджера - мережевий обмін із його процесом, тож не в потоці циклу подій
+        await self._loop.run_in_executor(None, job.cancel_event.set)
+
+    # --- Події воркерів ---
+
+    def _pump_worker_events(self):
+        """ Окремий потік: черга менеджера -> цикл подій. """
+        while not self._pump_stop.is_set():
+            try:
+                event = self._events.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                return # Менеджер зупинено
+            self._loop.call_soon_threadsafe(self._on_worker_event, *event)
+
+    def _on_worker_event(self, index, kind, payload):
+        if kind == "sync":
+            waiter = self._barriers.pop(payload, None)
+            if waiter is not None and not waiter.done():
+                waiter.set_result(None)
+            return
+        job = self._by_index.get(index)
+        if job is None or job.state != "running":
+            return
+        if kind == "started":
+            job.worker_started = True
+        elif kind == "status":
+            job.message = payload
+            self._publish(job, "status", {"message": payload})
+        elif kind == "progress":
+            value, details = payload
+            value = float(value)
+            if job.progress >= 1.0 or (value < 1.0 and value - job.progress < self.progress_step):
+                job.progress = max(job.progress, value)
+                return
+            job.progress = max(job.progress, value)
+            data = {"value": round(value, 4)}
+            if details:
+                data.update(frames_done=details.get("frames_done"), total_frames=details.get("total_frames"),
+                            fps=round(details["fps"], 2) if details.get("fps") else None,
+                            eta=round(details["eta"], 1) if details.get("eta") is not None else None)
+            self._publish(job, "progress", data)
+
+    def _publish(self, job, event, data):
+        for subscriber in list(job.subscribers):
+            try:
+                subscriber.put_nowait((event, data))
+            except asyncio.QueueFull:
+                if event == "progress":
+                    continue # Прогрес можна пропустити, наступна подія його оновить
+                subscriber.get_nowait()
+                subscriber.put_nowait((event, data))
+
+    # --- HTTP ---
+
+    async def _read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            raise ConnectionResetError()
+        try:
+            method, target, _version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "Некоректний рядок запиту.")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HttpError(400, "Забагато заголовків.")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = b""
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HttpError(400, "Некоректний заголовок Content-Length.")
+        if length < 0:
+            raise HttpError(400, "Некоректний заголовок Content-Length.")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Завелике тіло запиту.")
+        if length:
+            body = await reader.readexactly(length)
+        return method.upper(), target, headers, body
+
+    async def _send(self, writer, status, body=b"", content_type="application/json", headers=None):
+        lines = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}", f"Content-Type: {content_type}",
+                 f"Content-Length: {len(body)}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def _send_json(self, writer, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await self._send(writer, status, body, "application/json; charset=utf-8", headers)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            try:
+                method, target, headers, body = await self._read_request(reader)
+                if self.token and not self._authorized(headers.get("authorization", "")):
+                    raise HttpError(401, "Потрібен заголовок Authorization: Bearer <token>.")
+                await self._route(method, target, body, writer)
+            except HttpError as e:
+                await self._send_json(writer, e.status, {"error": e.message}, e.headers)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                pass
+            except Exception as e:
+                await self._send_json(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+        except ConnectionError:
+            pass # Клієнт відключився, не дочекавшись відповіді
+        finally:
+            writer.close()
+
+    def _authorized(self, authorization):
+        """ Порівняння токена за сталий час, щоб час відповіді не підказував правильні символи. """
+        return hmac.compare_digest(authorization.encode("latin-1"), f"Bearer {self.token}".encode("utf-8"))
+
+    def _get_job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            raise HttpError(404, f"Завдання {job_id} не знайдено.")
+        return job
+
+    async def _route(self, method, target, body, writer):
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.strip("/").split("/") if part]
+        query = parse_qs(url.query)
+
+        if parts == ["health"] and method == "GET":
+            await self._send_json(writer, 200, {"ok": True, "workers": self.workers, "running": self._running,
+                                                "queued": sum(1 for job in (*self._pending, *self._suspects)
+                                                          if job.state == "queued")})
+        elif parts == ["jobs"] and method == "GET":
+            await self._send_json(writer, 200, {"jobs": [job.snapshot() for job in self.jobs.values()]})
+        elif parts == ["jobs"] and method == "POST":
+            try:
+                payload = json.loads(body.decode("utf-8") or "null")
+            except ValueError:
+                raise HttpError(400, "Тіло запиту не є коректним JSON.")
+            if isinstance(payload, list):
+                jobs = self.submit_many(payload)
+                await self._send_json(writer, 202, {"jobs": [job.snapshot() for job in jobs]})
+            else:
+                await self._send_json(writer, 202, self.submit(payload).snapshot())
+        elif len(parts) == 2 and parts[0] == "jobs" and method in ("GET", "DELETE"):
+            job = self._get_job(parts[1])
+            if method == "DELETE":
+                await self._request_cancel(job)
+            await self._send_json(writer, 200, job.snapshot())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "cancel" and method == "POST":
+            job = self._get_job(parts[1])
+            await self._request_cancel(job)
+            await self._send_json(writer, 200, job.snapshot())
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "events" and method == "GET":
+            await self._stream_events(self._get_job(parts[1]), writer)
+        elif len(parts) == 3 and parts[0] == "jobs" and parts[2] == "result" and method == "GET":
+            job = self._get_job(parts[1])
+            if job.state != "done":
+                raise HttpError(409, f"Результату немає: стан завдання '{job.state}'. {job.error}".strip())
+            await self._send_json(writer, 200, {"id": job.id, "output": job.output})
+        elif len(parts) == 4 and parts[0] == "jobs" and parts[2:] == ["result", "file"] and method == "GET":
+            await self._send_result_file(self._get_job(parts[1]), query, writer)
+        elif parts and parts[0] in ("jobs", "health"):
+            raise HttpError(405, f"Метод {method} не підтримується для {url.path}.")
+        else:
+            raise HttpError(404, f"Невідомий шлях {url.path}.")
+
+    async def _stream_events(self, job, writer):
+        """ SSE: поточний стан одразу, далі події до завершення завдання; коментар-пінг раз на 15 с. """
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream; charset=utf-8\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+        subscriber = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+        job.subscribers.add(subscriber)
+        try:
+            event, data = ("result", job.snapshot()) if job.state in TERMINAL_STATES else ("snapshot", job.snapshot())
+            while True:
+                payload = json.dumps(data, ensure_ascii=False)
+                writer.write(f"event: {event}\ndata: {payload}\n\n".encode("utf-8"))
+                await writer.drain()
+                if event == "result":
+                    return
+                while True:
+                    try:
+                        event, data = await asyncio.wait_for(subscriber.get(), SSE_KEEPALIVE_SECONDS)
+                        break
+                    except asyncio.TimeoutError:
+                        writer.write(b": ping\n\n")
+                        await writer.drain()
+        finally:
+            job.subscribers.discard(subscriber)
+
+    async def _send_result_file(self, job, query, writer):
+        if job.state != "done":
+            raise HttpError(409, f"Результату немає: стан завдання '{job.state}'.")
+        outputs = job.output if isinstance(job.output, list) else [job.output]
+        try:
+            path = outputs[int(query.get("index", ["0"])[0])]
+        except (ValueError, IndexError):
+            raise HttpError(400, f"Некоректний index: завдання має {len(outputs)} файл(ів) результату.")
+        if not path or not os.path.isfile(path):
+            raise HttpError(404, "Файл результату більше не існує.")
+        size = os.path.getsize(path)
+        writer.write((f"HTTP/1.1 200 OK\r\nContent-Type: application/octet-stream\r\nContent-Length: {size}\r\n"
+                      f"Content-Disposition: attachment; filename=\"{os.path.basename(path)}\"\r\n"
+                      "Connection: close\r\n\r\n").encode("utf-8"))
+        with open(path, "rb") as f:
+            while True:
+                chunk = await self._loop.run_in_executor(None, f.read, FILE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+
+def run_server(host, port, stop_event, on_started=None, **server_kwargs):
+    """ Синхронна обгортка для CLI: запускає JobServer у новому циклі подій до stop_event. """
+    server = JobServer(**server_kwargs)
+    asyncio.run(server.serve(host, port, stop_event, on_started))
+    return server
@@ -0,0 +1,137 @@
+# app_logic/job_store.py
+# Постійне сховище завдань у SQLite (папка даних користувача): стан кожного завдання з відновленням
+# і стан кожного його сегмента. Запис про сегмент оновлюється одразу після того, як сегмент повністю
+# записано на диск, тож після аварійного завершення чи перезавантаження відома точна межа виконаної роботи.
+# Режим WAL і тайм-аут очікування блокування дозволяють кільком процесам працювати з базою одночасно.
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from app_logic.result_cache import fingerprint_file, options_hash
+from app_logic.utils import APP_DATA_DIR_NAME, get_user_data_dir_ua
+
+JOB_STATES = ("queued", "running", "done", "failed", "cancelled")
+INCOMPLETE_STATES = ("queued", "running", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    input_path TEXT NOT NULL,
+    output_folder TEXT NOT NULL,
+    options_json TEXT NOT NULL,
+    state TEXT NOT NULL,
+    output_path TEXT,
+    error TEXT,
+    work_dir TEXT,
+    split_done INTEGER NOT NULL DEFAULT 0,
+    audio_done INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS segments (
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    source_path TEXT NOT NULL,
+    state TEXT NOT NULL,
+    output_path TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs(state);
+"""
+
+def job_id_for(input_path, output_folder, options):
+    """ Те саме джерело (за вмістом), ті самі опції й та сама папка результату - те саме завдання. """
+    key = f"{fingerprint_file(input_path)}|{options_hash(options)}|{os.path.abspath(output_folder)}"
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=12).hexdigest()
+
+class JobStore:
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(get_user_data_dir_ua(APP_DATA_DIR_NAME), "jobs.sqlite3")
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA synchronous=FULL") # Позначка "сегмент готовий" має пережити вимкнення живлення
+        return conn
+
+    def _execute(self, sql, params=()):
+        with closing(self._connect()) as conn, conn:
+            return conn.execute(sql, params).rowcount
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as conn:
+            return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    # --- Завдання ---
+
+    def get(self, job_id):
+        rows = self._query("SELECT * FROM jobs WHERE id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    def find_or_create(self, input_path, output_folder, options):
+        """ Повертає запис завдання (наявний - для відновлення, або новий у стані queued). """
+        job_id = job_id_for(input_path, output_folder, options)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, input_path, output_folder, options_json, state, created, updated) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                (job_id, os.path.abspath(input_path), os.path.abspath(output_folder),
+                 json.dumps(options, ensure_ascii=False, default=str), now, now))
+        return self.get(job_id)
+
+    def update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._execute(f"UPDATE jobs SET {assignments} WHERE id = ?", tuple(fields.values()) + (job_id,))
+
+    def start_attempt(self, job_id, work_dir):
+        self._execute("UPDATE jobs SET state = 'running', error = NULL, work_dir = ?, attempts = attempts + 1, "
+                      "updated = ? WHERE id = ?", (work_dir, time.time(), job_id))
+
+    def list_jobs(self, states=None):
+        if states:
+            marks = ",".join("?" * len(states))
+            return self._query(f"SELECT * FROM jobs WHERE state IN ({marks}) ORDER BY created", tuple(states))
+        return self._query("SELECT * FROM jobs ORDER BY created")
+
+    def incomplete_jobs(self):
+        return self.list_jobs(INCOMPLETE_STATES)
+
+    def delete(self, job_id):
+        self._execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    # --- Сегменти ---
+
+    def set_segments(self, job_id, source_paths):
+        """ Новий поділ на сегменти: попередні записи сегментів видаляються, усі нові - pending. """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM segments WHERE job_id = ?", (job_id,))
+            conn.executemany("INSERT INTO segments (job_id, idx, source_path, state, updated) VALUES (?, ?, ?, 'pending', ?)",
+                             [(job_id, i, path, now) for i, path in enumerate(source_paths)])
+            conn.execute("UPDATE jobs SET split_done = 1, updated = ? WHERE id = ?", (now, job_id))
+
+    def segments(self, job_id):
+        return self._query("SELECT * FROM segments WHERE job_id = ? ORDER BY idx", (job_id,))
+
+    def mark_segment(self, job_id, idx, state, output_path=None):
+        self._execute("UPDATE segments SET state = ?, output_path = ?, updated = ? WHERE job_id = ? AND idx = ?",
+                      (state, output_path, time.time(), job_id, idx))
+
+_default_store = None
+
+def get_default_job_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = JobStore()
+    return _default_store
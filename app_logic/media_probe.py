@@ -0,0 +1,169 @@
+# app_logic/media_probe.py
+# Швидке отримання медіа-інформації через ffprobe (без декодування кадрів) з постійним кешем на диску.
+# Кеш зберігається в папці даних користувача і ключується шляхом, розміром та часом зміни файлу,
+# тому повторний вибір того самого файлу не запускає ffprobe взагалі.
+import json
+import math
+import os
+import subprocess
+import threading
+from dataclasses import asdict, dataclass
+
+from app_logic.utils import (
+    APP_DATA_DIR_NAME, get_ffprobe_path_ua, get_subprocess_kwargs_ua, get_user_data_dir_ua
+)
+
+class MediaProbeError(Exception):
+    pass
+
+@dataclass
+class MediaInfo:
+    path: str
+    width: int
+    height: int
+    duration: float = None
+    fps: float = None
+    has_audio: bool = False
+    audio_sample_rate: int = None
+    video_codec: str = ""
+    audio_codec: str = ""
+
+    @property
+    def size(self):
+        return (self.width, self.height)
+
+    @property
+    def frame_count(self):
+        """ Оцінка кількості кадрів (тривалість * fps) або None, якщо дані невідомі. """
+        if not self.duration or not self.fps:
+            return None
+        return int(round(self.duration * self.fps))
+
+def _parse_rate(rate_str):
+    try:
+        num, _, den = str(rate_str).partition("/")
+        value = float(num) / float(den or 1)
+        return value if value > 0 and math.isfinite(value) else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+def _probe_with_ffprobe(path):
+    cmd = [get_ffprobe_path_ua(), "-v", "error", "-print_format", "json", "-show_streams", "-show_format", path]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=60, **get_subprocess_kwargs_ua())
+    if result.returncode != 0:
+        raise MediaProbeError(f"ffprobe завершився з помилкою: {result.stderr.strip()}")
+    try:
+        data = json.loads(result.stdout or "{}")
+    except ValueError as e:
+        raise MediaProbeError(f"Некоректний вивід ffprobe: {e}")
+    streams = data.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    if not video:
+        raise MediaProbeError("У файлі не знайдено відеопотоку.")
+    duration = data.get("format", {}).get("duration") or video.get("duration")
+    return MediaInfo(
+        path=path,
+        width=int(video.get("width", 0)),
+        height=int(video.get("height", 0)),
+        duration=float(duration) if duration else None,
+        fps=_parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate")),
+        has_audio=audio is not None,
+        audio_sample_rate=int(audio["sample_rate"]) if audio and audio.get("sample_rate") else None,
+        video_codec=video.get("codec_name", ""),
+        audio_codec=audio.get("codec_name", "") if audio else "",
+    )
+
+def _probe_with_moviepy(path):
+    """ Запасний варіант, якщо ffprobe відсутній: розбір виводу `ffmpeg -i` засобами MoviePy (без декодування). """
+    from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
+    try:
+        infos = ffmpeg_parse_infos(path)
+    except (IOError, OSError) as e:
+        raise MediaProbeError(str(e))
+    if not infos.get("video_found"):
+        raise MediaProbeError("У файлі не знайдено відеопотоку.")
+    width, height = infos.get("video_size") or (0, 0)
+    return MediaInfo(
+        path=path, width=int(width), height=int(height),
+        duration=infos.get("duration"), fps=infos.get("video_fps"),
+        has_audio=bool(infos.get("audio_found")), audio_sample_rate=infos.get("audio_fps"),
+    )
+
+class MediaProbeCache:
+    """ Кеш MediaInfo у JSON-файлі. Безпечний для потоків; запис атомарний (тимчасовий файл + заміна). """
+
+    def __init__(self, cache_path=None, max_entries=5000):
+        self.cache_path = cache_path or os.path.join(get_user_data_dir_ua(APP_DATA_DIR_NAME), "media_probe_cache.json")
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = None
+
+    @staticmethod
+    def make_key(path):
+        st = os.stat(path)
+        return f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+    def _load(self):
+        if self._entries is None:
+            try:
+                with open(self.cache_path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+        return self._entries
+
+    def _save(self):
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass # Кеш - лише оптимізація, помилка запису не повинна зривати роботу
+
+    def get(self, key):
+        with self._lock:
+            data = self._load().get(key)
+        return MediaInfo(**data) if data else None
+
+    def put(self, key, info):
+        with self._lock:
+            self._entries = None # Перечитуємо файл, щоб не затерти записи інших процесів
+            entries = self._load()
+            entries.pop(key, None)
+            entries[key] = asdict(info)
+            while len(entries) > self.max_entries:
+                entries.pop(next(iter(entries))) # Найстаріший запис (словник зберігає порядок вставки)
+            self._save()
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_probe_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = MediaProbeCache()
+        return _default_cache
+
+def probe_media(path, use_cache=True, cache=None):
+    """
+    Повертає MediaInfo для файлу. Спочатку шукає в кеші, потім запускає ffprobe
+    (або, якщо його немає, розбирає вивід ffmpeg через MoviePy). Викидає MediaProbeError.
+    """
+    if not path or not os.path.exists(path):
+        raise MediaProbeError(f"Файл не знайдено: {path}")
+    cache = cache or (get_default_probe_cache() if use_cache else None)
+    key = MediaProbeCache.make_key(path)
+    if cache:
+        cached = cache.get(key)
+        if cached:
+            return cached
+    try:
+        info = _probe_with_ffprobe(path)
+    except (OSError, subprocess.SubprocessError):
+        info = _probe_with_moviepy(path)
+    if cache:
+        cache.put(key, info)
+    return info
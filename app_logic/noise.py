@@ -0,0 +1,93 @@
+# app_logic/noise.py
+# Генератор шуму для кроку "Унік" (4/6). Замість np.random.normal(...) розміром з кадр у float64
+# на кожен кадр використовує np.random.Generator з виходом float32/int8 у буфери, що повторно
+# використовуються, або банк заздалегідь згенерованих полів шуму з випадковим зсувом на кожен кадр.
+import numpy as np
+
+from app_logic import job_options
+
+NOISE_MODES = ("bank", "rng")
+
+class NoiseGenerator:
+    """
+    Джерело шуму N(0, sigma) у вигляді int8 для кадрів однакового розміру.
+    mode="rng"  - новий шум на кожен кадр (float32 у буфер, округлення до int8);
+    mode="bank" - bank_size полів шуму трохи більших за кадр генеруються один раз,
+                  для кожного кадру береться випадкове поле з випадковим зсувом (без генерації на кадр).
+    seed робить послідовність шуму відтворюваною.
+    """
+
+    def __init__(self, sigma=1.5, seed=None, mode="bank", bank_size=2, bank_pad=64):
+        if mode not in NOISE_MODES:
+            raise ValueError(f"Невідомий режим шуму: {mode}")
+        self.sigma = float(sigma)
+        self.seed = seed
+        self.mode = mode
+        self.bank_size = max(1, int(bank_size))
+        self.bank_pad = max(1, int(bank_pad))
+        self._rng = np.random.default_rng(seed)
+        self._shape = None
+        self._float_buf = None
+        self._noise_buf = None
+        self._bank = None
+        self._acc = None
+        self._out = None
+
+    @classmethod
+    def from_options(cls, options):
+        sigma = job_options.get_uniek_params(options)["noise_sigma"]
+        return cls(sigma=sigma, seed=options.get("noise_seed"), mode=options.get("noise_mode", "bank"))
+
+    def _to_int8(self, float_noise, out):
+        np.rint(float_noise, out=float_noise)
+        np.clip(float_noise, -127, 127, out=float_noise)
+        np.copyto(out, float_noise, casting="unsafe")
+        return out
+
+    def prepare(self, shape):
+        """ Виділяє буфери (і банк полів) для кадрів розміру shape. """
+        if self._shape == shape:
+            return
+        self._shape = shape
+        self._acc = np.empty(shape, dtype=np.int16)
+        if self.mode == "rng":
+            self._float_buf = np.empty(shape, dtype=np.float32)
+            self._noise_buf = np.empty(shape, dtype=np.int8)
+        else:
+            field_shape = (shape[0] + self.bank_pad, shape[1] + self.bank_pad) + tuple(shape[2:])
+            self._bank = []
+            for _ in range(self.bank_size):
+                field = self._rng.standard_normal(size=field_shape, dtype=np.float32)
+                field *= self.sigma
+                self._bank.append(self._to_int8(field, np.empty(field_shape, dtype=np.int8)))
+
+    def next_noise(self, shape):
+        """ Поле шуму int8 для наступного кадру (буфер або представлення банку; дійсне до наступного виклику). """
+        self.prepare(shape)
+        if self.mode == "rng":
+            self._rng.standard_normal(size=shape, dtype=np.float32, out=self._float_buf)
+            self._float_buf *= self.sigma
+            return self._to_int8(self._float_buf, self._noise_buf)
+        field = self._bank[int(self._rng.integers(self.bank_size))]
+        dy, dx = (int(v) for v in self._rng.integers(self.bank_pad, size=2))
+        return field[dy:dy + shape[0], dx:dx + shape[1]]
+
+    def add(self, src, noise, out, rows=slice(None)):
+        """
+        out = clip(src + noise[rows], 0, 255) через буфер int16 без тимчасових масивів.
+        src і out - рядки rows кадру (можуть бути одним буфером), noise - поле шуму на весь кадр.
+        """
+        acc = self._acc[rows]
+        np.add(src, noise[rows], out=acc, dtype=np.int16)
+        np.clip(acc, 0, 255, out=acc)
+        np.copyto(out, acc, casting="unsafe")
+        return out
+
+    def __call__(self, frame):
+        """ Варіант для clip.fl_image: результат у буфері, що повторно використовується між кадрами. """
+        if self._out is None or self._out.shape != frame.shape:
+            self._out = np.empty(frame.shape, dtype=np.uint8)
+        if self.sigma <= 0:
+            np.copyto(self._out, frame)
+            return self._out
+        return self.add(frame, self.next_noise(frame.shape), self._out)
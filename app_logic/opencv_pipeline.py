@@ -0,0 +1,161 @@
+# app_logic/opencv_pipeline.py
+# Покадровий конвеєр на OpenCV (рушій "opencv"): зміна розміру (cv2.resize, INTER_AREA при зменшенні),
+# поворот (cv2.rotate для кутів, кратних 90°, cv2.warpAffine для довільних), дзеркала (cv2.flip),
+# кольоровий етап ColorStage (cv2.LUT) і шум "Унік" - за один виклик на кадр у буфери, що повторно використовуються.
+# Функції OpenCV звільняють GIL і самі розпаралелюють роботу між потоками (див. options['opencv_threads']).
+import math
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError: # Без OpenCV рушій "opencv" недоступний, process_video_task повертається до ланцюжка MoviePy
+    cv2 = None
+
+from app_logic import job_options
+from app_logic.color_lut import ColorStage
+from app_logic.noise import NoiseGenerator
+from app_logic.tile_parallel import apply_color_and_noise, stripe_pool_from_options
+
+# Кут повороту (проти годинникової, як у MoviePy) -> код cv2.rotate
+_ROTATE_CODES = {}
+if cv2 is not None:
+    _ROTATE_CODES = {90: cv2.ROTATE_90_COUNTERCLOCKWISE, 180: cv2.ROTATE_180, 270: cv2.ROTATE_90_CLOCKWISE}
+
+def resize_interpolation(src_size, dst_size):
+    """
+    INTER_LINEAR, якщо збільшується хоч одна сторона (напр. ширина зменшується, а висота росте для 9:16),
+    інакше INTER_AREA (без муару) - так само обирає MoviePy з OpenCV.
+    """
+    if dst_size[0] > src_size[0] or dst_size[1] > src_size[1]:
+        return cv2.INTER_LINEAR
+    return cv2.INTER_AREA
+
+def rotation_matrix(width, height, angle):
+    """
+    Матриця warpAffine для повороту на angle градусів проти годинникової з розширенням кадру.
+    Розмір результату рахується як у PIL Image.rotate(expand=True), яким повертає MoviePy:
+    floor/ceil від кутів повернутого кадру, тож розмір збігається з ланцюжком MoviePy.
+    """
+    matrix = cv2.getRotationMatrix2D((width / 2.0, height / 2.0), angle, 1.0)
+    corners = np.array([[0, 0, 1], [width, 0, 1], [0, height, 1], [width, height, 1]], dtype=np.float64)
+    xs, ys = (corners @ matrix.T).T
+    min_x, min_y = math.floor(round(xs.min(), 6)), math.floor(round(ys.min(), 6))
+    new_width = int(math.ceil(round(xs.max(), 6)) - min_x)
+    new_height = int(math.ceil(round(ys.max(), 6)) - min_y)
+    matrix[0, 2] -= min_x
+    matrix[1, 2] -= min_y
+    # PIL рахує координати від центрів пікселів (+0.5), OpenCV - від самих пікселів
+    matrix[:, 2] += matrix[:, :2] @ np.array([0.5, 0.5]) - 0.5
+    return matrix, (new_width, new_height)
+
+class OpenCVFramePipeline:
+    """
+    Повний покадровий конвеєр для clip.fl_image: на відміну від FramePipeline виконує і зміну розміру,
+    і поворот на довільний кут. Порядок кроків той самий, що в ланцюжку MoviePy:
+    розмір -> поворот -> дзеркала -> Ч/Б -> обрізка "Унік" -> гамма/контраст -> шум.
+    Кольоровий етап виконується до обрізки (він попіксельний), щоб cv2.LUT працював з неперервним буфером.
+    """
+
+    def __init__(self, options, reuse_output=True, output_buffers=1):
+        self.resize = job_options.parse_resize(options)
+        self.rotation_angle = options.get("rotation_angle", 0) % 360
+        self.flip_code = None
+        if options.get("flip_h_active") and options.get("flip_v_active"): self.flip_code = -1
+        elif options.get("flip_h_active"): self.flip_code = 1
+        elif options.get("flip_v_active"): self.flip_code = 0
+        self.uniek = bool(options.get("uniek_filter_active"))
+        self.uniek_params = job_options.get_uniek_params(options)
+        self.reuse_output = reuse_output
+        self.color_stage = ColorStage.from_options(options)
+        self.noise = NoiseGenerator.from_options(options) if self.uniek and self.uniek_params["noise_sigma"] > 0 else None
+        self.stripes = stripe_pool_from_options(options) # options['tile_parallel']: колір і шум смугами в пулі потоків
+        self.output_buffers = max(1, int(output_buffers))
+        self._output_index = 0
+        self._buffers = {}
+        self._warp = None # (розмір джерела, матриця, розмір результату) для довільного кута
+
+    @staticmethod
+    def available():
+        return cv2 is not None
+
+    def _buffer(self, name, shape):
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or not self.reuse_output:
+            buf = self._buffers[name] = np.empty(shape, dtype=np.uint8)
+        return buf
+
+    def geometry(self, frame):
+        """ Розмір, поворот і дзеркала. Повертає неперервний масив (буфер конвеєра або сам кадр). """
+        if self.resize and (frame.shape[1], frame.shape[0]) != self.resize:
+            width, height = self.resize
+            out = self._buffer("resize", (height, width, 3))
+            cv2.resize(frame, self.resize, dst=out,
+                       interpolation=resize_interpolation((frame.shape[1], frame.shape[0]), self.resize))
+            frame = out
+        if self.rotation_angle in _ROTATE_CODES:
+            h, w = frame.shape[:2]
+            out = self._buffer("rotate", (h, w, 3) if self.rotation_angle == 180 else (w, h, 3))
+            cv2.rotate(frame, _ROTATE_CODES[self.rotation_angle], dst=out)
+            frame = out
+        elif self.rotation_angle:
+            src_size = (frame.shape[1], frame.shape[0])
+            if self._warp is None or self._warp[0] != src_size:
+                self._warp = (src_size,) + rotation_matrix(src_size[0], src_size[1], self.rotation_angle)
+            _, matrix, (new_width, new_height) = self._warp
+            out = self._buffer("rotate", (new_height, new_width, 3))
+            cv2.warpAffine(frame, matrix, (new_width, new_height), dst=out, flags=cv2.INTER_CUBIC,
+                           borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0))
+            frame = out
+        if self.flip_code is not None:
+            out = self._buffer("flip", frame.shape)
+            cv2.flip(frame, self.flip_code, dst=out)
+            frame = out
+        return frame
+
+    def _output_buffer(self, shape):
+        """
+        Буфер результату. При output_buffers > 1 буфери чергуються, тож результат лишається дійсним,
+        доки не оброблено ще output_buffers - 1 кадрів (для конвеєрного виконання, див. pipeline_executor.py).
+        """
+        name = f"out{self._output_index}"
+        self._output_index = (self._output_index + 1) % self.output_buffers
+        return self._buffer(name, shape)
+
+    def __call__(self, frame):
+        source = frame
+        if not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame)
+        frame = self.geometry(frame)
+        if self.color_stage.active:
+            color_out = self._buffer("color", frame.shape)
+            if self.stripes:
+                frame = apply_color_and_noise(frame, color_out, self.color_stage, None, self.stripes)
+            else:
+                frame = self.color_stage.apply(frame, color_out)
+        if self.uniek:
+            crop_px = self.uniek_params["crop_px"]
+            h, w = frame.shape[:2]
+            if job_options.uniek_crop_size(w, h, crop_px):
+                frame = frame[crop_px:h - crop_px, crop_px:w - crop_px]
+        if self.noise:
+            out = self._output_buffer(frame.shape)
+            if self.stripes:
+                return apply_color_and_noise(frame, out, None, self.noise, self.stripes)
+            return self.noise.add(frame, self.noise.next_noise(out.shape), out)
+        if self.output_buffers > 1 and not np.may_share_memory(frame, source):
+            # Проміжні буфери перезаписуються наступним кадром, тому результат копіюється в буфер з черги
+            # (вхідний кадр або його обрізка лишаються дійсними - за них відповідає джерело кадрів)
+            out = self._output_buffer(frame.shape)
+            np.copyto(out, frame)
+            return out
+        return frame
+
+def compile_opencv_pipeline(options, reuse_output=True, output_buffers=1):
+    """ Повертає OpenCVFramePipeline або None, якщо OpenCV не встановлено. """
+    if cv2 is None:
+        return None
+    threads = options.get("opencv_threads")
+    if threads is not None:
+        cv2.setNumThreads(int(threads)) # Глобально для процесу; 0 - без внутрішнього розпаралелювання OpenCV
+    return OpenCVFramePipeline(options, reuse_output=reuse_output, output_buffers=output_buffers)
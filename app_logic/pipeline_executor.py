@@ -0,0 +1,204 @@
+# app_logic/pipeline_executor.py
+# Конвеєрне виконання обробки кадрів: декодування, фільтрація та кодування працюють в окремих потоках,
+# з'єднаних обмеженими чергами (повна черга зупиняє попередній етап - зворотний тиск).
+# Читання/запис каналів FFmpeg і операції NumPy/OpenCV звільняють GIL, тож етапи реально перекриваються.
+# PipelineMetrics показує заповненість черг і час очікування кожного етапу - за ними видно вузьке місце.
+import queue
+import threading
+import time
+
+from app_logic.profiling import NULL_PROFILER
+from app_logic.video_processor import ProcessingCancelledError
+
+_END = object() # Маркер кінця потоку кадрів
+
+class StageMetrics:
+    """ Лічильники одного етапу: оброблені елементи, час роботи та час очікування на вхід і вихід. """
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy_s = 0.0
+        self.wait_input_s = 0.0 # Порожня вхідна черга: попередній етап не встигає
+        self.wait_output_s = 0.0 # Повна вихідна черга: наступний етап не встигає
+
+    def to_dict(self):
+        return {"items": self.items, "busy_s": round(self.busy_s, 4),
+                "wait_input_s": round(self.wait_input_s, 4), "wait_output_s": round(self.wait_output_s, 4)}
+
+class QueueMetrics:
+    def __init__(self, name, capacity):
+        self.name = name
+        self.capacity = capacity
+        self.samples = 0
+        self.depth_sum = 0
+        self.max_depth = 0
+
+    def sample(self, depth):
+        self.samples += 1
+        self.depth_sum += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    @property
+    def mean_depth(self):
+        return self.depth_sum / self.samples if self.samples else 0.0
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "mean_depth": round(self.mean_depth, 2), "max_depth": self.max_depth}
+
+class PipelineMetrics:
+    STAGES = ("decode", "filter", "encode")
+
+    def __init__(self, queue_depth):
+        self.stages = {name: StageMetrics(name) for name in self.STAGES}
+        self.queues = {"decode>filter": QueueMetrics("decode>filter", queue_depth),
+                       "filter>encode": QueueMetrics("filter>encode", queue_depth)}
+        self.wall_s = 0.0
+
+    def bottleneck(self):
+        """ Етап з найбільшим часом роботи - саме він задає швидкість усього конвеєра. """
+        return max(self.stages.values(), key=lambda stage: stage.busy_s).name
+
+    def to_dict(self):
+        return {"wall_s": round(self.wall_s, 4), "bottleneck": self.bottleneck(),
+                "stages": {name: stage.to_dict() for name, stage in self.stages.items()},
+                "queues": {name: q.to_dict() for name, q in self.queues.items()}}
+
+    def format_summary(self):
+        stages = ", ".join(f"{s.name} {s.busy_s:.2f} с (очік. вх. {s.wait_input_s:.2f}, вих. {s.wait_output_s:.2f})"
+                           for s in self.stages.values())
+        queues = ", ".join(f"{q.name} {q.mean_depth:.1f}/{q.capacity}" for q in self.queues.values())
+        return f"Конвеєр за {self.wall_s:.2f} с: {stages}; черги (сер./макс.): {queues}; вузьке місце: {self.bottleneck()}"
+
+class PipelinedExecutor:
+    """
+    Виконує source() -> transform(item) -> sink(result) у трьох потоках.
+    source повертає наступний кадр або None наприкінці; кадри, які повертають source і transform,
+    мають лишатися дійсними, поки перебувають у черзі (кільце буферів завглибшки не менше queue_depth + 2,
+    див. ring_sizes). monitor(items_done) викликається в потоці run() кожні poll_interval секунд
+    і може повернути True для скасування (напр. EncodeProgress.update).
+    """
+
+    def __init__(self, source, transform, sink, queue_depth=4, monitor=None, poll_interval=0.1, profiler=NULL_PROFILER):
+        self.source = source
+        self.transform = transform
+        self.sink = sink
+        self.queue_depth = max(1, int(queue_depth))
+        self.monitor = monitor
+        self.poll_interval = poll_interval
+        self.profiler = profiler
+        self.metrics = PipelineMetrics(self.queue_depth)
+        self._stop = threading.Event()
+        self._errors = []
+
+    @staticmethod
+    def ring_sizes(queue_depth):
+        """
+        (буферів джерела, буферів результату фільтра), щоб жоден кадр не перезаписався, поки він у черзі.
+        Кадр джерела може пройти без змін аж до кодувальника, тому джерелу потрібні місця в обох чергах.
+        """
+        return 2 * queue_depth + 4, queue_depth + 3
+
+    def _put(self, q, item, stage):
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.05)
+                break
+            except queue.Full:
+                continue
+        stage.wait_output_s += time.perf_counter() - started
+
+    def _get(self, q, stage):
+        started = time.perf_counter()
+        item = _END
+        while not self._stop.is_set():
+            try:
+                item = q.get(timeout=0.05)
+                break
+            except queue.Empty:
+                continue
+        stage.wait_input_s += time.perf_counter() - started
+        return item
+
+    def _run_stage(self, name, body):
+        try:
+            body(self.metrics.stages[name])
+        except BaseException as e:
+            self._errors.append(e)
+            self._stop.set()
+
+    def _decode(self, stage, out_q):
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            with self.profiler.span("decode", "frame"):
+                item = self.source()
+            stage.busy_s += time.perf_counter() - started
+            if item is None:
+                self._put(out_q, _END, stage)
+                return
+            stage.items += 1
+            self._put(out_q, item, stage)
+
+    def _filter(self, stage, in_q, out_q):
+        while not self._stop.is_set():
+            item = self._get(in_q, stage)
+            if item is _END:
+                self._put(out_q, _END, stage)
+                return
+            started = time.perf_counter()
+            with self.profiler.span("filter", "frame"):
+                result = self.transform(item)
+            stage.busy_s += time.perf_counter() - started
+            stage.items += 1
+            self._put(out_q, result, stage)
+
+    def _encode(self, stage, in_q):
+        while not self._stop.is_set():
+            item = self._get(in_q, stage)
+            if item is _END:
+                return
+            started = time.perf_counter()
+            with self.profiler.span("encode", "frame"):
+                self.sink(item)
+            stage.busy_s += time.perf_counter() - started
+            stage.items += 1
+
+    def run(self):
+        """
+        Виконує конвеєр до кінця джерела. Повертає PipelineMetrics. Перша помилка будь-якого етапу
+        зупиняє всі етапи й викидається тут; скасування через monitor - ProcessingCancelledError.
+        """
+        decode_q = queue.Queue(maxsize=self.queue_depth)
+        encode_q = queue.Queue(maxsize=self.queue_depth)
+        encode_stage = self.metrics.stages["encode"]
+        threads = [
+            threading.Thread(target=self._run_stage, args=("decode", lambda s: self._decode(s, decode_q)),
+                             name="pipeline-decode", daemon=True),
+            threading.Thread(target=self._run_stage, args=("filter", lambda s: self._filter(s, decode_q, encode_q)),
+                             name="pipeline-filter", daemon=True),
+            threading.Thread(target=self._run_stage, args=("encode", lambda s: self._encode(s, encode_q)),
+                             name="pipeline-encode", daemon=True),
+        ]
+        started = time.perf_counter()
+        cancelled = False
+        for thread in threads:
+            thread.start()
+        while threads[-1].is_alive():
+            threads[-1].join(self.poll_interval)
+            self.metrics.queues["decode>filter"].sample(decode_q.qsize())
+            self.metrics.queues["filter>encode"].sample(encode_q.qsize())
+            if self.monitor is not None and not self._stop.is_set() and self.monitor(encode_stage.items):
+                cancelled = True
+                self._stop.set()
+        self._stop.set() # Кодування завершилося (або впало) - решта етапів теж зупиняється
+        for thread in threads:
+            thread.join()
+        self.metrics.wall_s = time.perf_counter() - started
+        if self._errors:
+            raise self._errors[0]
+        if cancelled:
+            raise ProcessingCancelledError("Скасовано під час обробки кадрів.")
+        if self.monitor is not None:
+            self.monitor(encode_stage.items)
+        return self.metrics
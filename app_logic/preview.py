@@ -0,0 +1,176 @@
+# app_logic/preview.py
+# Швидкий попередній перегляд: один кадр або коротке вікно (2-3 с) у зменшеній (проксі) роздільній здатності
+# через той самий покадровий конвеєр, що й рушій "fused". Декодовані кадри джерела зберігаються в LRU-кеші,
+# тому перемикання опцій у GUI лише повторно застосовує конвеєр до готових кадрів, без нового декодування.
+import os
+import subprocess
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+from PIL import Image
+
+from app_logic import job_options
+from app_logic.frame_pipeline import FramePipeline
+from app_logic.media_probe import probe_media
+from app_logic.utils import get_ffmpeg_path_for_moviepy_ua, get_subprocess_kwargs_ua
+
+PREVIEW_MAX_SIDE = 480 # Довша сторона проксі-кадру
+PREVIEW_WINDOW_FPS = 10 # Кадрів на секунду для короткого вікна попереднього перегляду
+
+class PreviewError(Exception):
+    pass
+
+class FrameCache:
+    """ Обмежений за обсягом LRU-кеш декодованих проксі-кадрів. Безпечний для потоків. """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+            return frame
+
+    def put(self, key, frame):
+        frame.setflags(write=False) # Кадри з кешу спільні, тож змінювати їх не можна
+        with self._lock:
+            old = self._frames.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old.nbytes
+            self._frames[key] = frame
+            self.current_bytes += frame.nbytes
+            while self.current_bytes > self.max_bytes and len(self._frames) > 1:
+                _, evicted = self._frames.popitem(last=False)
+                self.current_bytes -= evicted.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.current_bytes = 0
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_frame_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = FrameCache()
+        return _default_cache
+
+def proxy_size(width, height, max_side=PREVIEW_MAX_SIDE):
+    """ Розмір проксі-кадру зі збереженням пропорцій (парні сторони, не більший за оригінал). """
+    scale = min(1.0, max_side / float(max(width, height)))
+    return max(2, int(width * scale) // 2 * 2), max(2, int(height * scale) // 2 * 2)
+
+def decode_proxy_frames(input_path, start_time, size, frame_count=1, fps=None):
+    """
+    Декодує frame_count кадрів з start_time одразу в проксі-розмірі (масштабування виконує FFmpeg).
+    Повертає список масивів RGB uint8.
+    """
+    width, height = size
+    filters = ([f"fps={fps}"] if fps else []) + [f"scale={width}:{height}"]
+    cmd = [get_ffmpeg_path_for_moviepy_ua(), "-hide_banner", "-loglevel", "error",
+           "-ss", f"{max(0.0, start_time):.3f}", "-i", input_path, "-an",
+           "-vf", ",".join(filters), "-frames:v", str(frame_count),
+           "-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+    try:
+        result = subprocess.run(cmd, capture_output=True, timeout=60, **get_subprocess_kwargs_ua())
+    except (OSError, subprocess.SubprocessError) as e:
+        raise PreviewError(f"Не вдалося запустити FFmpeg для попереднього перегляду: {e}")
+    frame_bytes = width * height * 3
+    count = len(result.stdout) // frame_bytes
+    if count == 0:
+        raise PreviewError(f"FFmpeg не повернув жодного кадру: {result.stderr.decode('utf-8', errors='replace').strip()[-300:]}")
+    data = np.frombuffer(result.stdout, dtype=np.uint8, count=count * frame_bytes)
+    return [frame.copy() for frame in data.reshape(count, height, width, 3)]
+
+def _resize_rgb(frame, size):
+    if (frame.shape[1], frame.shape[0]) == tuple(size):
+        return frame
+    if cv2 is not None:
+        return cv2.resize(frame, tuple(size), interpolation=cv2.INTER_AREA)
+    return np.asarray(Image.fromarray(frame).resize(tuple(size), Image.BILINEAR))
+
+class PreviewRenderer:
+    """
+    Застосовує options до проксі-кадрів. Зміна розміру зводиться до проксі-розміру з кінцевими пропорціями,
+    геометрія, Ч/Б, гамма/контраст і шум виконуються FramePipeline. Швидкість і гучність на кадр не впливають.
+    """
+
+    def __init__(self, input_path, max_side=PREVIEW_MAX_SIDE, cache=None):
+        self.input_path = input_path
+        self.info = probe_media(input_path)
+        self.max_side = max_side
+        self.size = proxy_size(self.info.width, self.info.height, max_side)
+        self.cache = cache or get_default_frame_cache()
+        self._mtime_ns = os.stat(input_path).st_mtime_ns # Змінений файл не повинен брати старі кадри з кешу
+
+    def _cache_key(self, time_s):
+        return (self.input_path, self._mtime_ns, self.size, round(time_s, 3))
+
+    def source_frames(self, start_time, duration=None, fps=PREVIEW_WINDOW_FPS):
+        """ Проксі-кадри джерела з кешу; декодуються лише відсутні (одним викликом FFmpeg). """
+        if duration is None:
+            times = [start_time]
+        else:
+            times = [start_time + i / float(fps) for i in range(max(1, int(round(duration * fps))))]
+        frames = [self.cache.get(self._cache_key(t)) for t in times]
+        if any(frame is None for frame in frames):
+            decoded = decode_proxy_frames(self.input_path, start_time, self.size, len(times),
+                                          fps=fps if duration is not None else None)
+            for t, frame in zip(times, decoded):
+                self.cache.put(self._cache_key(t), frame)
+            frames = [self.cache.get(self._cache_key(t)) for t in times]
+        return [frame for frame in frames if frame is not None]
+
+    def default_time(self):
+        """ Кадр на 10% тривалості: перший кадр часто чорний. """
+        return (self.info.duration or 0.0) * 0.1
+
+    def build_pipeline(self, options):
+        preview_options = dict(options)
+        if preview_options.get("noise_seed") is None:
+            preview_options["noise_seed"] = 0 # Однаковий шум між перемальовуваннями, щоб зображення не "мерехтіло"
+        if not FramePipeline.supports(preview_options):
+            preview_options["rotation_angle"] = 0 # Довільний кут повертається окремо в apply()
+        return FramePipeline(preview_options, reuse_output=False)
+
+    def apply(self, frame, options, pipeline):
+        resize = job_options.parse_resize(options)
+        if resize:
+            frame = _resize_rgb(frame, proxy_size(resize[0], resize[1], self.max_side)) # Кінцеві пропорції в межах проксі
+        rotation_angle = options.get("rotation_angle", 0)
+        if not FramePipeline.supports(options):
+            frame = np.asarray(Image.fromarray(frame).rotate(rotation_angle, expand=True))
+        return pipeline(frame)
+
+    def render_frame(self, options, time_s=None):
+        time_s = self.default_time() if time_s is None else time_s
+        frame = self.source_frames(time_s)[0]
+        return self.apply(frame, options, self.build_pipeline(options))
+
+    def render_window(self, options, start_time=None, duration=2.0, fps=PREVIEW_WINDOW_FPS):
+        start_time = self.default_time() if start_time is None else start_time
+        pipeline = self.build_pipeline(options) # Один конвеєр на вікно: шум змінюється від кадру до кадру, як у відео
+        return [self.apply(frame, options, pipeline) for frame in self.source_frames(start_time, duration, fps)]
+
+def render_preview_frame(input_path, options, time_s=None, max_side=PREVIEW_MAX_SIDE, cache=None):
+    """ Один оброблений проксі-кадр (RGB uint8). Викидає PreviewError або MediaProbeError. """
+    return PreviewRenderer(input_path, max_side, cache).render_frame(options, time_s)
+
+def render_preview_window(input_path, options, start_time=None, duration=2.0,
+                          fps=PREVIEW_WINDOW_FPS, max_side=PREVIEW_MAX_SIDE, cache=None):
+    """ Коротке вікно (список проксі-кадрів) для анімованого попереднього перегляду. """
+    return PreviewRenderer(input_path, max_side, cache).render_window(options, start_time, duration, fps)
@@ -0,0 +1,162 @@
+# app_logic/profiling.py
+# Необов'язкове профілювання обробки: тривалість етапів (аналіз, побудова фільтрів, аудіо, кодування)
+# і кожного виклику покадрових шарів MoviePy в момент, коли вони реально виконуються під час запису.
+# Результат - JSON у форматі Chrome trace events (chrome://tracing, Perfetto) та текстова зведена таблиця.
+# Вмикається опцією options['profile_dir']; без неї використовується NULL_PROFILER, що нічого не робить.
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+class _Aggregate:
+    __slots__ = ("category", "count", "total_ns", "self_ns", "max_ns")
+
+    def __init__(self, category):
+        self.category = category
+        self.count = 0
+        self.total_ns = 0
+        self.self_ns = 0
+        self.max_ns = 0
+
+class StageProfiler:
+    """
+    Збирає вкладені інтервали часу. Для кожного інтервалу рахується і повний час, і "власний"
+    (без вкладених інтервалів), тож шари MoviePy, які викликають один одного, не рахуються двічі.
+    Окремі події зберігаються до max_events, після цього - лише агрегати для зведеної таблиці.
+    """
+    enabled = True
+
+    def __init__(self, name="", max_events=200000):
+        self.name = name
+        self.max_events = max_events
+        self.events = []
+        self.dropped_events = 0
+        self.aggregates = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin_ns = time.perf_counter_ns()
+        self._pid = os.getpid()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _record(self, name, category, start_ns, end_ns, child_ns, args):
+        duration = end_ns - start_ns
+        with self._lock:
+            aggregate = self.aggregates.get(name)
+            if aggregate is None:
+                aggregate = self.aggregates[name] = _Aggregate(category)
+            aggregate.count += 1
+            aggregate.total_ns += duration
+            aggregate.self_ns += duration - child_ns
+            aggregate.max_ns = max(aggregate.max_ns, duration)
+            if len(self.events) < self.max_events:
+                event = {"name": name, "cat": category, "ph": "X", "pid": self._pid,
+                         "tid": threading.get_ident(),
+                         "ts": (start_ns - self._origin_ns) / 1000.0, "dur": duration / 1000.0}
+                if args:
+                    event["args"] = args
+                self.events.append(event)
+            else:
+                self.dropped_events += 1
+
+    @contextmanager
+    def span(self, name, category="stage", **args):
+        stack = self._stack()
+        stack.append(0) # Сюди вкладені інтервали додають свій час
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end_ns = time.perf_counter_ns()
+            child_ns = stack.pop()
+            if stack:
+                stack[-1] += end_ns - start_ns
+            self._record(name, category, start_ns, end_ns, child_ns, args)
+
+    def wrap_frame_function(self, name, func):
+        """ Обгортка функції кадру (для fl_image): кожен виклик стає подією категорії "frame". """
+        def _timed(*args, **kwargs):
+            with self.span(name, "frame"):
+                return func(*args, **kwargs)
+        return _timed
+
+    def instrument_clip(self, clip, name):
+        """
+        Вимірює make_frame кліпу - тобто весь шар MoviePy, створений останнім fx (resize, rotate, crop, speedx...).
+        Шари ліниві, тому час фіксується саме під час запису, а власний час шару відділяється від вкладених.
+        """
+        clip.make_frame = self.wrap_frame_function(name, clip.make_frame) # Без set_make_frame, щоб не перечитувати розмір
+        return clip
+
+    def summary_rows(self):
+        """ Рядки зведеної таблиці, відсортовані за власним часом (спочатку найдорожчі етапи). """
+        with self._lock:
+            items = list(self.aggregates.items())
+        rows = []
+        for name, aggregate in items:
+            rows.append({
+                "name": name, "category": aggregate.category, "count": aggregate.count,
+                "total_s": aggregate.total_ns / 1e9, "self_s": aggregate.self_ns / 1e9,
+                "mean_ms": aggregate.total_ns / aggregate.count / 1e6 if aggregate.count else 0.0,
+                "max_ms": aggregate.max_ns / 1e6,
+            })
+        rows.sort(key=lambda row: row["self_s"], reverse=True)
+        return rows
+
+    def format_summary(self):
+        rows = self.summary_rows()
+        total_self = sum(row["self_s"] for row in rows) or 1.0
+        lines = [f"Профіль: {self.name}",
+                 f"{'Етап':<32} {'Тип':<6} {'Викл.':>7} {'Всього, с':>10} {'Власний, с':>11} {'%':>6} {'Сер., мс':>9} {'Макс., мс':>10}"]
+        for row in rows:
+            lines.append(f"{row['name']:<32} {row['category']:<6} {row['count']:>7} {row['total_s']:>10.3f} "
+                         f"{row['self_s']:>11.3f} {100 * row['self_s'] / total_self:>6.1f} "
+                         f"{row['mean_ms']:>9.2f} {row['max_ms']:>10.2f}")
+        if self.dropped_events:
+            lines.append(f"(у trace не записано {self.dropped_events} подій понад ліміт {self.max_events}; таблиця їх враховує)")
+        return "\n".join(lines)
+
+    def to_chrome_trace(self):
+        with self._lock:
+            events = list(self.events)
+        metadata = [{"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": self.name or "video_processor"}}]
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def export(self, directory, base_name):
+        """ Записує <base_name>.trace.json і <base_name>.summary.txt. Повертає шлях до trace. """
+        os.makedirs(directory, exist_ok=True)
+        trace_path = os.path.join(directory, f"{base_name}.trace.json")
+        with open(trace_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_chrome_trace(), f)
+        with open(os.path.join(directory, f"{base_name}.summary.txt"), "w", encoding="utf-8") as f:
+            f.write(self.format_summary() + "\n")
+        return trace_path
+
+class NullProfiler:
+    """ Профілювання вимкнене: жодних обгорток і витрат на кадр. """
+    enabled = False
+
+    @contextmanager
+    def span(self, name, category="stage", **args):
+        yield
+
+    def wrap_frame_function(self, name, func):
+        return func
+
+    def instrument_clip(self, clip, name):
+        return clip
+
+NULL_PROFILER = NullProfiler()
+
+def profiler_from_options(options, name=""):
+    return StageProfiler(name) if options.get("profile_dir") else NULL_PROFILER
+
+def profile_base_name(input_path):
+    """ Назва файлів профілю: ім'я вхідного файлу + час + PID (паралельні завдання не перезаписують одне одного). """
+    stem = os.path.splitext(os.path.basename(input_path))[0]
+    return f"{stem}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
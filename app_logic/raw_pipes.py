@@ -0,0 +1,371 @@
+# app_logic/raw_pipes.py
+# Джерело та приймач кадрів через канали FFmpeg без виділення пам'яті на кожен кадр (рушій "pipes").
+# RawFrameReader читає rawvideo rgb24 зі stdout декодера методом readinto у невелике кільце
+# заздалегідь виділених масивів NumPy; RawFrameWriter передає буфери кадрів у stdin кодувальника
+# через буферний протокол, без tobytes(). Разом з конвеєром кадрів, що повторно використовує свої буфери,
+# обробка довгого відео майже не створює нових масивів і не навантажує збирач сміття.
+import os
+import subprocess
+import tempfile
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app_logic import job_options
+from app_logic.encode_progress import ENCODE_PROGRESS_START, EncodeProgress
+from app_logic.ffmpeg_backend import FfmpegEngineError, build_audio_filters, build_speed_filters, encoder_pix_fmt
+from app_logic.frame_pipeline import compile_frame_pipeline
+from app_logic.media_probe import MediaProbeError, probe_media
+from app_logic.opencv_pipeline import compile_opencv_pipeline
+from app_logic.pipeline_executor import PipelinedExecutor
+from app_logic.profiling import NULL_PROFILER
+from app_logic.utils import get_ffmpeg_path_for_moviepy_ua, get_subprocess_kwargs_ua, probe_ffmpeg_capabilities_ua
+from app_logic.video_processor import ProcessingCancelledError
+
+def _stderr_tail(stderr_file, limit=500):
+    try:
+        stderr_file.seek(0)
+        return stderr_file.read().decode("utf-8", errors="replace").strip()[-limit:]
+    except (OSError, ValueError):
+        return ""
+
+class RawFrameReader:
+    """
+    Декодує відео в кадри RGB uint8 розміру size. read() повертає представлення одного з ring_size буферів:
+    кадр лишається дійсним, доки не прочитано ще ring_size - 1 кадрів (потім буфер перезаписується).
+    video_filters - фільтри FFmpeg перед виведенням (напр. масштабування, якщо його не робить Python).
+    decoder_args - параметри декодера перед -i (напр. -threads для меншої кількості кадрів у декодері).
+    """
+
+    def __init__(self, input_path, size, ring_size=3, video_filters=None, decoder_args=None):
+        self.input_path = input_path
+        self.width, self.height = size
+        self.frame_bytes = self.width * self.height * 3
+        self.frames_read = 0
+        self._eof = False
+        self._closed = False
+        self._ring = [np.empty((self.height, self.width, 3), dtype=np.uint8) for _ in range(max(2, int(ring_size)))]
+        self._views = [memoryview(buf).cast("B") for buf in self._ring]
+        self._index = 0
+        cmd = [get_ffmpeg_path_for_moviepy_ua(), "-hide_banner", "-loglevel", "error", "-nostdin"]
+        cmd += list(decoder_args or []) + ["-i", input_path, "-an", "-sn"]
+        if video_filters:
+            cmd += ["-vf", ",".join(video_filters)]
+        cmd += ["-f", "rawvideo", "-pix_fmt", "rgb24", "pipe:1"]
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self.proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=self._stderr,
+                                         bufsize=0, **get_subprocess_kwargs_ua())
+        except OSError as e:
+            self._stderr.close()
+            raise FfmpegEngineError(f"Не вдалося запустити декодер FFmpeg: {e}")
+
+    def read(self):
+        """ Наступний кадр (масив H x W x 3) або None наприкінці потоку. """
+        view = self._views[self._index]
+        got = 0
+        while got < self.frame_bytes:
+            n = self.proc.stdout.readinto(view[got:])
+            if not n:
+                break
+            got += n
+        if got < self.frame_bytes:
+            self._eof = True
+            return None # Кінець потоку (неповний останній кадр відкидається, як у MoviePy)
+        frame = self._ring[self._index]
+        self._index = (self._index + 1) % len(self._ring)
+        self.frames_read += 1
+        return frame
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def close(self):
+        """
+        Завершує декодер (повторний виклик нічого не робить). Викидає FfmpegEngineError, якщо FFmpeg
+        завершився з ненульовим кодом. Код не перевіряється лише тоді, коли декодер зупинено тут до кінця потоку
+        (скасування чи помилка на іншому етапі).
+        """
+        if self._closed:
+            return
+        self._closed = True
+        killed = False
+        if not self._eof and self.proc.poll() is None:
+            self.proc.kill()
+            killed = True
+        self.proc.wait()
+        self.proc.stdout.close()
+        returncode = self.proc.returncode
+        error_tail = _stderr_tail(self._stderr)
+        self._stderr.close()
+        if returncode != 0 and not killed:
+            raise FfmpegEngineError(f"Декодер FFmpeg завершився з кодом {returncode}: {error_tail}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            try: self.close()
+            except FfmpegEngineError: pass # Перша помилка важливіша
+
+class RawFrameWriter:
+    """
+    Кодує кадри RGB uint8 розміру size у output_path. Кадри передаються в stdin FFmpeg через буферний протокол
+    (без копії); лише несуцільні представлення (напр. після обрізки) копіюються в один повторно використовуваний буфер.
+    audio_source - файл, з якого береться аудіо (з audio_filters), video_filters - фільтри після вхідних кадрів,
+    encoder_args - додаткові параметри кодувальника (напр. менший -rc-lookahead у потоковому режимі).
+    """
+
+    def __init__(self, output_path, size, fps, audio_source=None, audio_filters=None, video_filters=None,
+                 codec="libx264", threads=4, encoder_args=None):
+        self.output_path = output_path
+        self.width, self.height = size
+        self.frames_written = 0
+        self._staging = None
+        cmd = [get_ffmpeg_path_for_moviepy_ua(), "-y", "-hide_banner", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{self.width}x{self.height}", "-r", f"{fps:.6g}",
+               "-i", "pipe:0"]
+        if audio_source:
+            cmd += ["-i", audio_source]
+        pix_fmt = encoder_pix_fmt(size) # yuv420p лише для парних сторін, як у MoviePy
+        cmd += ["-map", "0:v:0", "-vf", ",".join(list(video_filters or []) + [f"format={pix_fmt}"])]
+        if audio_source:
+            cmd += ["-map", "1:a:0"]
+            if audio_filters:
+                cmd += ["-af", ",".join(audio_filters)]
+            cmd += ["-c:a", "aac"]
+        cmd += ["-c:v", codec, "-pix_fmt", pix_fmt, "-threads", str(threads)] + list(encoder_args or []) + [output_path]
+        self._stderr = tempfile.TemporaryFile()
+        try:
+            self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._stderr,
+                                         bufsize=0, **get_subprocess_kwargs_ua())
+        except OSError as e:
+            self._stderr.close()
+            raise FfmpegEngineError(f"Не вдалося запустити кодувальник FFmpeg: {e}")
+
+    def write(self, frame):
+        if frame.shape != (self.height, self.width, 3):
+            raise FfmpegEngineError(f"Розмір кадру {frame.shape[1]}x{frame.shape[0]} не збігається з {self.width}x{self.height}.")
+        if not frame.flags.c_contiguous:
+            if self._staging is None:
+                self._staging = np.empty(frame.shape, dtype=np.uint8)
+            np.copyto(self._staging, frame)
+            frame = self._staging
+        try:
+            self.proc.stdin.write(memoryview(frame).cast("B"))
+        except (BrokenPipeError, OSError):
+            self.proc.wait()
+            raise FfmpegEngineError(f"Кодувальник FFmpeg завершився з кодом {self.proc.returncode}: {_stderr_tail(self._stderr)}")
+        self.frames_written += 1
+
+    def close(self):
+        """ Закриває stdin і чекає завершення кодування. Викидає FfmpegEngineError при помилці FFmpeg. """
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.wait()
+        error_tail = _stderr_tail(self._stderr)
+        self._stderr.close()
+        if self.proc.returncode != 0:
+            _remove_file_quietly(self.output_path)
+            raise FfmpegEngineError(f"Кодувальник FFmpeg завершився з кодом {self.proc.returncode}: {error_tail}")
+
+    def abort(self):
+        """ Перериває кодування (скасування чи помилка) і видаляє частковий файл. """
+        if self.proc.poll() is None:
+            self.proc.kill()
+        try: self.proc.stdin.close()
+        except OSError: pass
+        self.proc.wait()
+        self._stderr.close()
+        _remove_file_quietly(self.output_path)
+
+def _remove_file_quietly(path):
+    try:
+        if path and os.path.exists(path): os.remove(path)
+    except OSError:
+        pass
+
+def compile_pipes_pipeline(options, info, output_buffers=1):
+    """
+    Повертає (функція кадру, фільтри декодера). З OpenCV увесь ланцюжок виконує OpenCVFramePipeline;
+    без нього зміну розміру виконує декодер FFmpeg, решту - FramePipeline (лише кути, кратні 90°).
+    output_buffers > 1 - результати кількох кадрів поспіль лишаються дійсними (для конвеєрного виконання).
+    """
+    pipeline = compile_opencv_pipeline(options, output_buffers=output_buffers)
+    if pipeline is not None:
+        return pipeline, []
+    pipeline = compile_frame_pipeline(options, reuse_output=output_buffers <= 1)
+    if pipeline is None:
+        raise FfmpegEngineError(f"Поворот на {options.get('rotation_angle')}° без OpenCV не підтримується.")
+    resize = job_options.parse_resize(options)
+    return pipeline, ([f"scale={resize[0]}:{resize[1]}"] if resize else [])
+
+# Глибина черг між етапами за замовчуванням (options['pipeline_queue_depth']; 0 - усі етапи в одному потоці)
+DEFAULT_PIPELINE_QUEUE_DEPTH = 4
+
+# Потоковий режим з бюджетом пам'яті (options['memory_budget_mb'])
+STREAMING_BASE_MB = 150 # Інтерпретатор, NumPy, OpenCV, MoviePy - без буферів кадрів
+PIPELINE_WORK_BUFFERS = 5 # Проміжні буфери конвеєра (розмір, поворот, дзеркала, колір) і буфер staging записувача
+MAX_BUDGET_QUEUE_DEPTH = 8
+STREAMING_DECODER_THREADS = 2 # Кожен потік декодера тримає власний кадр
+STREAMING_RC_LOOKAHEAD = 10 # libx264 за замовчуванням тримає 40 кадрів наперед
+
+@dataclass
+class StreamingPlan:
+    """ Розподіл бюджету пам'яті: скільки кадрів одночасно в обробці і параметри FFmpeg. """
+    budget_mb: float
+    queue_depth: int
+    reader_ring: int
+    output_buffers: int
+    frames_in_flight: int
+    estimated_mb: float
+    fits: bool
+    decoder_args: list = field(default_factory=list)
+    encoder_args: list = field(default_factory=list)
+
+    def describe(self):
+        mode = f"черги глибиною {self.queue_depth}" if self.queue_depth else "в одному потоці"
+        text = (f"Потоковий режим: до {self.frames_in_flight} кадрів у пам'яті ({mode}), "
+                f"оцінка {self.estimated_mb:.0f} МБ з бюджету {self.budget_mb:.0f} МБ")
+        if not self.fits:
+            text += " - бюджет замалий для цього розміру кадру, використовується мінімальна конфігурація"
+        return text
+
+def _frame_buffers(queue_depth):
+    """ (буферів декодера, буферів результату та проміжних) для глибини черги. """
+    reader_ring, output_buffers = PipelinedExecutor.ring_sizes(queue_depth) if queue_depth > 0 else (3, 1)
+    return reader_ring, output_buffers
+
+def plan_streaming(budget_mb, input_size, output_size):
+    """
+    Найбільша глибина черг (до MAX_BUDGET_QUEUE_DEPTH), за якої всі буфери кадрів разом із базовою пам'яттю
+    процесу вміщуються в budget_mb. Кількість буферів не залежить від тривалості відео, тож пікова пам'ять
+    однакова для хвилинного і годинного файлу. Аудіо обробляє кодувальник FFmpeg потоково, без масивів у Python.
+    """
+    input_bytes = input_size[0] * input_size[1] * 3
+    work_bytes = max(input_bytes, output_size[0] * output_size[1] * 3)
+    available = (float(budget_mb) - STREAMING_BASE_MB) * 1024 * 1024
+
+    def _bytes(queue_depth):
+        reader_ring, output_buffers = _frame_buffers(queue_depth)
+        return reader_ring * input_bytes + (output_buffers + PIPELINE_WORK_BUFFERS) * work_bytes
+
+    queue_depth = 0
+    for depth in range(MAX_BUDGET_QUEUE_DEPTH, 0, -1):
+        if _bytes(depth) <= available:
+            queue_depth = depth
+            break
+    reader_ring, output_buffers = _frame_buffers(queue_depth)
+    frame_bytes = _bytes(queue_depth)
+    return StreamingPlan(budget_mb=float(budget_mb), queue_depth=queue_depth, reader_ring=reader_ring,
+                         output_buffers=output_buffers,
+                         frames_in_flight=reader_ring + output_buffers + PIPELINE_WORK_BUFFERS,
+                         estimated_mb=STREAMING_BASE_MB + frame_bytes / (1024 * 1024), fits=frame_bytes <= available,
+                         decoder_args=["-threads", str(STREAMING_DECODER_THREADS)],
+                         encoder_args=["-rc-lookahead", str(STREAMING_RC_LOOKAHEAD)])
+
+def process_video_task_pipes(input_path, output_folder, options,
+                             status_callback, progress_callback, check_if_cancelled_callback, profiler=NULL_PROFILER):
+    """
+    Аналог process_video_task: декодування й кодування окремими процесами FFmpeg, кадри між ними проходять
+    через кільце буферів RawFrameReader, покадровий конвеєр і RawFrameWriter. Швидкість "Унік" і аудіо
+    обробляє кодувальник (фільтри як у рушії "ffmpeg"). Декодування, фільтрація та кодування виконуються
+    в окремих потоках (PipelinedExecutor), якщо options['pipeline_queue_depth'] не 0.
+    options['memory_budget_mb'] - потоковий режим: глибина черг і параметри FFmpeg обираються за бюджетом (plan_streaming).
+    Викидає FfmpegEngineError, якщо рушій недоступний.
+    """
+    if not probe_ffmpeg_capabilities_ua()["available"]:
+        raise FfmpegEngineError("FFmpeg не знайдено.")
+    try:
+        status_callback(f"Аналіз відео: {os.path.basename(input_path)}")
+        progress_callback(0.05)
+        try:
+            with profiler.span("probe"):
+                info = probe_media(input_path)
+        except MediaProbeError as e:
+            raise FfmpegEngineError(f"Не вдалося проаналізувати відео: {e}")
+        if not info.fps:
+            raise FfmpegEngineError("Невідома частота кадрів.")
+
+        plan = None
+        if options.get("memory_budget_mb"):
+            plan = plan_streaming(options["memory_budget_mb"], info.size,
+                                  job_options.compute_output_size(options, info.width, info.height))
+            status_callback(plan.describe())
+            queue_depth, reader_ring, output_buffers = plan.queue_depth, plan.reader_ring, plan.output_buffers
+        else:
+            queue_depth = int(options.get("pipeline_queue_depth", DEFAULT_PIPELINE_QUEUE_DEPTH) or 0)
+            reader_ring, output_buffers = _frame_buffers(queue_depth)
+        pipeline, decoder_filters = compile_pipes_pipeline(options, info, output_buffers)
+        decode_size = job_options.parse_resize(options) if decoder_filters else info.size
+        if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед обробкою.")
+        status_callback("Обробка кадрів через канали FFmpeg (без копіювання кадрів)...")
+        progress_callback(ENCODE_PROGRESS_START)
+
+        tracker = EncodeProgress(info.frame_count, progress_callback, check_if_cancelled_callback)
+        state = {"writer": None, "output_path": None}
+
+        def _write(out):
+            writer = state["writer"]
+            if writer is None:
+                # Кінцевий розмір відомий з першого обробленого кадру (як у MoviePy)
+                output_path = job_options.build_output_path(
+                    input_path, output_folder, job_options.get_effect_tags(options), (out.shape[1], out.shape[0]))
+                status_callback(f"Збереження відео в: {output_path}")
+                writer = state["writer"] = RawFrameWriter(
+                    output_path, (out.shape[1], out.shape[0]), info.fps,
+                    audio_source=input_path if info.has_audio else None,
+                    audio_filters=build_audio_filters(options, info.audio_sample_rate),
+                    video_filters=build_speed_filters(options, info.fps),
+                    encoder_args=plan.encoder_args if plan else None)
+                state["output_path"] = output_path
+            writer.write(out)
+
+        with RawFrameReader(input_path, decode_size, ring_size=reader_ring, video_filters=decoder_filters,
+                            decoder_args=plan.decoder_args if plan else None) as reader:
+            try:
+                if queue_depth > 0:
+                    executor = PipelinedExecutor(reader.read, pipeline, _write, queue_depth,
+                                                 monitor=tracker.update, profiler=profiler)
+                    metrics = executor.run()
+                else:
+                    metrics = None
+                    while True:
+                        with profiler.span("decode", "frame"):
+                            frame = reader.read()
+                        if frame is None:
+                            break
+                        with profiler.span("filter", "frame"):
+                            out = pipeline(frame)
+                        with profiler.span("encode", "frame"):
+                            _write(out)
+                        if tracker.update(reader.frames_read):
+                            raise ProcessingCancelledError("Скасовано під час обробки кадрів.")
+                reader.close() # Помилка декодера до кінця потоку не повинна дати обрізаний результат
+                if state["writer"] is None:
+                    raise FfmpegEngineError("Декодер не повернув жодного кадру.")
+                with profiler.span("encoder_flush"):
+                    state["writer"].close()
+            except BaseException:
+                if state["writer"] is not None:
+                    state["writer"].abort()
+                raise
+        tracker.finish()
+        if metrics is not None:
+            status_callback(metrics.format_summary())
+            with profiler.span("pipeline_metrics", **metrics.to_dict()):
+                pass
+        status_callback(f"Відео успішно збережено: {state['output_path']}")
+        return state["output_path"]
+    except ProcessingCancelledError as e:
+        status_callback(str(e) if str(e) else "Обробку скасовано.")
+        return None
@@ -0,0 +1,265 @@
+# app_logic/result_cache.py
+# Кеш результатів обробки: повторне завдання з тим самим вмістом файлу та тими самими опціями
+# не кодується знову, а отримує жорстке посилання (або копію) на раніше збережений результат.
+# Ключ - швидкий відбиток вхідного файлу (розмір, час зміни, BLAKE2b вибраних блоків) плюс хеш нормалізованих опцій.
+# Кеш не має спільного індексу: кожен запис - файл результату та JSON з метаданими, тож кілька процесів
+# (пакетна обробка) працюють з ним без гонок. Однакові завдання, що виконуються одночасно, об'єднуються:
+# перше кодує, решта чекають на файл-замок і беруть готовий результат.
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+from app_logic import job_options
+from app_logic.utils import APP_DATA_DIR_NAME, get_user_data_dir_ua
+
+# Опції, що не впливають на вміст результату
+NON_OUTPUT_OPTION_KEYS = ("use_result_cache", "profile_dir", "segment_parallel", "tile_parallel",
+                          "pipeline_queue_depth", "opencv_threads", "resumable")
+
+SAMPLE_BLOCK_SIZE = 64 * 1024
+SAMPLE_BLOCK_COUNT = 16
+
+def fingerprint_file(path):
+    """ Відбиток без читання всього файлу: розмір, mtime і BLAKE2b по SAMPLE_BLOCK_COUNT рівномірно розташованих блоках. """
+    st = os.stat(path)
+    digest = hashlib.blake2b(digest_size=20)
+    digest.update(f"{st.st_size}|{st.st_mtime_ns}".encode("ascii"))
+    with open(path, "rb") as f:
+        if st.st_size <= SAMPLE_BLOCK_SIZE * SAMPLE_BLOCK_COUNT:
+            digest.update(f.read())
+        else:
+            step = (st.st_size - SAMPLE_BLOCK_SIZE) // (SAMPLE_BLOCK_COUNT - 1)
+            for i in range(SAMPLE_BLOCK_COUNT):
+                f.seek(i * step)
+                digest.update(f.read(SAMPLE_BLOCK_SIZE))
+    return digest.hexdigest()
+
+def normalize_options(options):
+    """
+    Опції у канонічному вигляді: значення за замовчуванням підставлені, неактивні параметри прибрані
+    (розмір без resize_active, параметри "Унік" без uniek_filter_active), службові ключі відкинуті.
+    """
+    normalized = job_options.resolve_options(None, {k: v for k, v in options.items() if k not in NON_OUTPUT_OPTION_KEYS})
+    resize = job_options.parse_resize(normalized)
+    normalized.pop("width", None); normalized.pop("height", None)
+    normalized["resize_active"] = bool(resize)
+    if resize:
+        normalized["resize"] = list(resize)
+    if normalized.get("uniek_filter_active"):
+        normalized["uniek_params"] = job_options.get_uniek_params(normalized)
+    else:
+        for key in ("uniek_params", "noise_seed", "noise_mode"):
+            normalized.pop(key, None)
+    normalized["rotation_angle"] = normalized.get("rotation_angle", 0) % 360
+    return normalized
+
+def is_deterministic(options):
+    """ Чи дає завдання щоразу той самий результат: випадковий шум "Унік" без noise_seed - ні, такий результат не кешується. """
+    if not options.get("uniek_filter_active"):
+        return True
+    return options.get("noise_seed") is not None or job_options.get_uniek_params(options)["noise_sigma"] <= 0
+
+def options_hash(options):
+    canonical = json.dumps(normalize_options(options), sort_keys=True, ensure_ascii=True, default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=20).hexdigest()
+
+def _link_or_copy(source, target):
+    """ Атомарно створює target як жорстке посилання на source (або копію на іншому диску / FAT). """
+    tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copy2(source, tmp_path)
+    os.replace(tmp_path, target)
+
+class ResultCache:
+    def __init__(self, cache_dir=None, max_bytes=20 * 1024 ** 3, lock_stale_seconds=120, heartbeat_seconds=15):
+        self.cache_dir = cache_dir or os.path.join(get_user_data_dir_ua(APP_DATA_DIR_NAME), "result_cache")
+        self.objects_dir = os.path.join(self.cache_dir, "objects")
+        self.locks_dir = os.path.join(self.cache_dir, "locks")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.locks_dir, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.lock_stale_seconds = lock_stale_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+
+    def make_key(self, input_path, options):
+        return hashlib.blake2b(f"{fingerprint_file(input_path)}|{options_hash(options)}".encode("ascii"),
+                               digest_size=20).hexdigest()
+
+    def _meta_path(self, key):
+        return os.path.join(self.objects_dir, f"{key}.json")
+
+    def lookup(self, key):
+        """ Метадані запису або None. Запис із пошкодженим/зниклим файлом видаляється. """
+        try:
+            with open(self._meta_path(key), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        object_path = os.path.join(self.objects_dir, meta.get("object", ""))
+        try:
+            if os.path.getsize(object_path) != meta.get("bytes"):
+                raise OSError("розмір не збігається")
+        except OSError:
+            self.remove(key)
+            return None
+        meta["object_path"] = object_path
+        try:
+            os.utime(self._meta_path(key)) # Час останнього використання для LRU
+        except OSError:
+            pass
+        return meta
+
+    def materialize(self, meta, input_path, output_folder):
+        """ Створює результат для нового завдання: та сама назва, що дав би process_video_task. """
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        target = os.path.join(output_folder, stem + meta["name_suffix"])
+        if os.path.exists(target) and os.path.samefile(target, meta["object_path"]):
+            return target
+        _link_or_copy(meta["object_path"], target)
+        return target
+
+    def store(self, key, output_path, input_path):
+        stem = os.path.splitext(os.path.basename(input_path))[0]
+        output_name = os.path.basename(output_path)
+        if not output_name.startswith(stem):
+            return # Назва не виведена з вхідної, такий результат не відтворити для іншого файлу
+        object_name = key + os.path.splitext(output_path)[1]
+        _link_or_copy(output_path, os.path.join(self.objects_dir, object_name))
+        meta = {"key": key, "object": object_name, "name_suffix": output_name[len(stem):],
+                "bytes": os.path.getsize(output_path), "source": os.path.abspath(input_path), "created": time.time()}
+        tmp_path = f"{self._meta_path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self._meta_path(key))
+        self.evict()
+
+    def remove(self, key):
+        for name in os.listdir(self.objects_dir):
+            if name.startswith(key):
+                try: os.remove(os.path.join(self.objects_dir, name))
+                except OSError: pass
+
+    def entries(self):
+        """ (час використання, ключ, байти) для кожного запису, від найдавнішого. """
+        result = []
+        for name in os.listdir(self.objects_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.objects_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                result.append((os.path.getmtime(path), meta["key"], int(meta.get("bytes", 0))))
+            except (OSError, ValueError, KeyError):
+                continue
+        result.sort()
+        return result
+
+    def evict(self):
+        """ Видаляє найдавніше використані записи, доки загальний обсяг не стане меншим за max_bytes. """
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+        for _, key, size in entries:
+            if total <= self.max_bytes:
+                break
+            self.remove(key)
+            total -= size
+
+    @contextmanager
+    def inflight(self, key, check_if_cancelled_callback=None, poll_interval=0.5):
+        """
+        Замок на час виконання завдання з ключем key. Якщо такий самий ключ уже обробляється (у цьому
+        чи іншому процесі), чекає на його завершення. Власник оновлює час зміни замка, тож замок
+        аварійно завершеного процесу вважається застарілим через lock_stale_seconds і перехоплюється.
+        Повертає True, якщо довелося чекати на інше завдання.
+        """
+        lock_path = os.path.join(self.locks_dir, f"{key}.lock")
+        waited = False
+        while True:
+            try:
+                fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, f"{os.getpid()}".encode("ascii"))
+                os.close(fd)
+                break
+            except FileExistsError:
+                waited = True
+                try:
+                    if time.time() - os.path.getmtime(lock_path) > self.lock_stale_seconds:
+                        os.remove(lock_path)
+                        continue
+                except OSError:
+                    continue
+                if check_if_cancelled_callback and check_if_cancelled_callback():
+                    yield waited
+                    return
+                time.sleep(poll_interval)
+
+        stop_heartbeat = threading.Event()
+        def _heartbeat():
+            while not stop_heartbeat.wait(self.heartbeat_seconds):
+                try: os.utime(lock_path)
+                except OSError: return
+        heartbeat = threading.Thread(target=_heartbeat, daemon=True)
+        heartbeat.start()
+        try:
+            yield waited
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+            try: os.remove(lock_path)
+            except OSError: pass
+
+    def run(self, input_path, output_folder, options, status_callback, progress_callback,
+            check_if_cancelled_callback, produce):
+        """
+        Повертає результат із кешу або викликає produce() (звичайна обробка) і зберігає її результат.
+        Результати-списки (fan-out, варіанти) і недетерміновані завдання (див. is_deterministic) не кешуються.
+        """
+        if not is_deterministic(options):
+            return produce()
+        try:
+            key = self.make_key(input_path, options)
+        except OSError:
+            return produce()
+
+        def _from_cache(meta):
+            output_path = self.materialize(meta, input_path, output_folder)
+            progress_callback(1.0)
+            status_callback(f"Результат узято з кешу (без повторного кодування): {output_path}")
+            return output_path
+
+        meta = self.lookup(key)
+        if meta:
+            return _from_cache(meta)
+        with self.inflight(key, check_if_cancelled_callback) as waited:
+            if waited:
+                meta = self.lookup(key) # Таке саме завдання щойно завершилося в іншому потоці чи процесі
+                if meta:
+                    return _from_cache(meta)
+            if check_if_cancelled_callback():
+                status_callback("Обробку скасовано.")
+                return None
+            output_path = produce()
+            if isinstance(output_path, str) and os.path.exists(output_path):
+                try:
+                    self.store(key, output_path, input_path)
+                except OSError as e:
+                    status_callback(f"Не вдалося зберегти результат у кеш: {e}")
+                status_callback(f"Відео успішно збережено: {output_path}")
+            return output_path
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_default_result_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
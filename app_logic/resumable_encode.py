@@ -0,0 +1,144 @@
+# app_logic/resumable_encode.py
+# Кодування з відновленням (options['resumable']): вхід ріжеться по ключових кадрах на сегменти
+# приблизно по RESUME_SEGMENT_SECONDS, кожен сегмент кодується в окремий завершений файл, а його стан
+# записується в job_store одразу після завершення. Після аварії чи перезавантаження повторний запуск
+# того самого завдання (той самий файл, опції й папка) пропускає готові сегменти, кодує лише решту
+# і склеює результат без перекодування. Проміжні файли зберігаються в <папка результату>/.resume_<id>/.
+import math
+import os
+import shutil
+import threading
+
+from app_logic import job_options
+from app_logic.ffmpeg_backend import FfmpegEngineError
+from app_logic.job_store import get_default_job_store
+from app_logic.media_probe import MediaProbeError, probe_media
+from app_logic.segment_parallel import concat_segments, process_audio_track, segment_job_options, split_at_keyframes
+from app_logic.utils import probe_ffmpeg_capabilities_ua
+from app_logic.video_processor import ProcessingCancelledError
+
+RESUME_SEGMENT_SECONDS = 30.0 # Найбільше роботи, що втрачається при аварії
+
+def _usable(path):
+    return bool(path) and os.path.isfile(path) and os.path.getsize(path) > 0
+
+def process_video_task_resumable(input_path, output_folder, options,
+                                 status_callback, progress_callback, check_if_cancelled_callback, store=None):
+    """
+    Аналог process_video_task з відновленням після збою. Сегменти кодуються по одному
+    (або паралельно, якщо задано options['segment_parallel']). Викидає FfmpegEngineError,
+    якщо поділ неможливий - тоді викликач обробляє файл звичайно.
+    """
+    from app_logic.batch_processor import BatchJob, default_worker_count, run_batch_jobs
+
+    if not probe_ffmpeg_capabilities_ua()["available"]:
+        raise FfmpegEngineError("FFmpeg не знайдено.")
+    try:
+        info = probe_media(input_path)
+    except MediaProbeError as e:
+        raise FfmpegEngineError(f"Не вдалося проаналізувати відео: {e}")
+    if not info.duration:
+        raise FfmpegEngineError("Невідома тривалість відео.")
+
+    store = store or get_default_job_store()
+    job = store.find_or_create(input_path, output_folder, options)
+    job_id = job["id"]
+    if job["state"] == "done" and _usable(job["output_path"]):
+        status_callback(f"Завдання вже виконано раніше: {job['output_path']}")
+        progress_callback(1.0)
+        return job["output_path"]
+
+    work_dir = os.path.join(output_folder, f".resume_{job_id}")
+    os.makedirs(work_dir, exist_ok=True)
+    store.start_attempt(job_id, work_dir)
+    try:
+        # 1. Поділ на сегменти (лише якщо попередня спроба його не завершила)
+        segments = store.segments(job_id)
+        if not (job["split_done"] and segments and all(_usable(s["source_path"]) for s in segments)):
+            source_dir = os.path.join(work_dir, "src")
+            shutil.rmtree(source_dir, ignore_errors=True)
+            os.makedirs(source_dir)
+            segment_count = max(1, math.ceil(info.duration / RESUME_SEGMENT_SECONDS))
+            status_callback(f"Поділ відео на {segment_count} сегментів для обробки з відновленням...")
+            paths = split_at_keyframes(input_path, segment_count, info.duration, source_dir, check_if_cancelled_callback)
+            if not paths:
+                raise FfmpegEngineError("FFmpeg не створив жодного сегмента.")
+            store.set_segments(job_id, paths)
+            segments = store.segments(job_id)
+        remaining = [s for s in segments if not (s["state"] == "done" and _usable(s["output_path"]))]
+        finished_before = len(segments) - len(remaining)
+        if finished_before:
+            status_callback(f"Відновлення: {finished_before} з {len(segments)} сегментів уже готові, "
+                            f"кодуються лише {len(remaining)}.")
+        progress_callback(0.05 + 0.85 * finished_before / len(segments))
+
+        # 2. Аудіо - одним проходом, паралельно з сегментами; готовий файл теж не переробляється
+        audio_path = os.path.join(work_dir, "audio.m4a") if info.has_audio else None
+        audio_errors = []
+        audio_thread = None
+        if audio_path and not (job["audio_done"] and _usable(audio_path)):
+            def _audio_worker():
+                try:
+                    process_audio_track(input_path, audio_path, options, info.audio_sample_rate, check_if_cancelled_callback)
+                    store.update(job_id, audio_done=1)
+                except Exception as e:
+                    audio_errors.append(e)
+            audio_thread = threading.Thread(target=_audio_worker, daemon=True)
+            audio_thread.start()
+
+        # 3. Сегменти, яких немає або які не були завершені
+        segments_out_dir = os.path.join(work_dir, "out")
+        os.makedirs(segments_out_dir, exist_ok=True)
+        jobs = [BatchJob(input_path=s["source_path"], output_folder=segments_out_dir,
+                         options=segment_job_options(options, s["idx"])) for s in remaining]
+
+        def _on_segment_finished(result):
+            segment = remaining[result.index]
+            if result.success:
+                store.mark_segment(job_id, segment["idx"], "done", result.output_path)
+                status_callback(f"Сегмент {segment['idx'] + 1}/{len(segments)} готовий і збережений.")
+            else:
+                status_callback(f"Сегмент {segment['idx'] + 1}/{len(segments)} - помилка: {result.error}")
+
+        results = []
+        if jobs:
+            workers = default_worker_count() if options.get("segment_parallel") else 1
+            results = run_batch_jobs(
+                jobs, max_workers=min(workers, len(jobs)),
+                batch_progress_callback=lambda value, finished, total: progress_callback(
+                    0.05 + 0.85 * (finished_before + value * len(jobs)) / len(segments)),
+                job_finished_callback=_on_segment_finished,
+                check_if_cancelled_callback=check_if_cancelled_callback)
+        if audio_thread:
+            audio_thread.join()
+        if check_if_cancelled_callback():
+            raise ProcessingCancelledError("Скасовано; готові сегменти збережено для відновлення.")
+        failed = [r for r in results if not r.success]
+        if failed:
+            raise FfmpegEngineError(f"Сегмент {remaining[failed[0].index]['idx'] + 1} не оброблено: {failed[0].error}")
+        for error in audio_errors:
+            if isinstance(error, ProcessingCancelledError): raise error
+            raise FfmpegEngineError(f"Помилка обробки аудіо: {error}")
+
+        # 4. Склеювання
+        output_size = job_options.compute_output_size(options, info.width, info.height)
+        output_path = job_options.build_output_path(
+            input_path, output_folder, job_options.get_effect_tags(options), output_size)
+        status_callback(f"Склеювання сегментів у: {output_path}")
+        progress_callback(0.92)
+        segment_outputs = [s["output_path"] for s in store.segments(job_id)]
+        concat_segments(segment_outputs, audio_path, output_path, work_dir, check_if_cancelled_callback)
+
+        store.update(job_id, state="done", output_path=output_path)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        progress_callback(1.0)
+        status_callback(f"Відео успішно збережено: {output_path}")
+        return output_path
+    except ProcessingCancelledError as e:
+        store.update(job_id, state="cancelled", error=str(e))
+        status_callback(str(e) if str(e) else "Обробку скасовано.")
+        return None
+    except Exception as e:
+        # Готові сегменти лишаються на диску: наступна спроба продовжить з них
+        store.update(job_id, state="failed", error=f"{type(e).__name__}: {e}")
+        raise
@@ -0,0 +1,157 @@
+# app_logic/segment_parallel.py
+# Паралельне кодування одного довгого відео: вхід ріжеться по ключових кадрах на N часових сегментів
+# (без перекодування), кожен сегмент обробляється звичайним process_video_task у власному процесі,
+# а результати склеюються без втрат демультиплексором concat FFmpeg.
+# Аудіо обробляється одним безперервним проходом по всьому файлу, тому на межах сегментів немає розривів,
+# а зміна швидкості "Унік" дає правильну загальну тривалість (кожен сегмент і аудіо сповільнюються однаково).
+import glob
+import os
+import shutil
+import tempfile
+import threading
+
+from app_logic import job_options
+from app_logic.ffmpeg_backend import FfmpegEngineError, build_audio_filters, run_ffmpeg_command
+from app_logic.media_probe import MediaProbeError, probe_media
+from app_logic.utils import get_ffmpeg_path_for_moviepy_ua, probe_ffmpeg_capabilities_ua
+from app_logic.video_processor import ProcessingCancelledError
+
+MIN_SEGMENT_SECONDS = 10.0 # Коротші сегменти не дають виграшу через накладні витрати на запуск процесів
+
+def resolve_segment_count(requested, duration):
+    """ Кількість сегментів: "auto" - за кількістю ядер, але не коротші за MIN_SEGMENT_SECONDS. """
+    if requested == "auto":
+        requested = max(1, (os.cpu_count() or 2) // 2)
+    try:
+        requested = int(requested)
+    except (TypeError, ValueError):
+        return 1
+    if not duration:
+        return 1
+    return max(1, min(requested, int(duration // MIN_SEGMENT_SECONDS)))
+
+def split_at_keyframes(input_path, segment_count, duration, work_dir, check_if_cancelled_callback):
+    """
+    Ріже відеопотік на сегменти без перекодування. Муксер segment починає кожен сегмент
+    з першого ключового кадру після запитаного часу, тому межі завжди припадають на ключові кадри.
+    Повертає відсортований список шляхів до сегментів.
+    """
+    split_times = ",".join(f"{duration * i / segment_count:.3f}" for i in range(1, segment_count))
+    pattern = os.path.join(work_dir, "seg_%03d.mp4")
+    cmd = [get_ffmpeg_path_for_moviepy_ua(), "-y", "-hide_banner", "-loglevel", "error",
+           "-i", input_path, "-map", "0:v:0", "-an", "-c", "copy",
+           "-f", "segment", "-segment_times", split_times, "-reset_timestamps", "1", pattern]
+    run_ffmpeg_command(cmd, os.path.join(work_dir, "seg_000.mp4"), check_if_cancelled_callback)
+    return sorted(glob.glob(os.path.join(work_dir, "seg_*.mp4")))
+
+def process_audio_track(input_path, audio_path, options, sample_rate, check_if_cancelled_callback):
+    """ Гучність і швидкість "Унік" для всієї аудіодоріжки одним проходом FFmpeg (без масивів у Python). """
+    cmd = [get_ffmpeg_path_for_moviepy_ua(), "-y", "-hide_banner", "-loglevel", "error",
+           "-i", input_path, "-map", "0:a:0", "-vn"]
+    audio_filters = build_audio_filters(options, sample_rate)
+    if audio_filters:
+        cmd += ["-af", ",".join(audio_filters)]
+    cmd += ["-c:a", "aac", audio_path]
+    run_ffmpeg_command(cmd, audio_path, check_if_cancelled_callback)
+
+def concat_segments(segment_paths, audio_path, output_path, work_dir, check_if_cancelled_callback):
+    """ Склеює оброблені сегменти демультиплексором concat без перекодування і додає аудіо. """
+    list_path = os.path.join(work_dir, "concat_list.txt")
+    with open(list_path, "w", encoding="utf-8") as f:
+        for path in segment_paths:
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    cmd = [get_ffmpeg_path_for_moviepy_ua(), "-y", "-hide_banner", "-loglevel", "error",
+           "-f", "concat", "-safe", "0", "-i", list_path]
+    if audio_path:
+        cmd += ["-i", audio_path, "-map", "0:v:0", "-map", "1:a:0"]
+    else:
+        cmd += ["-map", "0:v:0"]
+    cmd += ["-c", "copy", "-movflags", "+faststart", output_path]
+    run_ffmpeg_command(cmd, output_path, check_if_cancelled_callback)
+
+def segment_job_options(options, index):
+    """ Опції для окремого сегмента: без рекурсивного поділу і кешу результатів, власне зерно шуму для кожного сегмента. """
+    segment_options = dict(options)
+    segment_options.pop("segment_parallel", None)
+    segment_options.pop("use_result_cache", None) # Тимчасові сегменти не повинні потрапляти в кеш
+    segment_options.pop("resumable", None)
+    if segment_options.get("noise_seed") is not None:
+        segment_options["noise_seed"] = int(segment_options["noise_seed"]) + index
+    return segment_options
+
+def process_video_task_segmented(input_path, output_folder, options,
+                                 status_callback, progress_callback, check_if_cancelled_callback):
+    """
+    Аналог process_video_task, що кодує сегменти паралельно в пулі процесів.
+    Викидає FfmpegEngineError, якщо поділ неможливий (немає FFmpeg тощо) - тоді викликач обробляє файл звичайно.
+    """
+    from app_logic.batch_processor import BatchJob, run_batch_jobs
+
+    if not probe_ffmpeg_capabilities_ua()["available"]:
+        raise FfmpegEngineError("FFmpeg не знайдено.")
+    try:
+        info = probe_media(input_path)
+    except MediaProbeError as e:
+        raise FfmpegEngineError(f"Не вдалося проаналізувати відео: {e}")
+    segment_count = resolve_segment_count(options.get("segment_parallel"), info.duration)
+    if segment_count < 2:
+        raise FfmpegEngineError("Відео закоротке для поділу на сегменти.")
+
+    work_dir = tempfile.mkdtemp(prefix=".segments_", dir=output_folder)
+    try:
+        status_callback(f"Поділ відео на {segment_count} сегментів по ключових кадрах...")
+        progress_callback(0.02)
+        segment_paths = split_at_keyframes(input_path, segment_count, info.duration, work_dir, check_if_cancelled_callback)
+        if not segment_paths:
+            raise FfmpegEngineError("FFmpeg не створив жодного сегмента.")
+        progress_callback(0.05)
+
+        # Аудіо обробляється паралельно з сегментами в окремому потоці
+        audio_path = os.path.join(work_dir, "audio.m4a") if info.has_audio else None
+        audio_errors = []
+        def _audio_worker():
+            try: process_audio_track(input_path, audio_path, options, info.audio_sample_rate, check_if_cancelled_callback)
+            except Exception as e: audio_errors.append(e)
+        audio_thread = None
+        if audio_path:
+            audio_thread = threading.Thread(target=_audio_worker, daemon=True)
+            audio_thread.start()
+
+        segments_out_dir = os.path.join(work_dir, "out")
+        os.makedirs(segments_out_dir)
+        jobs = [BatchJob(input_path=path, output_folder=segments_out_dir, options=segment_job_options(options, i))
+                for i, path in enumerate(segment_paths)]
+        status_callback(f"Паралельна обробка {len(jobs)} сегментів...")
+        results = run_batch_jobs(
+            jobs, max_workers=len(jobs),
+            batch_progress_callback=lambda value, finished, total: progress_callback(0.05 + 0.85 * value),
+            job_finished_callback=lambda r: status_callback(f"Сегмент {r.index + 1}/{len(jobs)} "
+                                                            + ("готовий." if r.success else f"- помилка: {r.error}")),
+            check_if_cancelled_callback=check_if_cancelled_callback)
+
+        if audio_thread:
+            audio_thread.join()
+        if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано під час обробки сегментів.")
+        failed = [r for r in results if not r.success]
+        if failed:
+            raise FfmpegEngineError(f"Сегмент {failed[0].index + 1} не оброблено: {failed[0].error}")
+        for error in audio_errors:
+            if isinstance(error, ProcessingCancelledError): raise error
+            raise FfmpegEngineError(f"Помилка обробки аудіо: {error}")
+
+        output_size = job_options.compute_output_size(options, info.width, info.height)
+        output_path = job_options.build_output_path(
+            input_path, output_folder, job_options.get_effect_tags(options), output_size)
+        status_callback(f"Склеювання сегментів у: {output_path}")
+        progress_callback(0.92)
+        concat_segments([r.output_path for r in results], audio_path, output_path, work_dir, check_if_cancelled_callback)
+
+        progress_callback(1.0)
+        status_callback(f"Відео успішно збережено: {output_path}")
+        return output_path
+    except ProcessingCancelledError as e:
+        status_callback(str(e) if str(e) else "Обробку скасовано.")
+        return None
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -0,0 +1,310 @@
+# app_logic/shared_queue.py
+# Черга завдань на спільній файловій системі (NFS/SMB) для кількох машин-воркерів.
+# Кожне завдання - JSON-файл; стан задається папкою, а переходи між станами - атомарним os.rename:
+#   pending/<id>.json -> leased/<id>__<воркер>.json -> done/<id>.json або failed/<id>.json
+# Перейменування вдається лише одному воркеру, тому завдання не може взяти двоє. Власник оренди
+# оновлює її час зміни (os.utime) кожні heartbeat_seconds. Якщо оренда не оновлювалася lease_seconds
+# (вузол упав або втратив мережу), будь-який воркер повертає її в pending, а колишній власник,
+# не знайшовши свого файлу оренди, скасовує обробку. SQLite тут не використовується: блокування
+# файлів SQLite на мережевих файлових системах ненадійні.
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+QUEUE_STATES = ("pending", "leased", "done", "failed")
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_HEARTBEAT_SECONDS = 10.0
+DEFAULT_MAX_ATTEMPTS = 3
+_CLOCK_FILE = ".clock"
+
+class LeaseLostError(Exception):
+    """ Оренду завдання забрав інший воркер (вона прострочилася). """
+
+def _write_json_atomic(path, data):
+    tmp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def _read_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}".replace("__", "_")
+
+class SharedJobQueue:
+    """ Операції з чергою в папці root. Усі методи безпечні для одночасного виклику з різних машин. """
+
+    def __init__(self, root, lease_seconds=DEFAULT_LEASE_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.root = os.path.abspath(root)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        for state in QUEUE_STATES:
+            os.makedirs(os.path.join(self.root, state), exist_ok=True)
+
+    def _path(self, state, name):
+        return os.path.join(self.root, state, name)
+
+    def _list(self, state):
+        try:
+            return sorted(name for name in os.listdir(os.path.join(self.root, state)) if name.endswith(".json"))
+        except FileNotFoundError:
+            return []
+
+    def shared_now(self):
+        """
+        Поточний час за годинником файлового сервера: час зміни щойно оновленого службового файлу.
+        Порівнюється з часом зміни оренд, тож розбіжність годинників вузлів не впливає на прострочення.
+        """
+        path = os.path.join(self.root, _CLOCK_FILE)
+        with open(path, "a"):
+            pass
+        os.utime(path)
+        return os.stat(path).st_mtime
+
+    # --- Постановка й стан ---
+
+    def submit(self, input_path, output_folder, options, job_id=None):
+        """ Додає завдання в pending. Ідентифікатор починається з часу, тож воркери беруть старіші першими. """
+        job_id = job_id or f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        job = {"id": job_id, "input": input_path, "output_folder": output_folder, "options": options,
+               "attempts": 0, "submitted": round(time.time(), 3)}
+        # Запис у тимчасовий файл поза pending, щоб воркер не взяв напівзаписане завдання
+        tmp_path = self._path("leased", f".{job_id}.submit.tmp")
+        _write_json_atomic(tmp_path, job)
+        os.rename(tmp_path, self._path("pending", f"{job_id}.json"))
+        return job_id
+
+    def counts(self):
+        return {state: len(self._list(state)) for state in QUEUE_STATES}
+
+    def find(self, job_id):
+        """ (стан, дані завдання) або (None, None). """
+        for state in QUEUE_STATES:
+            for name in self._list(state):
+                if name[:-len(".json")].split("__")[0] == job_id:
+                    try:
+                        return state, _read_json(self._path(state, name))
+                    except (FileNotFoundError, ValueError):
+                        break # Файл саме переходить у інший стан - шукаємо далі
+        return None, None
+
+    # --- Оренди ---
+
+    def lease(self, worker_id):
+        """ Бере найстаріше завдання з pending. Повертає Lease або None, якщо черга порожня. """
+        for name in self._list("pending"):
+            job_id = name[:-len(".json")]
+            pending_path = self._path("pending", name)
+            lease_path = self._path("leased", f"{job_id}__{worker_id}.json")
+            try:
+                # Оренда рахується від моменту взяття, а не від постановки в чергу: rename зберігає час зміни,
+                # тож без цього завдання, що чекало довше за lease_seconds, одразу виглядало б простроченим
+                os.utime(pending_path)
+                os.rename(pending_path, lease_path)
+            except FileNotFoundError:
+                continue # Інший воркер встиг першим
+            try:
+                job = _read_json(lease_path)
+            except (OSError, ValueError) as e:
+                self._move_failed(lease_path, {"id": job_id}, f"Пошкоджений файл завдання: {e}")
+                continue
+            return Lease(self, job, lease_path, worker_id)
+        return None
+
+    def _recover_orphaned_claims(self, now):
+        """ Воркер упав посеред повернення оренди: його тимчасовий файл знову стає простроченою орендою. """
+        folder = os.path.join(self.root, "leased")
+        for name in os.listdir(folder):
+            if not (name.startswith(".") and ".reap-" in name):
+                continue
+            path = os.path.join(folder, name)
+            try:
+                if now - os.stat(path).st_mtime >= self.lease_seconds:
+                    os.rename(path, os.path.join(folder, f"{name[1:].split('.reap-')[0]}__orphaned.json"))
+            except FileNotFoundError:
+                continue
+
+    def requeue_expired(self):
+        """ Повертає прострочені оренди в pending (або у failed після max_attempts). Повертає список id. """
+        now = self.shared_now()
+        self._recover_orphaned_claims(now)
+        requeued = []
+        for name in self._list("leased"):
+            lease_path = self._path("leased", name)
+            try:
+                if now - os.stat(lease_path).st_mtime < self.lease_seconds:
+                    continue
+            except FileNotFoundError:
+                continue
+            job_id = name.split("__")[0]
+            # Спершу атомарно перейменовуємо оренду на себе, щоб її не повертали двоє одночасно
+            claim_path = self._path("leased", f".{job_id}.reap-{uuid.uuid4().hex[:8]}.tmp")
+            try:
+                os.rename(lease_path, claim_path)
+            except FileNotFoundError:
+                continue
+            try:
+                job = _read_json(claim_path)
+            except (OSError, ValueError) as e:
+                self._move_failed(claim_path, {"id": job_id}, f"Пошкоджений файл завдання: {e}")
+                continue
+            job["attempts"] = job.get("attempts", 0) + 1
+            job.setdefault("history", []).append({"worker": name.split("__", 1)[-1][:-len(".json")],
+                                                  "event": "lease_expired", "time": round(time.time(), 3)})
+            if job["attempts"] >= self.max_attempts:
+                self._move_failed(claim_path, job, f"Оренда прострочилася {job['attempts']} раз(и): воркери аварійно завершуються на цьому завданні.")
+            else:
+                _write_json_atomic(claim_path, job)
+                os.rename(claim_path, self._path("pending", f"{job_id}.json"))
+            requeued.append(job_id)
+        return requeued
+
+    def _move_failed(self, path, job, error):
+        job = dict(job, error=error, finished=round(time.time(), 3))
+        _write_json_atomic(path, job)
+        os.rename(path, self._path("failed", f"{job['id']}.json"))
+
+class Lease:
+    """ Завдання, взяте воркером. Методи finish/release переводять його в кінцевий стан або назад у pending. """
+
+    def __init__(self, queue, job, path, worker_id):
+        self.queue = queue
+        self.job = job
+        self.path = path
+        self.worker_id = worker_id
+        self.lost = threading.Event()
+
+    def heartbeat(self):
+        """ Оновлює час оренди. Якщо файлу немає - оренду забрали: встановлює lost. """
+        try:
+            os.utime(self.path)
+        except FileNotFoundError:
+            self.lost.set()
+        return not self.lost.is_set()
+
+    def _finish(self, state, **fields):
+        if not self.heartbeat():
+            raise LeaseLostError(f"Оренду завдання {self.job['id']} втрачено.")
+        job = dict(self.job, worker=self.worker_id, finished=round(time.time(), 3), **fields)
+        _write_json_atomic(self.path, job)
+        try:
+            os.rename(self.path, self.queue._path(state, f"{job['id']}.json"))
+        except FileNotFoundError:
+            raise LeaseLostError(f"Оренду завдання {self.job['id']} втрачено.")
+
+    def complete(self, output_path, elapsed):
+        self._finish("done", output=output_path, elapsed=round(elapsed, 3))
+
+    def fail(self, error, elapsed):
+        self._finish("failed", error=error, elapsed=round(elapsed, 3))
+
+    def release(self):
+        """ Повертає завдання в pending без збільшення лічильника спроб (зупинка воркера). """
+        try:
+            os.rename(self.path, self.queue._path("pending", f"{self.job['id']}.json"))
+        except FileNotFoundError:
+            pass
+
+class _Heartbeat:
+    """ Фоновий потік, що оновлює оренду, поки виконується process_video_task. """
+
+    def __init__(self, lease, interval):
+        self.lease = lease
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="lease-heartbeat", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if not self.lease.heartbeat():
+                return
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def run_queue_worker(root, worker_id=None, stop_event=None, event_callback=None, exit_when_empty=False,
+                     poll_interval=2.0, lease_seconds=DEFAULT_LEASE_SECONDS,
+                     heartbeat_seconds=DEFAULT_HEARTBEAT_SECONDS, max_attempts=DEFAULT_MAX_ATTEMPTS, job_runner=None):
+    """
+    Цикл воркера: повертає прострочені оренди, бере завдання, виконує process_video_task з пульсом оренди.
+    event_callback(event, **fields): "leased", "status", "progress", "result", "lease_lost", "requeued".
+    Працює до stop_event (або до порожньої черги з exit_when_empty). Повертає (успішно, з помилкою).
+    job_runner - функція з сигнатурою process_video_task (за замовчуванням вона сама).
+    """
+    if job_runner is None:
+        from app_logic.video_processor import process_video_task as job_runner # MoviePy потрібен лише воркеру
+
+    queue = SharedJobQueue(root, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    heartbeat_seconds = min(heartbeat_seconds, lease_seconds / 3.0) # Кілька пульсів за час оренди
+    worker_id = worker_id or default_worker_id()
+    stop_event = stop_event or threading.Event()
+    emit = event_callback or (lambda event, **fields: None)
+    succeeded = failed = 0
+    while not stop_event.is_set():
+        requeued = queue.requeue_expired()
+        if requeued:
+            emit("requeued", jobs=requeued)
+        lease = queue.lease(worker_id)
+        if lease is None:
+            if exit_when_empty and not queue.counts()["leased"]:
+                break
+            stop_event.wait(poll_interval)
+            continue
+
+        job = lease.job
+        emit("leased", job=job["id"], input=job["input"], worker=worker_id, attempt=job.get("attempts", 0) + 1)
+        last_status = [""]
+        def _status(message):
+            last_status[0] = message
+            emit("status", job=job["id"], message=message)
+        def _progress(value, details=None):
+            emit("progress", job=job["id"], value=value, details=details)
+        def _cancelled():
+            return stop_event.is_set() or lease.lost.is_set()
+
+        started = time.monotonic()
+        output_path = None
+        error = ""
+        with _Heartbeat(lease, heartbeat_seconds):
+            try:
+                os.makedirs(job["output_folder"], exist_ok=True)
+                output_path = job_runner(job["input"], job["output_folder"], job.get("options") or {},
+                                         _status, _progress, _cancelled)
+                if not output_path:
+                    error = last_status[0] or "Не вдалося обробити відео."
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+        elapsed = time.monotonic() - started
+
+        if lease.lost.is_set():
+            emit("lease_lost", job=job["id"], worker=worker_id)
+            continue
+        if stop_event.is_set() and not output_path:
+            lease.release() # Перервано зупинкою воркера - інший воркер візьме завдання з початку
+            emit("result", job=job["id"], success=False, error="Перервано зупинкою воркера.", requeued=True)
+            break
+        try:
+            if output_path:
+                lease.complete(output_path, elapsed)
+                succeeded += 1
+            else:
+                lease.fail(error, elapsed)
+                failed += 1
+        except LeaseLostError:
+            emit("lease_lost", job=job["id"], worker=worker_id)
+            continue
+        emit("result", job=job["id"], input=job["input"], output=output_path, success=bool(output_path),
+             error=error, elapsed=round(elapsed, 3), worker=worker_id)
+    return succeeded, failed
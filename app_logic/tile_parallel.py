@@ -0,0 +1,95 @@
+# app_logic/tile_parallel.py
+# Паралельна обробка кадру горизонтальними смугами: попіксельні етапи (Ч/Б, таблиця гамми/контрасту, шум)
+# виконуються для кожної смуги в постійному пулі потоків. Поле шуму генерується один раз на кадр у потоці
+# виклику (послідовність випадкових чисел не змінюється), а кожна смуга бере з нього свої рядки,
+# тому результат побітово збігається з однопотоковою обробкою. NumPy і OpenCV звільняють GIL на великих масивах.
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ENCODER_THREADS = 4 # -threads кодувальника libx264 у рушіях (MoviePy, FFmpeg, канали)
+MIN_STRIPE_ROWS = 64 # Менші смуги не окупають передачу завдання в пул
+
+def resolve_tile_workers(value, encoder_threads=ENCODER_THREADS):
+    """
+    Кількість потоків для смуг з options['tile_parallel']: "auto"/True - ядра мінус потоки кодувальника,
+    число - саме стільки; None/False/0/1 - без розпаралелювання.
+    """
+    if value in (None, False, 0, 1, "0", "1", ""):
+        return 1
+    if value is True or value == "auto":
+        return max(1, (os.cpu_count() or 1) - encoder_threads)
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+class StripePool:
+    """ Постійний пул потоків, що виконує функцію для кожної смуги рядків кадру. """
+
+    def __init__(self, workers):
+        self.workers = max(1, int(workers))
+        # Перша смуга виконується в потоці виклику, тому в пулі на один потік менше
+        self._executor = ThreadPoolExecutor(max_workers=self.workers - 1, thread_name_prefix="stripe") if self.workers > 1 else None
+
+    def stripes(self, height):
+        count = max(1, min(self.workers, height // MIN_STRIPE_ROWS))
+        bounds = [height * i // count for i in range(count + 1)]
+        return [slice(bounds[i], bounds[i + 1]) for i in range(count)]
+
+    def run(self, height, func):
+        """ Викликає func(rows) для кожної смуги і чекає на всі; помилка будь-якої смуги викидається тут. """
+        stripes = self.stripes(height)
+        if self._executor is None or len(stripes) == 1:
+            for rows in stripes:
+                func(rows)
+            return
+        futures = [self._executor.submit(func, rows) for rows in stripes[1:]]
+        try:
+            func(stripes[0])
+        finally:
+            for future in futures:
+                future.result()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_stripe_pool(workers):
+    """ Спільний пул на процес для заданої кількості потоків (потоки не створюються заново для кожного завдання). """
+    workers = max(1, int(workers))
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = _pools[workers] = StripePool(workers)
+        return pool
+
+def stripe_pool_from_options(options):
+    """ StripePool для options['tile_parallel'] або None, якщо смуги не потрібні. """
+    workers = resolve_tile_workers(options.get("tile_parallel"))
+    return get_stripe_pool(workers) if workers > 1 else None
+
+def apply_color_and_noise(src, out, color_stage, noise, pool):
+    """
+    out = шум(колір(src)) смугами в пулі. src і out - кадри однакового розміру (out може бути тим самим буфером).
+    color_stage і noise можуть бути None; без обох етапів src копіюється в out.
+    """
+    color_active = color_stage is not None and color_stage.active
+    if color_active:
+        color_stage.prepare(src.shape) # Буфери Ч/Б виділяються для всього кадру до поділу на смуги
+    noise_field = noise.next_noise(src.shape) if noise else None # Один виклик ГВЧ на кадр, як без смуг
+
+    def _stripe(rows):
+        stripe = src[rows]
+        if color_active:
+            stripe = color_stage.apply(stripe, out[rows], rows)
+        if noise_field is not None:
+            noise.add(stripe, noise_field, out[rows], rows)
+        elif not color_active and out is not src:
+            out[rows] = stripe
+
+    pool.run(src.shape[0], _stripe)
+    return out
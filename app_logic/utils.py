@@ -1,8 +1,14 @@
 # utils.py
+import functools
+import json
 import os
+import shutil
+import subprocess
 import sys
 from pathlib import Path
 
+APP_DATA_DIR_NAME = "VideoUniqualizerUA" # Назва папки даних користувача (кеші, бази завдань)
+
 def get_user_data_dir_ua(app_name):
     """ Отримує шлях до папки даних користувача для програми. """
     if sys.platform == "win32":
@@ -27,4 +33,98 @@ def get_ffmpeg_path_for_moviepy_ua():
         for path in potential_paths:
             if path.exists():
                 return str(path.resolve())
-    return 'ffmpeg'
\ No newline at end of file
+    return 'ffmpeg'
+
+def get_ffprobe_path_ua():
+    """ Шукає FFprobe поруч із FFmpeg, який знаходить get_ffmpeg_path_for_moviepy_ua. """
+    ffmpeg_path = Path(get_ffmpeg_path_for_moviepy_ua())
+    if ffmpeg_path.is_absolute():
+        candidate = ffmpeg_path.with_name(ffmpeg_path.name.replace('ffmpeg', 'ffprobe'))
+        if candidate.exists():
+            return str(candidate)
+    return 'ffprobe'
+
+def get_subprocess_kwargs_ua():
+    """ Додаткові аргументи для subprocess, щоб на Windows не з'являлося вікно консолі. """
+    if sys.platform == "win32":
+        return {"creationflags": subprocess.CREATE_NO_WINDOW}
+    return {}
+
+FFMPEG_CAPABILITIES_CACHE_NAME = "ffmpeg_capabilities.json"
+
+def _ffmpeg_binary_key(ffmpeg_path):
+    """ Ключ кешу можливостей: реальний шлях, розмір і час зміни виконуваного файлу FFmpeg (None, якщо не знайдено). """
+    resolved = ffmpeg_path if os.path.isabs(ffmpeg_path) else shutil.which(ffmpeg_path)
+    if not resolved:
+        return None
+    try:
+        resolved = os.path.realpath(resolved)
+        st = os.stat(resolved)
+        bundle_dir = getattr(sys, '_MEIPASS', None)
+        if getattr(sys, 'frozen', False) and bundle_dir and resolved.startswith(os.path.realpath(bundle_dir) + os.sep):
+            # Збірка onefile щоразу розпаковується в нову тимчасову папку: ключ - сам виконуваний файл програми
+            exe_st = os.stat(sys.executable)
+            return f"bundle:{os.path.relpath(resolved, os.path.realpath(bundle_dir))}|{st.st_size}|{sys.executable}|{exe_st.st_mtime_ns}"
+    except OSError:
+        return None
+    return f"{resolved}|{st.st_size}|{st.st_mtime_ns}"
+
+def _capabilities_cache_path():
+    return os.path.join(get_user_data_dir_ua(APP_DATA_DIR_NAME), FFMPEG_CAPABILITIES_CACHE_NAME)
+
+def _load_cached_capabilities(binary_key):
+    try:
+        with open(_capabilities_cache_path(), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        return None
+    cached = entries.get(binary_key) if isinstance(entries, dict) else None
+    return cached if isinstance(cached, dict) and cached.get("available") else None
+
+def _save_cached_capabilities(binary_key, capabilities):
+    cache_path = _capabilities_cache_path()
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        # Один запис: після оновлення FFmpeg старий ключ більше не потрібен
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({binary_key: capabilities}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass # Кеш - лише оптимізація, помилка запису не повинна зривати роботу
+
+@functools.lru_cache(maxsize=None)
+def probe_ffmpeg_capabilities_ua(ffmpeg_path=None):
+    """
+    Перевіряє, чи доступний FFmpeg, і які кодувальники він підтримує.
+    Повертає словник {"available", "version", "encoders"}.
+    Результат зберігається між запусками в папці даних користувача і перевіряється повторно,
+    лише якщо змінився виконуваний файл FFmpeg (шлях, розмір або час зміни).
+    """
+    ffmpeg_path = ffmpeg_path or get_ffmpeg_path_for_moviepy_ua()
+    binary_key = _ffmpeg_binary_key(ffmpeg_path)
+    if binary_key:
+        cached = _load_cached_capabilities(binary_key)
+        if cached:
+            return cached
+    capabilities = {"available": False, "version": "", "encoders": []}
+    try:
+        version_out = subprocess.run([ffmpeg_path, "-hide_banner", "-version"], capture_output=True,
+                                     text=True, timeout=15, **get_subprocess_kwargs_ua())
+        encoders_out = subprocess.run([ffmpeg_path, "-hide_banner", "-encoders"], capture_output=True,
+                                      text=True, timeout=15, **get_subprocess_kwargs_ua())
+    except (OSError, subprocess.SubprocessError):
+        return capabilities
+    if version_out.returncode != 0:
+        return capabilities
+    capabilities["available"] = True
+    capabilities["version"] = version_out.stdout.splitlines()[0] if version_out.stdout else ""
+    encoders = []
+    for line in encoders_out.stdout.splitlines():
+        parts = line.split()
+        # Рядки кодувальників мають вигляд " V....D libx264   опис"
+        if len(parts) >= 2 and len(parts[0]) == 6 and parts[0][0] in "VAS":
+            encoders.append(parts[1])
+    capabilities["encoders"] = encoders
+    if binary_key:
+        _save_cached_capabilities(binary_key, capabilities)
+    return capabilities
@@ -0,0 +1,128 @@
+# app_logic/variants.py
+# Кілька унікалізованих варіантів одного відео за одне декодування: для кожного варіанта параметри "Унік"
+# (обрізка, гамма, контраст, шум, гучність, швидкість) і зерно шуму вибираються випадково з налаштовуваних
+# діапазонів, а всі варіанти кодуються одним викликом FFmpeg через fanout.encode_branches.
+# Кожен файл отримує тег vNN у назві та JSON-файл поруч із використаними параметрами.
+import json
+import os
+import random
+
+from app_logic import job_options
+from app_logic.encode_progress import ENCODE_PROGRESS_START
+from app_logic.fanout import encode_branches
+from app_logic.ffmpeg_backend import FfmpegEngineError
+from app_logic.media_probe import MediaProbeError, probe_media
+from app_logic.utils import probe_ffmpeg_capabilities_ua
+from app_logic.video_processor import ProcessingCancelledError, process_video_task
+
+# Діапазони (мінімум, максимум) для вибору параметрів варіанта; цілі межі дають цілі значення
+VARIANT_PARAM_RANGES = {
+    "crop_px": (1, 4),
+    "gamma": (0.97, 1.06),
+    "contrast": (1, 5),
+    "noise_sigma": (0.8, 2.2),
+    "volume": (0.97, 1.04),
+    "speed": (0.985, 1.0),
+}
+
+def get_variant_ranges(options):
+    """ Діапазони з урахуванням перевизначень у options['variant_ranges']. """
+    ranges = dict(VARIANT_PARAM_RANGES)
+    for name, bounds in (options.get("variant_ranges") or {}).items():
+        ranges[name] = tuple(bounds)
+    return ranges
+
+def sample_variant_params(rng, ranges):
+    params = {}
+    for name, (low, high) in ranges.items():
+        if isinstance(low, int) and isinstance(high, int):
+            params[name] = rng.randint(low, high)
+        else:
+            params[name] = round(rng.uniform(low, high), 4)
+    return params
+
+def build_variant_options(options, count=None):
+    """
+    Список опцій для кожного варіанта. options['variant_seed'] робить вибір відтворюваним;
+    options['variant_count'] - кількість варіантів (якщо count не передано).
+    """
+    count = int(count or options.get("variant_count") or 0)
+    rng = random.Random(options.get("variant_seed"))
+    ranges = get_variant_ranges(options)
+    base = {k: v for k, v in options.items() if k not in ("variant_count", "variant_seed", "variant_ranges")}
+    variants = []
+    for _ in range(count):
+        variant = dict(base)
+        variant["uniek_filter_active"] = True
+        uniek_params = dict(base.get("uniek_params") or {})
+        uniek_params.update(sample_variant_params(rng, ranges))
+        variant["uniek_params"] = uniek_params
+        variant["noise_seed"] = rng.randrange(2 ** 31)
+        variants.append(variant)
+    return variants
+
+def variant_output_path(input_path, output_folder, options, index, info):
+    tags = job_options.get_effect_tags(options) + [f"v{index + 1:02d}"]
+    output_size = job_options.compute_output_size(options, info.width, info.height)
+    return job_options.build_output_path(input_path, output_folder, tags, output_size)
+
+def write_variant_sidecar(output_path, input_path, index, options):
+    """ <результат>.json з параметрами варіанта (для відтворення або аудиту). """
+    sidecar_path = os.path.splitext(output_path)[0] + ".json"
+    data = {
+        "source": os.path.abspath(input_path),
+        "output": os.path.abspath(output_path),
+        "variant": index + 1,
+        "uniek_params": job_options.get_uniek_params(options),
+        "noise_seed": options.get("noise_seed"),
+        "options": {k: v for k, v in options.items() if k not in ("uniek_params", "noise_seed")},
+    }
+    with open(sidecar_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return sidecar_path
+
+def process_variants_task(input_path, output_folder, options,
+                          status_callback, progress_callback, check_if_cancelled_callback):
+    """
+    Створює options['variant_count'] варіантів за одне декодування. Повертає список шляхів або None.
+    Без FFmpeg варіанти обробляються по черзі звичайним process_video_task.
+    """
+    variants = build_variant_options(options)
+    if not variants:
+        status_callback("Помилка: Кількість варіантів має бути більшою за 0.")
+        return None
+    try:
+        status_callback(f"Аналіз відео: {os.path.basename(input_path)}")
+        progress_callback(0.05)
+        try:
+            info = probe_media(input_path)
+        except MediaProbeError as e:
+            status_callback(f"Помилка: Не вдалося проаналізувати відео: {e}")
+            return None
+        output_paths = [variant_output_path(input_path, output_folder, variant, i, info)
+                        for i, variant in enumerate(variants)]
+
+        if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед кодуванням.")
+        if probe_ffmpeg_capabilities_ua()["available"]:
+            status_callback(f"Кодування {len(variants)} варіантів 'Унік' за одне декодування...")
+            progress_callback(ENCODE_PROGRESS_START)
+            encode_branches(input_path, output_paths, variants, info, progress_callback, check_if_cancelled_callback)
+        else:
+            status_callback("FFmpeg недоступний, варіанти обробляються по черзі...")
+            for index, variant in enumerate(variants):
+                def _variant_progress(value, details=None, index=index):
+                    progress_callback((index + value) / len(variants), details)
+                produced = process_video_task(input_path, output_folder, variant,
+                                              status_callback, _variant_progress, check_if_cancelled_callback)
+                if not produced:
+                    return None
+                os.replace(produced, output_paths[index]) # Додаємо тег vNN до назви
+
+        for index, (variant, output_path) in enumerate(zip(variants, output_paths)):
+            write_variant_sidecar(output_path, input_path, index, variant)
+        progress_callback(1.0)
+        status_callback("Варіанти збережено: " + ", ".join(os.path.basename(p) for p in output_paths))
+        return output_paths
+    except (ProcessingCancelledError, FfmpegEngineError) as e:
+        status_callback(str(e) if str(e) else "Обробку скасовано.")
+        return None
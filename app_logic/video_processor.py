@@ -1,30 +1,163 @@
 # app_logic/video_processor.py
-from moviepy.editor import VideoFileClip
-from moviepy.video.fx import all as vfx 
-from moviepy.audio.fx import all as afx 
-import numpy as np 
+# MoviePy, NumPy і OpenCV імпортуються лише в рушії MoviePy (_process_video_task_moviepy): імпорт цього модуля
+# (PROCESSING_ENGINES, ProcessingCancelledError) не повинен уповільнювати запуск GUI та CLI.
 import os
 import time 
 
+from app_logic import job_options
+from app_logic.encode_progress import ENCODE_PROGRESS_START, EncodeProgress
+from app_logic.profiling import NULL_PROFILER, profile_base_name, profiler_from_options
+
 class ProcessingCancelledError(Exception):
     pass
 
+# Доступні рушії обробки: "moviepy" - ланцюжок fx MoviePy (стандартний), "ffmpeg" - один filtergraph FFmpeg,
+# "fused" - декодування/кодування MoviePy з одним злитим покадровим конвеєром замість ланцюжка fx,
+# "opencv" - те саме, але конвеєр на OpenCV виконує також зміну розміру та поворот на довільний кут,
+# "pipes" - той самий конвеєр між каналами декодера й кодувальника FFmpeg без MoviePy (див. raw_pipes.py)
+PROCESSING_ENGINES = ("moviepy", "ffmpeg", "fused", "opencv", "pipes")
+
 def process_video_task(input_path, output_folder, options, 
                        status_callback, progress_callback, check_if_cancelled_callback):
+    """
+    Обробляє відео згідно з options. Рушій обирається ключем options['engine'];
+    якщо рушій FFmpeg недоступний або завершився з помилкою, використовується MoviePy.
+    options['segment_parallel'] (кількість сегментів або "auto") вмикає паралельне кодування сегментів.
+    options['fanout_presets'] (список назв пресетів) кодує всі пресети за одне декодування і повертає список шляхів.
+    options['variant_count'] створює стільки варіантів "Унік" (див. variants.py) і також повертає список шляхів.
+    options['use_result_cache'] повертає раніше створений результат для того самого вмісту файлу й тих самих опцій
+    (див. result_cache.py) замість повторної обробки.
+    options['memory_budget_mb'] вмикає потоковий режим (рушій "pipes") з обмеженою кількістю кадрів у пам'яті.
+    options['resumable'] кодує сегментами зі станом у job_store.py: повторний запуск після збою продовжує з готових сегментів.
+    progress_callback(value_0_to_1, details=None): під час кодування details - словник
+    {"frames_done", "total_frames", "fps", "eta", "elapsed"} (див. encode_progress.EncodeProgress).
+    """
+    if not input_path or not os.path.exists(input_path):
+        status_callback("Помилка: Вхідний файл не знайдено.")
+        return None 
+    if not output_folder or not os.path.isdir(output_folder):
+        status_callback("Помилка: Папку для збереження не знайдено або вказано невірний шлях.")
+        return None
+
+    profiler = profiler_from_options(options, os.path.basename(input_path))
+    output_path = None
     try:
-        if not input_path or not os.path.exists(input_path):
-            status_callback("Помилка: Вхідний файл не знайдено.")
-            return None 
-        if not output_folder or not os.path.isdir(output_folder):
-            status_callback("Помилка: Папку для збереження не знайдено або вказано невірний шлях.")
-            return None
+        with profiler.span("process_video_task", engine=options.get("engine", "moviepy")):
+            def _produce():
+                return _run_engine(input_path, output_folder, options,
+                                   status_callback, progress_callback, check_if_cancelled_callback, profiler)
+            if options.get("use_result_cache") and not options.get("fanout_presets") and not options.get("variant_count"):
+                from app_logic.result_cache import get_default_result_cache
+                output_path = get_default_result_cache().run(input_path, output_folder, options, status_callback,
+                                                             progress_callback, check_if_cancelled_callback, _produce)
+            else:
+                output_path = _produce()
+        return output_path
+    except ProcessingCancelledError as e:
+        status_callback(str(e) if str(e) else "Обробку скасовано.")
+        return None
+    except Exception as e:
+        # Як і раніше, виклик повертає шлях або None: помилки рушіїв, кешу чи файлової системи лише повідомляються
+        status_callback(f"Загальна помилка обробки відео в `process_video_task`: {type(e).__name__} - {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
+    finally:
+        if profiler.enabled:
+            _export_profile(profiler, options, input_path, status_callback if output_path else None)
+
+def _export_profile(profiler, options, input_path, status_callback=None):
+    """
+    Профіль зберігається навіть після помилки чи скасування - саме тоді він часто найпотрібніший.
+    Після невдачі статус не надсилається, щоб останнім лишилося повідомлення про помилку.
+    """
+    try:
+        trace_path = profiler.export(options["profile_dir"], profile_base_name(input_path))
+        if status_callback: status_callback(f"Профіль обробки збережено: {trace_path}")
+    except OSError as e:
+        if status_callback: status_callback(f"Не вдалося зберегти профіль обробки: {e}")
+
+def _run_engine(input_path, output_folder, options,
+                status_callback, progress_callback, check_if_cancelled_callback, profiler):
+    if options.get("variant_count"):
+        # N варіантів "Унік" з випадковими параметрами за одне декодування; повертається список шляхів
+        from app_logic.variants import process_variants_task
+        return process_variants_task(input_path, output_folder, options,
+                                     status_callback, progress_callback, check_if_cancelled_callback)
+    if options.get("fanout_presets"):
+        # Кілька пресетів за одне декодування; повертається список шляхів
+        from app_logic.fanout import process_fanout_task
+        return process_fanout_task(input_path, output_folder, options,
+                                   status_callback, progress_callback, check_if_cancelled_callback)
+
+    if options.get("resumable"):
+        # Сегменти кодуються в окремі файли зі станом у job_store; після збою готові сегменти не переробляються
+        from app_logic.ffmpeg_backend import FfmpegEngineError
+        from app_logic.resumable_encode import process_video_task_resumable
+        try:
+            return process_video_task_resumable(input_path, output_folder, options,
+                                                status_callback, progress_callback, check_if_cancelled_callback)
+        except FfmpegEngineError as e:
+            status_callback(f"Обробка з відновленням недоступна ({e}). Звичайна обробка...")
+        options = {k: v for k, v in options.items() if k not in ("resumable", "segment_parallel")}
+
+    if options.get("segment_parallel"):
+        # Довге відео ділиться на сегменти по ключових кадрах, які кодуються паралельно
+        from app_logic.ffmpeg_backend import FfmpegEngineError
+        from app_logic.segment_parallel import process_video_task_segmented
+        try:
+            return process_video_task_segmented(input_path, output_folder, options,
+                                                status_callback, progress_callback, check_if_cancelled_callback)
+        except FfmpegEngineError as e:
+            status_callback(f"Паралельна обробка сегментами недоступна ({e}). Звичайна обробка...")
+        options = {k: v for k, v in options.items() if k != "segment_parallel"}
 
+    engine = options.get("engine", "moviepy")
+    if options.get("memory_budget_mb") and engine not in ("ffmpeg", "pipes"):
+        # Потоковий режим: фіксована кількість кадрів у пам'яті, аудіо обробляє FFmpeg без масивів у Python
+        status_callback(f"Бюджет пам'яті {options['memory_budget_mb']} МБ: потокова обробка через канали FFmpeg.")
+        engine = "pipes"
+    if engine == "ffmpeg":
+        from app_logic.ffmpeg_backend import FfmpegEngineError, process_video_task_ffmpeg
+        try:
+            return process_video_task_ffmpeg(input_path, output_folder, options,
+                                             status_callback, progress_callback, check_if_cancelled_callback,
+                                             profiler=profiler)
+        except FfmpegEngineError as e:
+            status_callback(f"Рушій FFmpeg недоступний ({e}). Перехід на MoviePy...")
+    elif engine == "pipes":
+        from app_logic.ffmpeg_backend import FfmpegEngineError
+        from app_logic.raw_pipes import process_video_task_pipes
+        try:
+            return process_video_task_pipes(input_path, output_folder, options,
+                                            status_callback, progress_callback, check_if_cancelled_callback,
+                                            profiler=profiler)
+        except FfmpegEngineError as e:
+            status_callback(f"Рушій каналів FFmpeg недоступний ({e}). Перехід на MoviePy...")
+    elif engine not in PROCESSING_ENGINES:
+        status_callback(f"Невідомий рушій обробки '{engine}', використовується MoviePy.")
+
+    return _process_video_task_moviepy(input_path, output_folder, options,
+                                       status_callback, progress_callback, check_if_cancelled_callback, profiler)
+
+def _process_video_task_moviepy(input_path, output_folder, options,
+                                status_callback, progress_callback, check_if_cancelled_callback, profiler=NULL_PROFILER):
+    from moviepy.editor import VideoFileClip # moviepy.editor також додає кліпам методи resize, rotate, crop, speedx
+    from moviepy.video.fx import all as vfx
+    from moviepy.audio.fx import all as afx
+    from app_logic.color_lut import ColorStage, build_color_lut
+    from app_logic.frame_pipeline import compile_frame_pipeline
+    from app_logic.noise import NoiseGenerator
+    from app_logic.opencv_pipeline import compile_opencv_pipeline
+    try:
         status_callback(f"Завантаження відео: {os.path.basename(input_path)}")
         progress_callback(0.05) 
 
         if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано користувачем перед завантаженням кліпу.")
 
-        clip = VideoFileClip(input_path)
+        with profiler.span("load_clip"):
+            clip = VideoFileClip(input_path)
+        profiler.instrument_clip(clip, "decode")
         processed_clip = clip 
         
         original_clip_for_info = clip # Зберігаємо посилання на оригінальний кліп для інформації
@@ -40,13 +173,20 @@ def process_video_task(input_path, output_folder, options,
         if options.get("flip_h_active"): num_major_steps +=1          # ! Враховуємо дзеркало H
         if options.get("flip_v_active"): num_major_steps +=1          # ! Враховуємо дзеркало V
         
-        available_progress_for_ops = 0.85 # Залишаємо 0.05 на завантаження і 0.1 на збереження
+        available_progress_for_ops = ENCODE_PROGRESS_START - 0.05 # Решта шкали - покадрове кодування
         progress_step = available_progress_for_ops / num_major_steps if num_major_steps > 0 else 0
 
         active_effects_tags = [] # Для назви файлу
 
+        # Рушій "opencv": увесь покадровий ланцюжок, включно зі зміною розміру, виконує OpenCVFramePipeline
+        opencv_pipeline = None
+        if options.get("engine") == "opencv":
+            opencv_pipeline = compile_opencv_pipeline(options)
+            if opencv_pipeline is None:
+                status_callback("OpenCV не встановлено, використовується ланцюжок MoviePy.")
+
         # --- Зміна роздільної здатності ---
-        if options.get("resize_active"):
+        if options.get("resize_active") and not opencv_pipeline:
             status_callback("Застосування зміни роздільної здатності...")
             # ... (код для resize залишається майже без змін, додаємо перевірку скасування) ...
             try:
@@ -57,7 +197,7 @@ def process_video_task(input_path, output_folder, options,
                     width = int(width_str); height = int(height_str)
                     if width > 0 and height > 0:
                         if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано під час зміни розміру.")
-                        processed_clip = processed_clip.resize(newsize=(width, height))
+                        processed_clip = profiler.instrument_clip(processed_clip.resize(newsize=(width, height)), "resize")
                         status_callback(f"Роздільну здатність змінено на {width}x{height}")
                     else: status_callback("Помилка: Ширина та висота > 0.")
             except ValueError: status_callback("Помилка: Некоректні значення для ширини/висоти.")
@@ -67,33 +207,57 @@ def process_video_task(input_path, output_folder, options,
 
         # --- ! Нові трансформації: Поворот та Дзеркало ---
         rotation_angle = options.get("rotation_angle", 0)
-        if rotation_angle != 0:
+
+        # --- Злитий покадровий конвеєр (рушії "fused" і "opencv") ---
+        fused_pipeline = None
+        if opencv_pipeline:
+            if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед покадровим конвеєром.")
+            status_callback("Застосування покадрового конвеєра OpenCV (розмір, поворот, дзеркала, Ч/Б, 'Унік')...")
+            fused_pipeline = opencv_pipeline
+            processed_clip = profiler.instrument_clip(processed_clip.fl_image(fused_pipeline), "opencv_pipeline")
+            fused_tags = [tag for tag in job_options.get_effect_tags(options) if tag != "uniek"]
+            active_effects_tags.extend(fused_tags)
+            fused_steps = len(fused_tags) + (1 if options.get("resize_active") else 0)
+            current_progress += progress_step * fused_steps; progress_callback(current_progress)
+        elif options.get("engine") == "fused":
+            fused_pipeline = compile_frame_pipeline(options)
+            if fused_pipeline is None:
+                status_callback(f"Поворот на {rotation_angle}° не підтримується покадровим конвеєром, використовується ланцюжок MoviePy.")
+            else:
+                if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед покадровим конвеєром.")
+                status_callback("Застосування злитого покадрового конвеєра (поворот, дзеркала, Ч/Б, 'Унік')...")
+                processed_clip = profiler.instrument_clip(processed_clip.fl_image(fused_pipeline), "fused_pipeline")
+                fused_tags = [tag for tag in job_options.get_effect_tags(options) if tag != "uniek"]
+                active_effects_tags.extend(fused_tags)
+                current_progress += progress_step * len(fused_tags); progress_callback(current_progress)
+
+        if rotation_angle != 0 and not fused_pipeline:
             if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед поворотом.")
             status_callback(f"Застосування повороту на {rotation_angle}°...")
             try:
-                processed_clip = processed_clip.rotate(rotation_angle, expand=True) # expand=True щоб уникнути обрізки, але розмір може змінитися
+                processed_clip = profiler.instrument_clip(processed_clip.rotate(rotation_angle, expand=True), "rotate") # expand=True щоб уникнути обрізки, але розмір може змінитися
                 status_callback(f"Поворот на {rotation_angle}° застосовано.")
                 active_effects_tags.append(f"rot{rotation_angle}")
             except ProcessingCancelledError: raise
             except Exception as e: status_callback(f"Помилка при повороті: {str(e)}")
             current_progress += progress_step; progress_callback(current_progress)
 
-        if options.get("flip_h_active"):
+        if options.get("flip_h_active") and not fused_pipeline:
             if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед горизонтальним дзеркалом.")
             status_callback("Застосування горизонтального дзеркального відображення...")
             try:
-                processed_clip = processed_clip.fx(vfx.mirror_x)
+                processed_clip = profiler.instrument_clip(processed_clip.fx(vfx.mirror_x), "mirror_x")
                 status_callback("Горизонтальне дзеркало застосовано.")
                 active_effects_tags.append("fliph")
             except ProcessingCancelledError: raise
             except Exception as e: status_callback(f"Помилка горизонтального дзеркала: {str(e)}")
             current_progress += progress_step; progress_callback(current_progress)
 
-        if options.get("flip_v_active"):
+        if options.get("flip_v_active") and not fused_pipeline:
             if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед вертикальним дзеркалом.")
             status_callback("Застосування вертикального дзеркального відображення...")
             try:
-                processed_clip = processed_clip.fx(vfx.mirror_y)
+                processed_clip = profiler.instrument_clip(processed_clip.fx(vfx.mirror_y), "mirror_y")
                 status_callback("Вертикальне дзеркало застосовано.")
                 active_effects_tags.append("flipv")
             except ProcessingCancelledError: raise
@@ -102,11 +266,11 @@ def process_video_task(input_path, output_folder, options,
         # --- Кінець нових трансформацій ---
 
         # --- Чорно-білий фільтр ---
-        if options.get("bw_filter_active"):
+        if options.get("bw_filter_active") and not fused_pipeline:
             if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед Ч/Б фільтром.")
             status_callback("Застосування чорно-білого фільтру...")
             try:
-                processed_clip = processed_clip.fx(vfx.blackwhite)
+                processed_clip = profiler.instrument_clip(processed_clip.fl_image(ColorStage(bw=True)), "blackwhite") # Те саме, що vfx.blackwhite, у буферах, що повторно використовуються
                 status_callback("Чорно-білий фільтр застосовано.")
                 active_effects_tags.append("bw") # Додаємо тег до назви файлу
             except ProcessingCancelledError: raise
@@ -116,114 +280,78 @@ def process_video_task(input_path, output_folder, options,
         # --- Комплекс фільтрів "Унік" ---
         if options.get("uniek_filter_active"):
             status_callback("Застосування комплексу 'Унік' фільтрів...")
+            uniek_params = job_options.get_uniek_params(options)
             uniek_filters_count = 6 
             uniek_progress_sub_step = progress_step / uniek_filters_count if uniek_filters_count > 0 and progress_step > 0 else 0.01 # Маленький крок, якщо progress_step=0
 
-            # 1. Обрізка
-            if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано в 'Унік': Обрізка")
-            try:
-                status_callback("Унік (1/6): Незначна обрізка...")
-                h_orig, w_orig = processed_clip.h, processed_clip.w; crop_px = 2
-                if w_orig > crop_px*2 and h_orig > crop_px*2: 
-                    processed_clip = processed_clip.crop(x1=crop_px,y1=crop_px,width=w_orig-crop_px*2,height=h_orig-crop_px*2)
-                else: status_callback("Унік (1/6): Обрізку пропущено (замалий розмір).")
-            except Exception as e: status_callback(f"Унік (1/6) Помилка обрізки: {e}")
-            current_progress += uniek_progress_sub_step; progress_callback(min(current_progress, 0.9))
+            if fused_pipeline:
+                status_callback("Унік (1-4/6): Обрізка, гамма, контраст і шум виконуються покадровим конвеєром.")
+                current_progress += uniek_progress_sub_step * 4; progress_callback(min(current_progress, ENCODE_PROGRESS_START))
+            else:
+                # 1. Обрізка
+                if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано в 'Унік': Обрізка")
+                try:
+                    status_callback("Унік (1/6): Незначна обрізка...")
+                    h_orig, w_orig = processed_clip.h, processed_clip.w; crop_px = uniek_params["crop_px"]
+                    if w_orig > crop_px*2 and h_orig > crop_px*2: 
+                        processed_clip = profiler.instrument_clip(processed_clip.crop(x1=crop_px,y1=crop_px,width=w_orig-crop_px*2,height=h_orig-crop_px*2), "uniek_crop")
+                    else: status_callback("Унік (1/6): Обрізку пропущено (замалий розмір).")
+                except Exception as e: status_callback(f"Унік (1/6) Помилка обрізки: {e}")
+                current_progress += uniek_progress_sub_step; progress_callback(min(current_progress, ENCODE_PROGRESS_START))
 
 
-            # 2. Гамма-корекція
-            if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано в 'Унік': Гамма")
-            try:
-                status_callback("Унік (2/6): Гамма-корекція...")
-                processed_clip = processed_clip.fx(vfx.gamma_corr, 1.03)
-            except Exception as e: status_callback(f"Унік (2/6) Помилка гамма-корекції: {e}")
-            current_progress += uniek_progress_sub_step; progress_callback(min(current_progress, 0.9))
+                # 2-3. Гамма-корекція та контрастність: одна таблиця LUT замість vfx.gamma_corr і vfx.lum_contrast
+                if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано в 'Унік': Гамма/Контраст")
+                try:
+                    status_callback("Унік (2-3/6): Гамма-корекція та регулювання контрастності (LUT)...")
+                    color_lut = build_color_lut(gamma=uniek_params["gamma"], contrast=uniek_params["contrast"])
+                    processed_clip = profiler.instrument_clip(processed_clip.fl_image(ColorStage(lut=color_lut)), "uniek_gamma_contrast")
+                except Exception as e: status_callback(f"Унік (2-3/6) Помилка гамма-корекції/контрасту: {e}")
+                current_progress += uniek_progress_sub_step * 2; progress_callback(min(current_progress, ENCODE_PROGRESS_START))
 
-            # 3. Контрастність
-            if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано в 'Унік': Контраст")
-            try:
-                status_callback("Унік (3/6): Регулювання контрастності...")
-                processed_clip = processed_clip.fx(vfx.lum_contrast, lum=0, contrast=3)
-            except Exception as e: status_callback(f"Унік (3/6) Помилка контрасту: {e}")
-            current_progress += uniek_progress_sub_step; progress_callback(min(current_progress, 0.9))
+                # 4. Шум
+                if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано в 'Унік': Шум")
+                try:
+                    status_callback("Унік (4/6): Додавання легкого шуму...")
+                    processed_clip = profiler.instrument_clip(processed_clip.fl_image(NoiseGenerator.from_options(options)), "uniek_noise")
+                except Exception as e: status_callback(f"Унік (4/6) Помилка додавання шуму: {e}")
+                current_progress += uniek_progress_sub_step; progress_callback(min(current_progress, ENCODE_PROGRESS_START))
 
-            # 4. Шум
-            if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано в 'Унік': Шум")
-            try:
-                status_callback("Унік (4/6): Додавання легкого шуму...")
-                def add_subtle_noise(frame):
-                    gauss = np.random.normal(0, 1.5, frame.shape) 
-                    noisy_frame = np.clip(frame.astype(np.int16) + gauss, 0, 255).astype(np.uint8)
-                    return noisy_frame
-                processed_clip = processed_clip.fl_image(add_subtle_noise)
-            except Exception as e: status_callback(f"Унік (4/6) Помилка додавання шуму: {e}")
-            current_progress += uniek_progress_sub_step; progress_callback(min(current_progress, 0.9))
-            
             # 5. Гучність аудіо
             if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано в 'Унік': Гучність аудіо")
             if processed_clip.audio:
                 try:
                     status_callback("Унік (5/6): Зміна гучності аудіо...")
-                    processed_clip.audio = processed_clip.audio.fx(afx.volumex, 1.02)
+                    processed_clip.audio = processed_clip.audio.fx(afx.volumex, uniek_params["volume"])
                 except Exception as e: status_callback(f"Унік (5/6) Помилка зміни гучності: {e}")
             else: status_callback("Унік (5/6): Аудіо відсутнє, пропуск зміни гучності.")
-            current_progress += uniek_progress_sub_step; progress_callback(min(current_progress, 0.9))
+            current_progress += uniek_progress_sub_step; progress_callback(min(current_progress, ENCODE_PROGRESS_START))
 
             # 6. Швидкість відео
             if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано в 'Унік': Швидкість")
             try:
                 status_callback("Унік (6/6): Зміна швидкості відео...")
-                processed_clip = processed_clip.speedx(0.995) 
+                processed_clip = profiler.instrument_clip(processed_clip.speedx(uniek_params["speed"]), "uniek_speed")
             except Exception as e: status_callback(f"Унік (6/6) Помилка зміни швидкості: {e}")
-            current_progress = min(current_progress + uniek_progress_sub_step, 0.9) # Завершуємо прогрес для "Унік"
+            current_progress = min(current_progress + uniek_progress_sub_step, ENCODE_PROGRESS_START) # Завершуємо прогрес для "Унік"
             progress_callback(current_progress) 
             
             active_effects_tags.append("uniek") # Додаємо тег "uniek" до назви
             status_callback("Комплекс 'Унік' фільтрів застосовано.")
         
         # --- Формування назви файлу ---
-        base_name_original, ext = os.path.splitext(os.path.basename(input_path))
-        output_parts = [base_name_original]
-        
-        if active_effects_tags: # Якщо є хоч якісь теги ефектів
-            output_parts.append("-".join(active_effects_tags))
-        
-        size_tag = "originalSize" # За замовчуванням, якщо розмір не змінився або не відомий
-        if hasattr(processed_clip, 'size') and processed_clip.size:
-            final_width, final_height = processed_clip.size
-            size_tag = f"{final_width}x{final_height}"
-            # Якщо зміна розміру була активна, але фінальний розмір не відповідає бажаному,
-            # це може бути через expand=True при повороті. Додамо позначку.
-            if options.get("resize_active"):
-                 if str(final_width) != options.get("width","") or str(final_height) != options.get("height",""):
-                     if not any(tag.startswith("rot") for tag in active_effects_tags): # Не додаємо, якщо це через поворот
-                        pass # Можна додати позначку, що розмір змінився не точно
-            elif original_clip_for_info.size[0] == final_width and original_clip_for_info.size[1] == final_height :
-                 pass # Розмір не змінився відносно оригіналу, тег size_tag вже коректний
-        
-        output_parts.append(size_tag)
-            
-        output_file_name_base = "_".join(output_parts)
-        # Прибираємо подвійні підкреслення, якщо вони утворилися
-        output_file_name_base = output_file_name_base.replace("__", "_")
-        if output_file_name_base.endswith("_"): output_file_name_base = output_file_name_base[:-1]
-        if output_file_name_base.startswith("_"): output_file_name_base = output_file_name_base[1:]
-
-
-        output_file_name = f"{output_file_name_base}{ext}"
-        output_path = os.path.join(output_folder, output_file_name)
+        final_size = processed_clip.size if hasattr(processed_clip, 'size') and processed_clip.size else None
+        output_path = job_options.build_output_path(input_path, output_folder, active_effects_tags, final_size)
 
         status_callback(f"Збереження відео в: {output_path}")
-        progress_callback(0.9) 
+        progress_callback(ENCODE_PROGRESS_START) 
 
         if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано перед збереженням файлу.")
 
-        processed_clip.write_videofile(output_path, codec="libx264", audio_codec="aac", threads=4, logger=None)
+        with profiler.span("write"):
+            _write_clip_with_progress(processed_clip, output_path, status_callback, progress_callback,
+                                      check_if_cancelled_callback, profiler)
 
-        if check_if_cancelled_callback(): 
-            raise ProcessingCancelledError("Скасовано після запису файлу.")
-
-        progress_callback(1.0) 
         status_callback(f"Відео успішно збережено: {output_path}")
         return output_path 
 
@@ -246,4 +374,51 @@ def process_video_task(input_path, output_folder, options,
            ('original_clip_for_info' not in locals() or processed_clip != original_clip_for_info) and \
            hasattr(processed_clip, 'close'):
             try: processed_clip.close()
-            except Exception: pass
\ No newline at end of file
+            except Exception: pass
+
+def _remove_file_quietly(path):
+    try:
+        if path and os.path.exists(path): os.remove(path)
+    except OSError:
+        pass
+
+def _write_clip_with_progress(clip, output_path, status_callback, progress_callback, check_if_cancelled_callback,
+                              profiler=NULL_PROFILER):
+    """
+    Замінник clip.write_videofile з тими ж налаштуваннями (libx264, aac, 4 потоки), але з покадровим записом:
+    скасування перевіряється кожні кілька кадрів, кодувальник зупиняється одразу, частковий файл видаляється,
+    а progress_callback отримує реальну кількість кадрів, fps та орієнтовний залишок часу.
+    """
+    from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+    fps = clip.fps
+    audio_path = None
+    writer = None
+    completed = False
+    try:
+        if clip.audio:
+            # Як і write_videofile, спочатку записуємо аудіо у тимчасовий файл, який FFmpeg копіює у вихідний
+            status_callback("Підготовка аудіодоріжки...")
+            audio_path = os.path.splitext(output_path)[0] + "_TEMP_audio.m4a"
+            with profiler.span("audio"):
+                clip.audio.write_audiofile(audio_path, fps=44100, nbytes=4, codec="aac", logger=None)
+            if check_if_cancelled_callback(): raise ProcessingCancelledError("Скасовано під час підготовки аудіо.")
+
+        tracker = EncodeProgress(int(clip.duration * fps), progress_callback, check_if_cancelled_callback)
+        writer = FFMPEG_VideoWriter(output_path, clip.size, fps, codec="libx264", audiofile=audio_path, threads=4)
+        for frames_done, frame in enumerate(clip.iter_frames(fps=fps, dtype="uint8"), start=1):
+            with profiler.span("encode", "frame"):
+                writer.write_frame(frame)
+            if tracker.update(frames_done):
+                raise ProcessingCancelledError(f"Скасовано під час кодування (кадр {frames_done} з {tracker.total_frames}).")
+        writer.close()
+        writer = None
+        tracker.finish()
+        completed = True
+    finally:
+        if writer is not None and writer.proc:
+            writer.proc.kill() # Не чекаємо, поки кодувальник дочитає буфер
+            writer.proc.wait()
+        _remove_file_quietly(audio_path)
+        if not completed:
+            _remove_file_quietly(output_path)
@@ -0,0 +1,303 @@
+# app_logic/watch_folder.py
+# Режим демона: стежить за вхідною папкою, чекає, доки файл перестане змінюватися (копіювання завершено),
+# обробляє його process_video_task у пулі процесів і переносить оригінал у папку done або failed.
+# Черга очікування обмежена: коли вона заповнена, нові файли просто лишаються у вхідній папці до звільнення місця.
+# Журнал (JSONL) фіксує кожен файл; після перезапуску вже оброблені файли не обробляються вдруге,
+# а перервані (started без результату) запускаються знову.
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from multiprocessing.managers import SyncManager
+
+from app_logic.batch_processor import BatchJob, BatchJobResult, _init_worker, _run_batch_job, default_worker_count
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".mkv", ".webm", ".m4v")
+# Тимчасові файли менеджерів завантаження та копіювання - не обробляються, доки їх не перейменують
+PARTIAL_SUFFIXES = (".part", ".tmp", ".crdownload", ".partial", ".filepart")
+LEDGER_FILE_NAME = ".watch_ledger.jsonl"
+
+@dataclass
+class WatchConfig:
+    inbox: str
+    output_folder: str
+    options: dict = field(default_factory=dict)
+    done_folder: str = None # За замовчуванням <inbox>/done
+    failed_folder: str = None # За замовчуванням <inbox>/failed
+    ledger_path: str = None # За замовчуванням <inbox>/.watch_ledger.jsonl
+    workers: int = 0 # 0 - default_worker_count()
+    queue_size: int = 16
+    poll_interval: float = 1.0
+    stable_seconds: float = 5.0
+    extensions: tuple = VIDEO_EXTENSIONS
+
+    def __post_init__(self):
+        self.inbox = os.path.abspath(self.inbox)
+        if os.path.abspath(self.output_folder) == self.inbox:
+            raise ValueError("Папка результатів не може збігатися з вхідною: результати оброблялися б знову.")
+        self.done_folder = self.done_folder or os.path.join(self.inbox, "done")
+        self.failed_folder = self.failed_folder or os.path.join(self.inbox, "failed")
+        self.ledger_path = self.ledger_path or os.path.join(self.inbox, LEDGER_FILE_NAME)
+        self.workers = self.workers or default_worker_count()
+
+def file_key(path, st=None):
+    """ Ідентичність файлу для журналу: назва, розмір і час зміни (зберігаються при перенесенні в done). """
+    st = st or os.stat(path)
+    return f"{os.path.basename(path)}|{st.st_size}|{st.st_mtime_ns}"
+
+class WatchLedger:
+    """
+    Журнал JSONL з дописуванням: {"key", "path", "status": started|done|failed, ...} на кожну подію.
+    Останній запис для ключа визначає стан. Кожен запис одразу скидається на диск (fsync).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.states = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue # Обірваний останній рядок після аварійного завершення
+                    self.states[record["key"]] = record
+        self._file = open(path, "a", encoding="utf-8")
+
+    def status(self, key):
+        record = self.states.get(key)
+        return record["status"] if record else None
+
+    def record(self, key, path, status, **fields):
+        record = {"key": key, "path": path, "status": status, "time": round(time.time(), 3)}
+        record.update(fields)
+        self.states[key] = record
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        return record
+
+    def close(self):
+        self._file.close()
+
+def _unique_destination(folder, name):
+    """ Шлях у folder, що не перезаписує наявний файл (name, name_1, name_2...). """
+    base, ext = os.path.splitext(name)
+    candidate = os.path.join(folder, name)
+    counter = 1
+    while os.path.exists(candidate):
+        candidate = os.path.join(folder, f"{base}_{counter}{ext}")
+        counter += 1
+    return candidate
+
+class StabilityTracker:
+    """ Файл вважається готовим, якщо його розмір і час зміни не змінювалися stable_seconds. """
+
+    def __init__(self, stable_seconds):
+        self.stable_seconds = stable_seconds
+        self._seen = {} # шлях -> (розмір, mtime_ns, час першого спостереження цього стану)
+
+    def check(self, path, st, now):
+        state = (st.st_size, st.st_mtime_ns)
+        seen = self._seen.get(path)
+        if seen is None or seen[:2] != state:
+            self._seen[path] = state + (now,)
+            return False
+        return st.st_size > 0 and now - seen[2] >= self.stable_seconds
+
+    def forget(self, path):
+        self._seen.pop(path, None)
+
+    def prune(self, existing_paths):
+        for path in list(self._seen):
+            if path not in existing_paths:
+                del self._seen[path]
+
+class WatchFolderDaemon:
+    """
+    Цикл: сканування папки -> обмежена черга -> пул процесів -> перенесення в done/failed.
+    Колбеки (усі в потоці run()): event_callback(event, **fields) з подіями
+    "queued", "skipped", "status", "progress", "result", "error".
+    """
+
+    def __init__(self, config, event_callback=None, stop_event=None, job_runner=None):
+        self.config = config
+        self.job_runner = job_runner or _run_batch_job # Функція воркера, як у batch_processor.run_batch_jobs
+        self.emit = event_callback or (lambda event, **fields: None)
+        self.stop_event = stop_event or threading.Event()
+        self.pending = deque() # Обмежена черга: (ключ, шлях), не більше config.queue_size
+        self.in_flight = {} # future -> (ключ, шлях, номер завдання, чи виконується окремо)
+        self.suspects = deque() # (ключ, шлях) завдань, що виконувалися під час аварії воркера: повтор по одному
+        self.queued_paths = set()
+        self.stability = StabilityTracker(config.stable_seconds)
+        self.processed = 0
+        self.failed = 0
+        self._next_index = 0
+
+    def _is_candidate(self, name):
+        lower = name.lower()
+        return (not name.startswith(".") and lower.endswith(tuple(self.config.extensions))
+                and not lower.endswith(PARTIAL_SUFFIXES))
+
+    def scan(self, ledger):
+        """ Додає до черги стабільні нові файли, поки в ній є місце (інакше файли чекають у папці). """
+        now = time.monotonic()
+        existing = set()
+        try:
+            entries = list(os.scandir(self.config.inbox))
+        except OSError as e:
+            self.emit("error", message=f"Не вдалося прочитати папку {self.config.inbox}: {e}")
+            return
+        for entry in sorted(entries, key=lambda e: e.name):
+            if not entry.is_file() or not self._is_candidate(entry.name):
+                continue
+            path = entry.path
+            existing.add(path)
+            if path in self.queued_paths:
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            if not self.stability.check(path, st, now):
+                continue
+            if len(self.pending) >= self.config.queue_size:
+                break # Зворотний тиск: решта файлів почекає наступного сканування
+            key = file_key(path, st)
+            if ledger.status(key) in ("done", "failed"):
+                # Уже оброблено до перезапуску (файл не встигли перенести) - лише переносимо
+                self._move(path, self.config.done_folder if ledger.status(key) == "done" else self.config.failed_folder)
+                self.emit("skipped", input=path, reason=f"вже {ledger.status(key)} за журналом")
+                continue
+            self.pending.append((key, path))
+            self.queued_paths.add(path)
+            self.emit("queued", input=path, queue=len(self.pending))
+        self.stability.prune(existing)
+
+    def _move(self, path, folder):
+        os.makedirs(folder, exist_ok=True)
+        destination = _unique_destination(folder, os.path.basename(path))
+        try:
+            shutil.move(path, destination)
+        except OSError as e:
+            self.emit("error", message=f"Не вдалося перенести {path} у {folder}: {e}")
+            return None
+        self.stability.forget(path)
+        return destination
+
+    def _submit_one(self, pool, ledger, event_queue, cancel_event, key, path, isolated):
+        index = self._next_index
+        self._next_index += 1
+        ledger.record(key, path, "started")
+        job = BatchJob(input_path=path, output_folder=self.config.output_folder, options=dict(self.config.options))
+        future = pool.submit(self.job_runner, index, job, event_queue, cancel_event)
+        self.in_flight[future] = (key, path, index, isolated)
+
+    def _submit(self, pool, ledger, event_queue, cancel_event):
+        if self.suspects or any(isolated for _, _, _, isolated in self.in_flight.values()):
+            # Після аварії воркера підозрілі файли виконуються по одному, без сусідів у пулі
+            if self.suspects and not self.in_flight:
+                key, path = self.suspects.popleft()
+                self._submit_one(pool, ledger, event_queue, cancel_event, key, path, isolated=True)
+            return
+        while self.pending and len(self.in_flight) < self.config.workers:
+            key, path = self.pending.popleft()
+            self._submit_one(pool, ledger, event_queue, cancel_event, key, path, isolated=self.config.workers == 1)
+
+    def _finish(self, ledger, key, path, result):
+        self.queued_paths.discard(path)
+        if self.stop_event.is_set() and not result.success:
+            # Скасовано зупинкою демона: файл лишається у вхідній папці й буде оброблений після перезапуску
+            self.emit("result", job=result.index, input=path, success=False, error="Перервано зупинкою.", requeued=True)
+            return
+        if result.success:
+            ledger.record(key, path, "done", output=result.output_path, elapsed=round(result.elapsed, 3))
+            moved_to = self._move(path, self.config.done_folder)
+            self.processed += 1
+        else:
+            ledger.record(key, path, "failed", error=result.error)
+            moved_to = self._move(path, self.config.failed_folder)
+            self.failed += 1
+        self.emit("result", job=result.index, input=path, output=result.output_path, success=result.success,
+                  error=result.error, elapsed=round(result.elapsed, 3), moved_to=moved_to)
+
+    def _drain_events(self, event_queue):
+        while True:
+            try: index, kind, payload = event_queue.get_nowait()
+            except queue.Empty: return
+            if kind == "status":
+                self.emit("status", job=index, message=payload)
+            elif kind == "progress":
+                value, details = payload
+                self.emit("progress", job=index, value=value, details=details)
+
+    def run(self):
+        """ Працює, доки не встановлено stop_event. Повертає (оброблено, з помилкою). """
+        config = self.config
+        for folder in (config.output_folder, config.done_folder, config.failed_folder):
+            os.makedirs(folder, exist_ok=True)
+        ledger = WatchLedger(config.ledger_path)
+        ctx = multiprocessing.get_context("spawn")
+        manager = SyncManager(ctx=ctx)
+        manager.start(_init_worker)
+        try:
+            event_queue = manager.Queue()
+            cancel_event = manager.Event()
+            pool = ProcessPoolExecutor(max_workers=config.workers, mp_context=ctx, initializer=_init_worker)
+            next_scan = 0.0
+            try:
+                while not self.stop_event.is_set():
+                    if time.monotonic() >= next_scan:
+                        self.scan(ledger)
+                        next_scan = time.monotonic() + config.poll_interval
+                    self._submit(pool, ledger, event_queue, cancel_event)
+                    if self.in_flight:
+                        done, _ = wait(list(self.in_flight), timeout=0.2, return_when=FIRST_COMPLETED)
+                    else:
+                        done = []
+                        self.stop_event.wait(0.2)
+                    self._drain_events(event_queue)
+                    broken = False
+                    for future in done:
+                        key, path, index, isolated = self.in_flight.pop(future)
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool:
+                            broken = True
+                            if not isolated and not self.stop_event.is_set():
+                                # Невідомо, чий процес упав: у журналі лишається started, файл повториться окремо
+                                self.suspects.append((key, path))
+                                self.emit("status", job=index, input=path, message="Процес-воркер аварійно завершився, "
+                                          "файл буде оброблено повторно окремо.")
+                                continue
+                            result = BatchJobResult(index=index, input_path=path,
+                                                    error="Процес-воркер аварійно завершився під час обробки.")
+                        except Exception as e:
+                            result = BatchJobResult(index=index, input_path=path, error=f"{type(e).__name__}: {e}")
+                        self._finish(ledger, key, path, result)
+                    if broken:
+                        pool.shutdown(wait=False, cancel_futures=True)
+                        pool = ProcessPoolExecutor(max_workers=config.workers, mp_context=ctx, initializer=_init_worker)
+                # Зупинка: запущені завдання скасовуються, їхні файли лишаються у вхідній папці
+                cancel_event.set()
+                for future, (key, path, index, _) in list(self.in_flight.items()):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = BatchJobResult(index=index, input_path=path, error=f"{type(e).__name__}: {e}")
+                    self._finish(ledger, key, path, result)
+                self.in_flight.clear()
+                self._drain_events(event_queue)
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+        finally:
+            manager.shutdown()
+            ledger.close()
+        return self.processed, self.failed
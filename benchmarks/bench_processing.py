@@ -0,0 +1,234 @@
+# benchmarks/bench_processing.py
+# Бенчмарк process_video_task на синтетичних відео: кожен пресет PRESET_SETTINGS та кожна окрема опція
+# (зміна розміру, поворот, дзеркала, Ч/Б, "Унік") для кожного рушія, роздільної здатності та тривалості.
+# Кожен запуск виконується в окремому процесі, щоб пікова пам'ять (RSS) не змішувалася між сценаріями.
+#
+# Приклади:
+#   python benchmarks/bench_processing.py --resolutions 480p,1080p --durations 2,10 -o baseline.json
+#   python benchmarks/bench_processing.py --scenarios bw,uniek --compare baseline.json --threshold 0.15
+#   python benchmarks/bench_processing.py --engines moviepy,fused,opencv,pipes --scenarios resize,rot90,rot15,uniek
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# --- Додавання шляхів ---
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+if str(Path(__file__).resolve().parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+# --- Кінець додавання шляхів ---
+
+try:
+    import resource # Немає на Windows: тоді пікова пам'ять не вимірюється
+except ImportError:
+    resource = None
+
+from app_logic import job_options
+from app_logic.utils import probe_ffmpeg_capabilities_ua
+from synthetic_media import RESOLUTIONS, get_clip
+
+def build_scenarios():
+    """ Назва сценарію -> перевизначення опцій (поверх DEFAULT_OPTIONS або пресету). """
+    scenarios = {"baseline": {}}
+    for preset_name in job_options.PRESET_SETTINGS:
+        scenarios[f"preset_{preset_name}"] = {"preset": preset_name}
+    scenarios.update({
+        "resize": {"resize_active": True, "width": "1280", "height": "720"},
+        "rot90": {"rotation_angle": 90},
+        "rot180": {"rotation_angle": 180},
+        "rot15": {"rotation_angle": 15}, # Довільний кут: PIL у MoviePy, warpAffine у рушії "opencv"
+        "fliph": {"flip_h_active": True},
+        "flipv": {"flip_v_active": True},
+        "bw": {"bw_filter_active": True},
+        "uniek": {"uniek_filter_active": True, "noise_seed": 0},
+    })
+    return scenarios
+
+def _peak_rss_mb(who):
+    """ Пікова пам'ять процесу (RUSAGE_SELF) або його дочірніх процесів, напр. FFmpeg (RUSAGE_CHILDREN). """
+    if resource is None:
+        return None
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux повідомляє кілобайти, macOS - байти
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+def _run_one(input_path, output_folder, options, connection):
+    """ Виконується в дочірньому процесі: одна обробка, результат надсилається через Pipe. """
+    from app_logic.video_processor import process_video_task
+
+    last_status = [""]
+    def _status(message): last_status[0] = message
+    started = time.perf_counter()
+    output_path = process_video_task(input_path, output_folder, options, _status, lambda value, details=None: None, lambda: False)
+    wall_time = time.perf_counter() - started
+    connection.send({
+        "success": bool(output_path),
+        "error": "" if output_path else last_status[0],
+        "wall_time": wall_time,
+        "output_bytes": os.path.getsize(output_path) if output_path else None,
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+        "ffmpeg_peak_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+    })
+    connection.close()
+
+def run_case(input_path, options, timeout=None):
+    """ Запускає одну обробку в окремому процесі (spawn) і повертає словник вимірювань. """
+    ctx = multiprocessing.get_context("spawn")
+    output_folder = tempfile.mkdtemp(prefix="bench_out_")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_run_one, args=(input_path, output_folder, options, child_conn))
+    try:
+        process.start()
+        child_conn.close()
+        if not parent_conn.poll(timeout):
+            process.kill()
+            return {"success": False, "error": "Перевищено час очікування."}
+        return parent_conn.recv()
+    except EOFError:
+        return {"success": False, "error": "Дочірній процес аварійно завершився."}
+    finally:
+        process.join()
+        shutil.rmtree(output_folder, ignore_errors=True)
+
+def collect_metadata():
+    import numpy
+    try:
+        import moviepy
+        moviepy_version = moviepy.__version__
+    except ImportError:
+        moviepy_version = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "moviepy": moviepy_version,
+        "ffmpeg": probe_ffmpeg_capabilities_ua()["version"],
+    }
+
+def result_key(result):
+    return (result["scenario"], result["resolution"], result["duration"], result["engine"])
+
+def run_benchmarks(resolutions, durations, engines, scenario_names, repeat=1, media_dir=None, timeout=None, log=print):
+    scenarios = build_scenarios()
+    results = []
+    for resolution in resolutions:
+        for duration in durations:
+            input_path = get_clip(resolution, duration, media_dir=media_dir)
+            source_frames = int(round(duration * 25))
+            for engine in engines:
+                for name in scenario_names:
+                    overrides = dict(scenarios[name])
+                    preset_name = overrides.pop("preset", None)
+                    overrides["engine"] = engine
+                    options = job_options.resolve_options(preset_name, overrides)
+                    # При кількох повторах береться найшвидший запуск (найменший вплив фонових процесів)
+                    runs = [run_case(input_path, options, timeout=timeout) for _ in range(max(1, repeat))]
+                    ok_runs = [r for r in runs if r.get("success")]
+                    best = min(ok_runs, key=lambda r: r["wall_time"]) if ok_runs else runs[0]
+                    record = {
+                        "scenario": name, "resolution": resolution, "duration": duration, "engine": engine,
+                        "source_frames": source_frames, "options": options, "repeat": len(runs),
+                        "fps": round(source_frames / best["wall_time"], 2) if best.get("success") else None,
+                    }
+                    record.update(best)
+                    results.append(record)
+                    log(f"{name:<28} {resolution:>6} {duration:>5g}s {engine:<8} "
+                        + (f"{best['wall_time']:8.2f}s {record['fps']:8.1f} fps  RSS {best.get('peak_rss_mb')} MB"
+                           if best.get("success") else f"ПОМИЛКА: {best.get('error')}"))
+    return results
+
+def compare_results(current, baseline, threshold):
+    """
+    Порівнює результати з базовими за ключем (сценарій, роздільна здатність, тривалість, рушій).
+    Регресія - час або пікова пам'ять зросли більш ніж на threshold (частка), або сценарій перестав працювати.
+    """
+    baseline_by_key = {result_key(r): r for r in baseline.get("results", [])}
+    rows, regressions = [], []
+    for result in current:
+        base = baseline_by_key.get(result_key(result))
+        if not base:
+            continue
+        row = {"key": result_key(result), "problems": []}
+        if base.get("success") and not result.get("success"):
+            row["problems"].append("перестав працювати")
+        for metric in ("wall_time", "peak_rss_mb"):
+            old, new = base.get(metric), result.get(metric)
+            if old and new:
+                change = (new - old) / old
+                row[metric] = (old, new, change)
+                if change > threshold:
+                    row["problems"].append(f"{metric} +{change:.1%}")
+        rows.append(row)
+        if row["problems"]:
+            regressions.append(row)
+    return rows, regressions
+
+def print_comparison(rows, threshold, log=print):
+    log(f"\nПорівняння з базовими результатами (поріг {threshold:.0%}):")
+    for row in rows:
+        name = " ".join(str(part) for part in row["key"])
+        wall = row.get("wall_time")
+        wall_text = f"{wall[0]:.2f}s -> {wall[1]:.2f}s ({wall[2]:+.1%})" if wall else "-"
+        status = "РЕГРЕСІЯ: " + ", ".join(row["problems"]) if row["problems"] else "ок"
+        log(f"  {name:<45} {wall_text:<32} {status}")
+
+def _csv(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def build_arg_parser():
+    scenario_names = list(build_scenarios())
+    parser = argparse.ArgumentParser(description="Бенчмарк обробки відео на синтетичних кліпах.")
+    parser.add_argument("--resolutions", type=_csv, default=["480p", "1080p"],
+                        help=f"Через кому: {', '.join(RESOLUTIONS)} (за замовчуванням 480p,1080p)")
+    parser.add_argument("--durations", type=lambda v: [float(x) for x in _csv(v)], default=[2.0, 10.0],
+                        help="Тривалості кліпів у секундах, через кому")
+    parser.add_argument("--engines", type=_csv, default=["moviepy"], help="Рушії обробки, через кому")
+    parser.add_argument("--scenarios", type=_csv, default=scenario_names,
+                        help=f"Сценарії, через кому: {', '.join(scenario_names)}")
+    parser.add_argument("--repeat", type=int, default=1, help="Повторів кожного сценарію (береться найкращий)")
+    parser.add_argument("--timeout", type=float, default=None, help="Обмеження часу одного запуску, с")
+    parser.add_argument("--media-dir", help="Папка для синтетичних кліпів (кешуються між запусками)")
+    parser.add_argument("-o", "--output", help="Зберегти результати у JSON-файл")
+    parser.add_argument("--compare", metavar="BASELINE_JSON", help="Порівняти з попередньо збереженими результатами")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Допустиме погіршення для --compare (0.10 = 10%%)")
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in build_scenarios()]
+    unknown += [name for name in args.resolutions if name not in RESOLUTIONS]
+    if unknown:
+        print(f"Невідомі сценарії або роздільні здатності: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    results = run_benchmarks(args.resolutions, args.durations, args.engines, args.scenarios,
+                             repeat=args.repeat, media_dir=args.media_dir, timeout=args.timeout)
+    report = {"meta": collect_metadata(), "results": results}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результати збережено: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows, regressions = compare_results(results, baseline, args.threshold)
+        print_comparison(rows, args.threshold)
+        if regressions:
+            print(f"Знайдено регресій: {len(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
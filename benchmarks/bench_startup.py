@@ -0,0 +1,184 @@
+# benchmarks/bench_startup.py
+# Бенчмарк запуску: час до першого вікна GUI (процес main.py-подібного скрипта до першого циклу подій
+# після MainWindow.show()), час запуску CLI (cli.py --help) і вартість імпорту кожного модуля точки входу
+# за python -X importtime. Кожне вимірювання - новий процес інтерпретатора, береться медіана повторів.
+# Без PySide6 час до першого вікна пропускається. Для GUI без дисплея типово QT_QPA_PLATFORM=offscreen.
+#
+# Приклади:
+#   python benchmarks/bench_startup.py --repeat 5 -o startup.json
+#   python benchmarks/bench_startup.py --modules app_logic.cli,moviepy.editor --top 15
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# --- Додавання шляхів ---
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+# --- Кінець додавання шляхів ---
+
+DEFAULT_MODULES = ("ui.main_window", "app_logic.cli", "app_logic.video_processor", "app_logic.media_probe",
+                   "app_logic.preview", "app_logic.batch_processor", "moviepy.editor")
+
+# Скрипт дочірнього процесу: друкує JSON-рядок, щойно цикл подій обробив першу подію після показу вікна
+_FIRST_WINDOW_SCRIPT = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QTimer
+from ui.main_window import MainWindow
+t_imports = time.perf_counter()
+app = QApplication(sys.argv)
+window = MainWindow()
+window.show()
+t_shown = time.perf_counter()
+def _first_event():
+    heavy = [name for name in ("moviepy", "imageio", "numpy", "cv2", "PIL") if name in sys.modules]
+    print(json.dumps({{"imports": t_imports - t0, "window": t_shown - t_imports,
+                      "event_loop": time.perf_counter() - t_shown, "heavy_modules": heavy}}), flush=True)
+    app.quit()
+QTimer.singleShot(0, _first_event)
+app.exec()
+"""
+
+def _child_env():
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    return env
+
+def measure_first_window(timeout=60):
+    """ Повертає словник часів одного запуску (wall - від створення процесу до першої події вікна) або None без PySide6. """
+    cmd = [sys.executable, "-c", _FIRST_WINDOW_SCRIPT.format(root=str(project_root))]
+    start = time.perf_counter()
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                            cwd=str(project_root), env=_child_env())
+    try:
+        line = proc.stdout.readline()
+        wall = time.perf_counter() - start
+        proc.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        return None
+    if not line.strip():
+        return None
+    record = json.loads(line)
+    record["wall"] = wall
+    return record
+
+def measure_cli_help():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, str(project_root / "cli.py"), "--help"], stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, cwd=str(project_root), env=_child_env(), check=False)
+    return time.perf_counter() - start
+
+def parse_importtime(stderr_text):
+    """ Рядки 'import time: self | cumulative | name' -> список (name, self_us, cumulative_us, depth). """
+    entries = []
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        self_us, cumulative_us, name = parts
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return entries
+
+def _importtime(code):
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, cwd=str(project_root), env=_child_env())
+
+_startup_names = None
+
+def _interpreter_startup_names():
+    """ Модулі, які інтерпретатор імпортує ще до коду (site, .pth-файли): їх не зараховуємо модулю. """
+    global _startup_names
+    if _startup_names is None:
+        _startup_names = {name for name, _, _, _ in parse_importtime(_importtime("pass").stderr)}
+    return _startup_names
+
+def measure_module_import(module, top=10):
+    """ Вартість імпорту модуля в новому процесі: загальна (мс) і найважчі сторонні пакети верхнього рівня. """
+    result = _importtime(f"import {module}")
+    startup = _interpreter_startup_names()
+    entries = [entry for entry in parse_importtime(result.stderr) if entry[0] not in startup]
+    if result.returncode != 0:
+        last_line = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "помилка імпорту"
+        return {"module": module, "error": last_line}
+    total_us = sum(self_us for _, self_us, _, _ in entries)
+    own_root = module.split(".")[0]
+    packages = {}
+    for name, _, cumulative_us, _ in entries:
+        root = name.split(".")[0]
+        if root in (own_root, "app_logic", "ui") or name != root:
+            continue
+        packages[root] = max(packages.get(root, 0), cumulative_us)
+    heaviest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {"module": module, "total_ms": total_us / 1000.0,
+            "packages_ms": {name: cumulative_us / 1000.0 for name, cumulative_us in heaviest}}
+
+def _median(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+def run_startup_benchmark(modules, repeat=3, top=10, skip_gui=False, log=print):
+    report = {"first_window": None, "cli_help_s": None, "modules": []}
+    if not skip_gui:
+        runs = [measure_first_window() for _ in range(repeat)]
+        runs = [r for r in runs if r]
+        if runs:
+            report["first_window"] = {key: _median([r[key] for r in runs]) for key in ("wall", "imports", "window", "event_loop")}
+            report["first_window"]["heavy_modules"] = runs[-1]["heavy_modules"]
+            fw = report["first_window"]
+            log(f"Перше вікно: {fw['wall']:.3f} с (імпорти {fw['imports']:.3f} с, MainWindow {fw['window']:.3f} с, "
+                f"перша подія {fw['event_loop']:.3f} с); важкі модулі до вікна: {', '.join(fw['heavy_modules']) or 'немає'}")
+        else:
+            log("Перше вікно: пропущено (PySide6 недоступний або вікно не створилося)")
+    report["cli_help_s"] = _median([measure_cli_help() for _ in range(repeat)])
+    log(f"cli.py --help: {report['cli_help_s']:.3f} с")
+
+    for module in modules:
+        runs = [measure_module_import(module, top=top) for _ in range(repeat)]
+        if "error" in runs[0]:
+            report["modules"].append(runs[0])
+            log(f"{module:<28} пропущено: {runs[0]['error']}")
+            continue
+        record = {"module": module, "total_ms": _median([r["total_ms"] for r in runs]), "packages_ms": runs[-1]["packages_ms"]}
+        report["modules"].append(record)
+        packages = ", ".join(f"{name} {ms:.0f}" for name, ms in record["packages_ms"].items())
+        log(f"{module:<28} {record['total_ms']:8.1f} мс  {packages}")
+    return report
+
+def _csv(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Час запуску GUI/CLI і вартість імпорту модулів.")
+    parser.add_argument("--modules", type=_csv, default=list(DEFAULT_MODULES), help="Модулі для -X importtime, через кому")
+    parser.add_argument("--repeat", type=int, default=3, help="Повторів кожного вимірювання (медіана)")
+    parser.add_argument("--top", type=int, default=8, help="Скільки найважчих пакетів показувати для модуля")
+    parser.add_argument("--skip-gui", action="store_true", help="Не вимірювати час до першого вікна")
+    parser.add_argument("-o", "--output", help="Зберегти результати у JSON-файл")
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    report = run_startup_benchmark(args.modules, repeat=max(1, args.repeat), top=args.top, skip_gui=args.skip_gui)
+    if args.output:
+        report["python"] = sys.version.split()[0]
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результати збережено: {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
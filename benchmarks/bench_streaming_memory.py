@@ -0,0 +1,116 @@
+# benchmarks/bench_streaming_memory.py
+# Перевірка потокового режиму (options['memory_budget_mb']): пікова пам'ять (RSS) процесу обробки
+# і процесів FFmpeg не повинна зростати разом із тривалістю відео. Кожна тривалість обробляється
+# в окремому процесі (run_case з bench_processing.py); зростання піку відносно найкоротшого кліпу
+# понад поріг дає код виходу 1. Для порівняння можна додати звичайні рушії (--engines moviepy).
+#
+# Приклади:
+#   python benchmarks/bench_streaming_memory.py --resolution 1080p --durations 5,20,60 --budget 400
+#   python benchmarks/bench_streaming_memory.py --resolution 4k --durations 5,30 --engines streaming,moviepy
+import argparse
+import json
+import multiprocessing
+import sys
+from pathlib import Path
+
+# --- Додавання шляхів ---
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+if str(Path(__file__).resolve().parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+# --- Кінець додавання шляхів ---
+
+from app_logic import job_options
+from bench_processing import collect_metadata, run_case
+from synthetic_media import RESOLUTIONS, get_clip
+
+# Поріг зростання не менший за цю абсолютну величину: дрібні коливання алокатора не є регресією
+MIN_GROWTH_SLACK_MB = 20.0
+
+def streaming_options(engine, budget_mb, overrides):
+    """ "streaming" - потоковий режим із бюджетом; інші назви - звичайний рушій без бюджету. """
+    options = dict(overrides)
+    if engine == "streaming":
+        options["memory_budget_mb"] = budget_mb
+    else:
+        options["engine"] = engine
+    return job_options.resolve_options(None, options)
+
+def run_memory_benchmark(resolution, durations, engines, budget_mb, overrides, media_dir=None, timeout=None, log=print):
+    results = []
+    for engine in engines:
+        options = streaming_options(engine, budget_mb, overrides)
+        for duration in sorted(durations):
+            input_path = get_clip(resolution, duration, media_dir=media_dir)
+            record = {"engine": engine, "resolution": resolution, "duration": duration}
+            record.update(run_case(input_path, options, timeout=timeout))
+            results.append(record)
+            log(f"{engine:<10} {resolution:>6} {duration:>6g}s "
+                + (f"{record['wall_time']:8.2f}s  RSS {record.get('peak_rss_mb')} МБ  FFmpeg {record.get('ffmpeg_peak_rss_mb')} МБ"
+                   if record.get("success") else f"ПОМИЛКА: {record.get('error')}"))
+    return results
+
+def check_flat(results, engine, threshold):
+    """ Зростання піку RSS (Python і FFmpeg) від найкоротшого до найдовшого кліпу. Повертає (рядки звіту, чи пройдено). """
+    runs = [r for r in results if r["engine"] == engine and r.get("success")]
+    if len(runs) < 2:
+        return [f"{engine}: замало успішних запусків для перевірки"], False
+    first, last = runs[0], runs[-1]
+    lines = []
+    passed = True
+    for key, label in (("peak_rss_mb", "Python"), ("ffmpeg_peak_rss_mb", "FFmpeg")):
+        if first.get(key) is None or last.get(key) is None:
+            continue
+        growth = last[key] - first[key]
+        allowed = max(MIN_GROWTH_SLACK_MB, first[key] * threshold)
+        ok = growth <= allowed
+        passed = passed and ok
+        lines.append(f"{engine} {label}: {first[key]} МБ ({first['duration']:g} с) -> {last[key]} МБ "
+                     f"({last['duration']:g} с), зростання {growth:+.1f} МБ, допустимо {allowed:.1f} МБ - "
+                     + ("OK" if ok else "ЗРОСТАЄ"))
+    return lines, passed
+
+def _csv(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Пікова пам'ять потокового режиму залежно від тривалості відео.")
+    parser.add_argument("--resolution", default="1080p", help=f"Одна з: {', '.join(RESOLUTIONS)}")
+    parser.add_argument("--durations", type=lambda v: [float(x) for x in _csv(v)], default=[5.0, 20.0, 60.0],
+                        help="Тривалості кліпів у секундах, через кому")
+    parser.add_argument("--engines", type=_csv, default=["streaming"],
+                        help="streaming (бюджет пам'яті) та/або рушії для порівняння, через кому")
+    parser.add_argument("--budget", type=int, default=400, help="Бюджет пам'яті потокового режиму, МБ")
+    parser.add_argument("--uniek", action="store_true", help="Увімкнути 'Унік' (шум, гамма, швидкість, гучність)")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Допустиме відносне зростання піку (0.15 = 15%%)")
+    parser.add_argument("--timeout", type=float, default=None, help="Обмеження часу одного запуску, с")
+    parser.add_argument("--media-dir", help="Папка для синтетичних кліпів")
+    parser.add_argument("-o", "--output", help="Зберегти результати у JSON-файл")
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    if args.resolution not in RESOLUTIONS:
+        print(f"Невідома роздільна здатність: {args.resolution}", file=sys.stderr)
+        return 2
+    overrides = {"uniek_filter_active": True, "noise_seed": 0} if args.uniek else {}
+    results = run_memory_benchmark(args.resolution, args.durations, args.engines, args.budget, overrides,
+                                   media_dir=args.media_dir, timeout=args.timeout)
+    all_passed = True
+    for engine in args.engines:
+        lines, passed = check_flat(results, engine, args.threshold)
+        for line in lines:
+            print(line)
+        if engine == "streaming":
+            all_passed = all_passed and passed # Інші рушії - лише для порівняння
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": collect_metadata(), "budget_mb": args.budget, "results": results}, f,
+                      ensure_ascii=False, indent=2)
+        print(f"Результати збережено: {args.output}")
+    return 0 if all_passed else 1
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
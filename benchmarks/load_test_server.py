@@ -0,0 +1,235 @@
+# benchmarks/load_test_server.py
+# Навантажувальний тест HTTP-сервісу завдань (app_logic/job_server.py) локальним клієнтом на asyncio.
+# Запускає сервіс окремим процесом (або використовує вже запущений, --url), надсилає N завдань
+# з C паралельних з'єднань, підписується на SSE частини завдань, частину скасовує і чекає завершення всіх.
+# Записує затримки відповіді (p50/p95/p99), пропускну здатність, відмови 503 і кількість подій SSE.
+#
+# Приклади:
+#   python benchmarks/load_test_server.py --jobs 500 --concurrency 50 --workers 2
+#   python benchmarks/load_test_server.py --url http://host:8765 --token SECRET --input /shared/clip.mp4 --jobs 100
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+# --- Додавання шляхів ---
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+if str(Path(__file__).resolve().parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+# --- Кінець додавання шляхів ---
+
+TERMINAL_STATES = ("done", "failed", "cancelled")
+
+async def http_request(host, port, method, path, payload=None, token=None):
+    """ Один запит HTTP/1.1 (сервіс закриває з'єднання після відповіді). Повертає (статус, заголовки, тіло). """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        headers = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", f"Content-Length: {len(body)}",
+                   "Content-Type: application/json", "Connection: close"]
+        if token:
+            headers.append(f"Authorization: Bearer {token}")
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+        raw = await reader.read()
+    finally:
+        writer.close()
+    head, _, content = raw.partition(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    response_headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        response_headers[name.strip().lower()] = value.strip()
+    return status, response_headers, content
+
+async def follow_events(host, port, job_id, token=None):
+    """ Читає SSE завдання до події result. Повертає (кількість подій, час до першої події, остаточний стан). """
+    reader, writer = await asyncio.open_connection(host, port)
+    started = time.perf_counter()
+    first_event = None
+    count = 0
+    state = None
+    try:
+        auth = f"Authorization: Bearer {token}\r\n" if token else ""
+        writer.write(f"GET /jobs/{job_id}/events HTTP/1.1\r\nHost: {host}\r\n{auth}Connection: close\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        event = None
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            line = line.decode("utf-8").rstrip("\n")
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                count += 1
+                if first_event is None:
+                    first_event = time.perf_counter() - started
+                if event == "result":
+                    state = json.loads(line[6:]).get("state")
+                    break
+    finally:
+        writer.close()
+    return count, first_event, state
+
+def _percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {"p50_ms": round(pick(0.5) * 1000, 2), "p95_ms": round(pick(0.95) * 1000, 2),
+            "p99_ms": round(pick(0.99) * 1000, 2), "max_ms": round(ordered[-1] * 1000, 2)}
+
+async def run_load_test(host, port, input_path, jobs, concurrency, options, sse_jobs=0, cancel_every=0,
+                        token=None, poll_interval=0.5, timeout=3600, log=print):
+    submit_latencies = []
+    poll_latencies = []
+    rejected = [0]
+    job_ids = []
+    next_job = iter(range(jobs))
+
+    async def _submitter():
+        for _ in next_job:
+            while True:
+                started = time.perf_counter()
+                status, headers, body = await http_request(host, port, "POST", "/jobs",
+                                                           {"input": input_path, "options": options}, token)
+                submit_latencies.append(time.perf_counter() - started)
+                if status == 503: # Черга сервісу заповнена - чекаємо, як просить Retry-After
+                    rejected[0] += 1
+                    await asyncio.sleep(float(headers.get("retry-after", 1)))
+                    continue
+                if status != 202:
+                    raise RuntimeError(f"POST /jobs -> {status}: {body.decode('utf-8', 'replace')}")
+                job_ids.append(json.loads(body)["id"])
+                break
+
+    started = time.perf_counter()
+    sse_tasks = []
+    submitters = [asyncio.ensure_future(_submitter()) for _ in range(max(1, concurrency))]
+    # Підписки SSE і скасування запускаються по мірі появи завдань, поки інші ще надсилаються
+    subscribed = 0
+    cancelled = 0
+    while not all(task.done() for task in submitters):
+        await asyncio.sleep(0.05)
+        while subscribed < min(sse_jobs, len(job_ids)):
+            sse_tasks.append(asyncio.ensure_future(follow_events(host, port, job_ids[subscribed], token)))
+            subscribed += 1
+        while cancel_every and cancelled < len(job_ids) // cancel_every:
+            await http_request(host, port, "POST", f"/jobs/{job_ids[(cancelled + 1) * cancel_every - 1]}/cancel", None, token)
+            cancelled += 1
+    for task in submitters:
+        task.result() # Помилки надсилання
+    submit_wall = time.perf_counter() - started
+    log(f"Надіслано {len(job_ids)} завдань за {submit_wall:.2f} с, відмов 503: {rejected[0]}")
+
+    states = {}
+    pending = set(job_ids)
+    while pending and time.perf_counter() - started < timeout:
+        poll_started = time.perf_counter()
+        status, _, body = await http_request(host, port, "GET", "/jobs", None, token)
+        poll_latencies.append(time.perf_counter() - poll_started)
+        if status == 200:
+            listed = {job["id"]: job for job in json.loads(body)["jobs"]}
+            for job_id in list(pending):
+                job = listed.get(job_id)
+                if job is None: # Витіснено зі сховища завершених (max_finished) - отже, завершено
+                    states[job_id] = "evicted"
+                    pending.discard(job_id)
+                elif job["state"] in TERMINAL_STATES:
+                    states[job_id] = job["state"]
+                    pending.discard(job_id)
+        if pending:
+            await asyncio.sleep(poll_interval)
+    total_wall = time.perf_counter() - started
+
+    sse_results = await asyncio.gather(*sse_tasks) if sse_tasks else []
+    counts = {}
+    for state in states.values():
+        counts[state] = counts.get(state, 0) + 1
+    if pending:
+        counts["timeout"] = len(pending)
+    return {
+        "jobs": jobs, "concurrency": concurrency, "submit_wall_s": round(submit_wall, 3),
+        "submit_rate_per_s": round(len(job_ids) / submit_wall, 1) if submit_wall else None,
+        "submit_latency": _percentiles(submit_latencies), "rejected_503": rejected[0],
+        "poll_latency": _percentiles(poll_latencies), "total_wall_s": round(total_wall, 3),
+        "jobs_per_s": round(len(states) / total_wall, 3) if total_wall else None, "states": counts,
+        "cancel_requests": cancelled,
+        "sse": {"streams": len(sse_results), "events": sum(r[0] for r in sse_results),
+                "first_event": _percentiles([r[1] for r in sse_results if r[1] is not None]),
+                "completed_streams": sum(1 for r in sse_results if r[2] is not None)},
+    }
+
+def _start_server(port, output_folder, workers, max_queued, token):
+    cmd = [sys.executable, str(project_root / "cli.py"), "--serve", "--port", str(port), "-o", output_folder,
+           "--workers", str(workers), "--max-queued", str(max_queued)]
+    if token:
+        cmd += ["--token", token]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True)
+    line = proc.stdout.readline() # Подія serve_start, коли сервіс приймає з'єднання
+    if not line:
+        raise RuntimeError("Сервіс завдань не запустився.")
+    return proc
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Навантажувальний тест HTTP-сервісу завдань")
+    parser.add_argument("--url", help="Адреса вже запущеного сервісу, напр. http://127.0.0.1:8765")
+    parser.add_argument("--token", help="Токен сервісу (Authorization: Bearer)")
+    parser.add_argument("--input", help="Вхідне відео (шлях на сервері); за замовчуванням синтетичне")
+    parser.add_argument("--resolution", default="480p", help="Роздільна здатність синтетичного відео")
+    parser.add_argument("--duration", type=float, default=1, help="Тривалість синтетичного відео, с")
+    parser.add_argument("--jobs", type=int, default=200, help="Кількість завдань")
+    parser.add_argument("--concurrency", type=int, default=20, help="Паралельних з'єднань для надсилання")
+    parser.add_argument("--sse", type=int, default=10, help="Скільки завдань стежать через SSE")
+    parser.add_argument("--cancel-every", type=int, default=0, metavar="K", help="Скасовувати кожне K-те завдання")
+    parser.add_argument("--options", default='{"engine": "ffmpeg"}', help="Опції завдань (JSON)")
+    parser.add_argument("--workers", type=int, default=2, help="Воркери сервісу, що запускається скриптом")
+    parser.add_argument("--max-queued", type=int, default=100, help="Розмір черги сервісу, що запускається скриптом")
+    parser.add_argument("--port", type=int, default=8799, help="Порт сервісу, що запускається скриптом")
+    parser.add_argument("--timeout", type=float, default=3600, help="Найдовше очікування завершення, с")
+    parser.add_argument("-o", "--output", help="Зберегти результат у JSON")
+    return parser
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    input_path = args.input
+    if not input_path:
+        from synthetic_media import get_clip
+        input_path = get_clip(args.resolution, args.duration)
+    work_dir = tempfile.mkdtemp(prefix="job_server_load_")
+    proc = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = "127.0.0.1", args.port
+        proc = _start_server(port, os.path.join(work_dir, "out"), args.workers, args.max_queued, args.token)
+    try:
+        report = asyncio.run(run_load_test(host, port, os.path.abspath(input_path), args.jobs, args.concurrency,
+                                           json.loads(args.options), sse_jobs=args.sse, cancel_every=args.cancel_every,
+                                           token=args.token, timeout=args.timeout))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=60)
+        shutil.rmtree(work_dir, ignore_errors=True)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    failed = report["states"].get("failed", 0) + report["states"].get("timeout", 0)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# benchmarks/synthetic_media.py
+# Генерація синтетичних тестових відео: кадри формуються NumPy (градієнт, що рухається, + шахівниця + детермінований шум),
+# аудіо - синусоїдальний тон, записаний модулем wave. Результат стискається libx264/aac через FFmpeg.
+# Однакові параметри завжди дають однаковий файл, тому результати бенчмарків можна порівнювати між запусками.
+import os
+import subprocess
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+# --- Додавання шляхів ---
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+# --- Кінець додавання шляхів ---
+
+from app_logic.utils import get_ffmpeg_path_for_moviepy_ua, get_subprocess_kwargs_ua
+
+RESOLUTIONS = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+
+DEFAULT_MEDIA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".media")
+
+def make_frame(index, width, height, fps, rng_noise):
+    """ Один кадр RGB uint8: горизонтальний градієнт зсувається в часі, шахівниця дає різкі краї. """
+    t = index / fps
+    x = np.arange(width, dtype=np.float32)
+    y = np.arange(height, dtype=np.float32)
+    red = ((x + t * 120.0) % width) / width * 247.0 # Запас під шум, щоб uint8 не переповнювався
+    green = (y / height) * 247.0
+    checker = (((x[None, :] // 64).astype(np.int32) + (y[:, None] // 64).astype(np.int32) + index // 12) % 2) * 60
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[..., 0] = red[None, :]
+    frame[..., 1] = green[:, None]
+    frame[..., 2] = checker
+    # Невеликий шум, щоб кодувальник не стискав кадри нереалістично добре
+    frame += rng_noise[(index % len(rng_noise))][:height, :width, None]
+    return frame
+
+def write_tone_wav(path, duration, sample_rate=44100, frequency=440.0):
+    """ Стерео-тон 16 біт. """
+    t = np.arange(int(duration * sample_rate), dtype=np.float64) / sample_rate
+    samples = (0.3 * np.sin(2 * np.pi * frequency * t) * 32767).astype(np.int16)
+    stereo = np.repeat(samples[:, None], 2, axis=1)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(stereo.tobytes())
+
+def generate_clip(path, width, height, duration, fps=25, with_audio=True, seed=0):
+    """ Створює MP4 (H.264 + AAC) з кадрів NumPy. Повертає шлях. """
+    rng = np.random.default_rng(seed)
+    rng_noise = [rng.integers(0, 8, size=(height, width), dtype=np.uint8) for _ in range(4)]
+    wav_path = f"{path}.wav"
+    cmd = [get_ffmpeg_path_for_moviepy_ua(), "-y", "-hide_banner", "-loglevel", "error",
+           "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps), "-i", "pipe:0"]
+    if with_audio:
+        write_tone_wav(wav_path, duration)
+        cmd += ["-i", wav_path, "-c:a", "aac", "-shortest"]
+    cmd += ["-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p", "-g", str(fps * 2), path]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, **get_subprocess_kwargs_ua())
+    try:
+        for index in range(int(round(duration * fps))):
+            proc.stdin.write(make_frame(index, width, height, fps, rng_noise).tobytes())
+        proc.stdin.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"FFmpeg не зміг створити тестове відео {path}")
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        if os.path.exists(wav_path):
+            os.remove(wav_path)
+    return path
+
+def get_clip(resolution, duration, media_dir=None, fps=25, with_audio=True):
+    """ Повертає шлях до синтетичного відео, створюючи його лише за відсутності в media_dir. """
+    media_dir = media_dir or DEFAULT_MEDIA_DIR
+    os.makedirs(media_dir, exist_ok=True)
+    width, height = RESOLUTIONS[resolution]
+    suffix = "" if with_audio else "_noaudio"
+    path = os.path.join(media_dir, f"synthetic_{resolution}_{duration:g}s_{fps}fps{suffix}.mp4")
+    if not os.path.exists(path):
+        generate_clip(path, width, height, duration, fps=fps, with_audio=with_audio)
+    return path
@@ -0,0 +1,16 @@
+# cli.py - консольна точка входу (без GUI)
+import multiprocessing
+import sys
+from pathlib import Path
+
+# --- Додавання шляхів ---
+project_root = Path(__file__).resolve().parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+# --- Кінець додавання шляхів ---
+
+from app_logic.cli import main
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,6 +1,7 @@
 # main.py (для PySide6)
 import sys
 import os
+import multiprocessing
 from pathlib import Path
 
 from PySide6.QtWidgets import QApplication
@@ -40,4 +41,5 @@ def run_app():
     sys.exit(app.exec()) 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Потрібно для пулу процесів пакетної обробки у збірці PyInstaller
     run_app()
\ No newline at end of file
@@ -0,0 +1,43 @@
+# tests/conftest.py
+# Спільні фікстури тестів: шлях до проекту та короткий тестовий кліп, згенерований FFmpeg (lavfi testsrc + тон).
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+# --- Додавання шляхів ---
+project_root = Path(__file__).resolve().parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+# --- Кінець додавання шляхів ---
+
+from app_logic.utils import get_ffmpeg_path_for_moviepy_ua, probe_ffmpeg_capabilities_ua
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: довгі тести (пропуск: -m \"not slow\")")
+
+def make_test_clip(path, width=160, height=120, duration=1.0, fps=25, with_audio=True):
+    cmd = [get_ffmpeg_path_for_moviepy_ua(), "-y", "-hide_banner", "-loglevel", "error",
+           "-f", "lavfi", "-i", f"testsrc=size={width}x{height}:rate={fps}:duration={duration}"]
+    if with_audio:
+        cmd += ["-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}", "-c:a", "aac"]
+    cmd += ["-c:v", "libx264", "-pix_fmt", "yuv420p", "-g", str(fps), str(path)]
+    subprocess.run(cmd, check=True)
+    return str(path)
+
+@pytest.fixture(scope="session")
+def ffmpeg_available():
+    if not probe_ffmpeg_capabilities_ua()["available"]:
+        pytest.skip("FFmpeg не знайдено")
+
+@pytest.fixture(scope="session")
+def sample_clip(tmp_path_factory, ffmpeg_available):
+    """ 1 с, 160x120, 25 fps, з аудіо. """
+    return make_test_clip(tmp_path_factory.mktemp("media") / "sample.mp4")
+
+def noop(*args, **kwargs):
+    pass
+
+def never_cancelled():
+    return False
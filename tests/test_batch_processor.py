@@ -0,0 +1,68 @@
+# tests/test_batch_processor.py
+# Пакетна обробка в пулі процесів: аварія воркера зараховується лише завданню, яке її спричинило.
+import os
+import time
+
+from app_logic import job_options
+from app_logic.batch_processor import BatchJob, _run_batch_job, run_batch_jobs
+
+CRASH_MARKER = "crash_"
+SLOW_MARKER = "slow_" # "Повільне" завдання триває, доки поруч не впаде аварійне (або 10 с)
+# Завершується одразу після аварії: пул помічає смерть воркера, лише коли прокидається (напр. від результату),
+# бо воркер, створений після старту керуючого потоку, не входить до його списку очікування до наступного пробудження
+WAKE_MARKER = "wake_"
+RUNNING_SUFFIX = ".running"
+CRASHED_SUFFIX = ".crashed"
+
+def _wait_for(folder, predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not predicate(os.listdir(folder)):
+        time.sleep(0.05)
+
+def crashing_runner(index, job, event_queue, cancel_event):
+    """
+    Як _run_batch_job, але файл з CRASH_MARKER у назві аварійно завершує процес-воркер. Якщо в тій самій папці
+    є файл зі SLOW_MARKER, обидва завдання чекають одне на одне, тож аварія гарантовано стається поруч з ним.
+    """
+    name = os.path.basename(job.input_path)
+    folder = os.path.dirname(job.input_path)
+    event_queue.put((index, "started", os.getpid()))
+    if CRASH_MARKER in name:
+        if any(SLOW_MARKER in other for other in os.listdir(folder)):
+            _wait_for(folder, lambda names: any(n.endswith(RUNNING_SUFFIX) for n in names))
+        open(job.input_path + CRASHED_SUFFIX, "w").close()
+        os._exit(3)
+    if WAKE_MARKER in name:
+        _wait_for(folder, lambda names: any(n.endswith(CRASHED_SUFFIX) for n in names))
+        time.sleep(0.2)
+    if SLOW_MARKER in name:
+        open(job.input_path + RUNNING_SUFFIX, "w").close()
+        if any(CRASH_MARKER in other for other in os.listdir(folder)):
+            _wait_for(folder, lambda names: any(n.endswith(CRASHED_SUFFIX) for n in names))
+            time.sleep(3.0) # Час, за який пул помічає аварію і завершує решту воркерів
+    return _run_batch_job(index, job, event_queue, cancel_event)
+
+def test_batch_processes_all_jobs(sample_clip, tmp_path):
+    options = job_options.resolve_options(None, {"engine": "ffmpeg", "bw_filter_active": True})
+    jobs = [BatchJob(input_path=sample_clip, output_folder=str(tmp_path / str(i)), options=options) for i in range(3)]
+    for job in jobs:
+        os.makedirs(job.output_folder)
+    results = run_batch_jobs(jobs, max_workers=2)
+    assert [r.index for r in results] == [0, 1, 2]
+    assert all(r.success and os.path.isfile(r.output_path) for r in results)
+
+def test_worker_crash_is_charged_only_to_the_crashing_job(sample_clip, tmp_path):
+    options = job_options.resolve_options(None, {"engine": "ffmpeg"})
+    crash_path = tmp_path / f"{CRASH_MARKER}input.mp4"
+    crash_path.write_bytes(b"")
+    jobs = []
+    for i in range(8):
+        output_folder = tmp_path / f"out{i}"
+        output_folder.mkdir()
+        input_path = str(crash_path) if i == 3 else sample_clip
+        jobs.append(BatchJob(input_path=input_path, output_folder=str(output_folder), options=options))
+    results = run_batch_jobs(jobs, max_workers=2, job_runner=crashing_runner)
+    assert not results[3].success
+    assert "аварійно" in results[3].error
+    innocent = [r for r in results if r.index != 3]
+    assert all(r.success for r in innocent), [(r.index, r.error) for r in innocent if not r.success]
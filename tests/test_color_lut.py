@@ -0,0 +1,69 @@
+# tests/test_color_lut.py
+# ColorStage (Ч/Б і таблиця гамми/контрасту "Унік") проти ланцюжка vfx MoviePy на випадкових кадрах.
+import numpy as np
+import pytest
+from moviepy.video.VideoClip import ImageClip
+from moviepy.video.fx import all as vfx
+
+from app_logic import job_options
+from app_logic.color_lut import ColorStage, build_color_lut
+from app_logic.tile_parallel import StripePool, apply_color_and_noise
+
+def _moviepy_chain(frame, bw=False, gamma=None, contrast=None):
+    """ Той самий порядок, що був у video_processor до ColorStage: blackwhite -> gamma_corr -> lum_contrast. """
+    clip = ImageClip(frame)
+    if bw:
+        clip = clip.fx(vfx.blackwhite)
+    if gamma is not None:
+        clip = clip.fx(vfx.gamma_corr, gamma)
+    if contrast is not None:
+        clip = clip.fx(vfx.lum_contrast, lum=0, contrast=contrast, contrast_thr=127)
+    return clip.get_frame(0)
+
+def _random_frames(count=4, shape=(97, 131, 3)):
+    rng = np.random.default_rng(1234)
+    frames = [rng.integers(0, 256, size=shape, dtype=np.uint8) for _ in range(count)]
+    # Усі можливі суми r+g+b з різними розкладами - саме там float64 MoviePy відкидає дробову частину інакше
+    values = np.arange(256, dtype=np.uint8)
+    frames.append(np.stack(np.meshgrid(values, values[::-1], values[::7], indexing="ij"), axis=-1).reshape(256, -1, 3))
+    return frames
+
+def _uniek_params():
+    params = job_options.get_uniek_params(job_options.resolve_options(None, {"uniek_filter_active": True}))
+    return params["gamma"], params["contrast"]
+
+@pytest.mark.parametrize("frame", _random_frames())
+def test_bw_matches_moviepy(frame):
+    assert np.array_equal(ColorStage(bw=True)(frame), _moviepy_chain(frame, bw=True))
+
+@pytest.mark.parametrize("frame", _random_frames())
+def test_gamma_contrast_matches_moviepy(frame):
+    gamma, contrast = _uniek_params()
+    stage = ColorStage(lut=build_color_lut(gamma=gamma, contrast=contrast))
+    assert np.array_equal(stage(frame), _moviepy_chain(frame, gamma=gamma, contrast=contrast))
+
+@pytest.mark.parametrize("frame", _random_frames())
+def test_bw_then_uniek_matches_moviepy(frame):
+    gamma, contrast = _uniek_params()
+    stage = ColorStage(bw=True, lut=build_color_lut(gamma=gamma, contrast=contrast))
+    assert np.array_equal(stage(frame), _moviepy_chain(frame, bw=True, gamma=gamma, contrast=contrast))
+
+@pytest.mark.parametrize("gamma,contrast", [(0.8, None), (None, 0.3), (1.2, -0.2), (0.95, 0.05)])
+def test_lut_matches_moviepy_for_other_params(gamma, contrast):
+    frame = _random_frames(count=1)[0]
+    stage = ColorStage(bw=True, lut=build_color_lut(gamma=gamma, contrast=contrast))
+    assert np.array_equal(stage(frame), _moviepy_chain(frame, bw=True, gamma=gamma, contrast=contrast))
+
+def test_stripes_match_whole_frame():
+    gamma, contrast = _uniek_params()
+    frame = np.random.default_rng(7).integers(0, 256, size=(300, 131, 3), dtype=np.uint8)
+    lut = build_color_lut(gamma=gamma, contrast=contrast)
+    expected = ColorStage(bw=True, lut=lut)(frame)
+    stage = ColorStage(bw=True, lut=lut)
+    out = np.empty_like(frame)
+    pool = StripePool(3)
+    try:
+        apply_color_and_noise(frame, out, stage, None, pool)
+    finally:
+        pool.shutdown()
+    assert np.array_equal(out, expected)
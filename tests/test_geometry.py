@@ -0,0 +1,68 @@
+# tests/test_geometry.py
+# Розмір після повороту збігається з PIL (яким повертає MoviePy), зміна розміру OpenCV - з MoviePy,
+# а рушій FFmpeg кодує непарні розміри без відкату.
+import random
+
+import cv2
+import numpy as np
+import pytest
+from moviepy.video.fx.resize import resizer
+from PIL import Image
+
+from app_logic import job_options
+from app_logic.ffmpeg_backend import build_ffmpeg_command, encoder_pix_fmt
+from app_logic.media_probe import probe_media
+from app_logic.opencv_pipeline import OpenCVFramePipeline, resize_interpolation
+from app_logic.video_processor import process_video_task
+from conftest import never_cancelled, noop
+
+@pytest.mark.parametrize("width,height,angle", [(1080, 1350, 30), (320, 240, 15), (161, 121, -45), (640, 360, 359.5)])
+def test_rotated_size_matches_pil(width, height, angle):
+    assert job_options.rotated_size(width, height, angle) == Image.new("RGB", (width, height)).rotate(angle, expand=True).size
+
+def test_rotated_size_matches_pil_random():
+    rng = random.Random(0)
+    for _ in range(200):
+        width, height, angle = rng.randint(2, 2000), rng.randint(2, 2000), rng.uniform(-360, 360)
+        expected = Image.new("RGB", (width, height)).rotate(angle, expand=True).size
+        assert job_options.rotated_size(width, height, angle) == expected, (width, height, angle)
+
+@pytest.mark.parametrize("src,dst,expected", [
+    ((1920, 1080), (1080, 1920), cv2.INTER_LINEAR), # Альбомне -> tiktok_reels: висота росте, ширина меншає
+    ((1920, 1080), (2560, 1440), cv2.INTER_LINEAR),
+    ((1920, 1080), (1280, 720), cv2.INTER_AREA),
+    ((1920, 1080), (1920, 1080), cv2.INTER_AREA),
+])
+def test_resize_interpolation_matches_moviepy(src, dst, expected):
+    assert resize_interpolation(src, dst) == expected
+
+def test_opencv_resize_matches_moviepy_for_portrait_target():
+    frame = np.random.default_rng(0).integers(0, 256, (90, 160, 3), dtype=np.uint8)
+    options = job_options.resolve_options("tiktok_reels", {"width": "72", "height": "128"})
+    assert np.array_equal(OpenCVFramePipeline(options)(frame), resizer(frame, (72, 128)))
+
+def test_encoder_pix_fmt_only_420_for_even_sizes():
+    assert encoder_pix_fmt((1080, 1350)) == "yuv420p"
+    assert encoder_pix_fmt((980, 843)) == "yuv444p"
+    assert encoder_pix_fmt((161, 120)) == "yuv444p"
+
+def test_ffmpeg_command_uses_444_for_odd_output(sample_clip):
+    options = job_options.resolve_options(None, {"engine": "ffmpeg", "resize_active": True, "width": 161, "height": 121})
+    cmd = build_ffmpeg_command(sample_clip, "out.mp4", options, probe_media(sample_clip, use_cache=False))
+    assert cmd[cmd.index("-pix_fmt") + 1] == "yuv444p"
+    assert "format=yuv444p" in cmd[cmd.index("-filter_complex") + 1]
+
+@pytest.mark.parametrize("overrides", [
+    {"resize_active": True, "width": 161, "height": 121},
+    {"resize_active": True, "width": 170, "height": 130, "rotation_angle": 15},
+])
+def test_ffmpeg_engine_encodes_odd_sizes_without_fallback(sample_clip, tmp_path, overrides):
+    options = job_options.resolve_options(None, dict(overrides, engine="ffmpeg"))
+    statuses = []
+    output_path = process_video_task(sample_clip, str(tmp_path), options, statuses.append, noop, never_cancelled)
+    assert output_path
+    assert not any("Перехід на MoviePy" in message for message in statuses)
+    expected = job_options.compute_output_size(options, 160, 120)
+    capture = cv2.VideoCapture(output_path)
+    assert (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))) == expected
+    capture.release()
@@ -0,0 +1,106 @@
+# tests/test_job_server.py
+# HTTP-сервіс завдань: список завдань приймається все або нічого, некоректний Content-Length - 400,
+# токен перевіряється, аварія воркера зараховується лише завданню, яке її спричинило.
+import asyncio
+import json
+import shutil
+import time
+
+from app_logic.job_server import TERMINAL_STATES, JobServer
+from test_batch_processor import CRASH_MARKER, SLOW_MARKER, WAKE_MARKER, crashing_runner
+
+TOKEN = "secret-token"
+
+async def _request(port, method, path, body=None, token=TOKEN, headers=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = json.dumps(body).encode("utf-8") if body is not None else b""
+    lines = [f"{method} {path} HTTP/1.1", "Host: 127.0.0.1", "Connection: close"]
+    if token:
+        lines.append(f"Authorization: Bearer {token}")
+    request_headers = {"Content-Length": str(len(data))}
+    request_headers.update(headers or {})
+    lines += [f"{name}: {value}" for name, value in request_headers.items()]
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + data)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    status = int(head.split()[1])
+    return status, json.loads(payload.decode("utf-8")) if payload else None
+
+def _with_server(tmp_path, check, **server_kwargs):
+    async def _main():
+        server_kwargs.setdefault("workers", 1)
+        server = JobServer(str(tmp_path / "out"), token=TOKEN, **server_kwargs)
+        _, port = await server.start("127.0.0.1", 0)
+        try:
+            await check(server, port)
+        finally:
+            await server.stop()
+    asyncio.run(_main())
+
+def _input_file(tmp_path, name="clip.mp4"):
+    path = tmp_path / name
+    path.write_bytes(b"not a real video")
+    return str(path)
+
+def test_list_with_invalid_entry_enqueues_nothing(tmp_path):
+    valid = {"input": _input_file(tmp_path)}
+    invalid = {"input": str(tmp_path / "missing.mp4")}
+
+    async def check(server, port):
+        status, payload = await _request(port, "POST", "/jobs", [valid, valid, invalid])
+        assert status == 400
+        assert "missing.mp4" in payload["error"]
+        status, payload = await _request(port, "GET", "/jobs")
+        assert payload["jobs"] == []
+    _with_server(tmp_path, check)
+
+def test_list_larger_than_free_queue_is_rejected_whole(tmp_path):
+    entry = {"input": _input_file(tmp_path)}
+
+    async def check(server, port):
+        status, _ = await _request(port, "POST", "/jobs", [entry] * 3)
+        assert status == 503
+        assert server.jobs == {}
+    _with_server(tmp_path, check, max_queued=2)
+
+def test_malformed_content_length_is_bad_request(tmp_path):
+    async def check(server, port):
+        status, payload = await _request(port, "POST", "/jobs", headers={"Content-Length": "abc"})
+        assert status == 400
+        assert "Content-Length" in payload["error"]
+    _with_server(tmp_path, check)
+
+def test_token_is_required(tmp_path):
+    async def check(server, port):
+        assert (await _request(port, "GET", "/health", token="wrong"))[0] == 401
+        assert (await _request(port, "GET", "/health", token=None))[0] == 401
+        assert (await _request(port, "GET", "/health", token="sécret"))[0] == 401
+        assert (await _request(port, "GET", "/health"))[0] == 200
+    _with_server(tmp_path, check)
+
+def test_worker_crash_fails_only_the_crashing_job(sample_clip, tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    ok_path = inbox / f"a_{SLOW_MARKER}ok.mp4"
+    shutil.copy(sample_clip, ok_path)
+    crash_path = inbox / f"b_{CRASH_MARKER}.mp4"
+    crash_path.write_bytes(b"not a video")
+    wake_path = inbox / f"c_{WAKE_MARKER}.mp4"
+    shutil.copy(sample_clip, wake_path)
+    entries = [{"input": str(path), "options": {"engine": "ffmpeg"}} for path in (ok_path, crash_path, wake_path)]
+
+    async def check(server, port):
+        status, payload = await _request(port, "POST", "/jobs", entries)
+        assert status == 202
+        ids = [job["id"] for job in payload["jobs"]]
+        deadline = time.monotonic() + 180
+        while time.monotonic() < deadline and not all(server.jobs[i].state in TERMINAL_STATES for i in ids):
+            await asyncio.sleep(0.1)
+        ok_job, crash_job, wake_job = (server.jobs[i] for i in ids)
+        assert (ok_job.state, crash_job.state, wake_job.state) == ("done", "failed", "done"), \
+            [(job.state, job.error) for job in (ok_job, crash_job, wake_job)]
+        assert "аварійно" in crash_job.error
+        assert ok_job.crash_attempts == 1 # Був у пулі під час аварії й перезапускався окремо
+    _with_server(tmp_path, check, workers=3, job_runner=crashing_runner)
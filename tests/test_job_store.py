@@ -0,0 +1,79 @@
+# tests/test_job_store.py
+# Сховище завдань з відновленням і повторний запуск process_video_task_resumable: готові сегменти
+# пропускаються, а сегмент, позначений готовим, але без файлу результату, кодується знову.
+import os
+import re
+
+import pytest
+
+from app_logic import job_options, resumable_encode
+from app_logic.job_store import JobStore
+from app_logic.media_probe import probe_media
+from app_logic.resumable_encode import process_video_task_resumable
+from conftest import make_test_clip, noop
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.sqlite3"))
+
+@pytest.fixture
+def input_file(tmp_path):
+    path = tmp_path / "input.mp4"
+    path.write_bytes(b"source" * 1000)
+    return str(path)
+
+def test_find_or_create_is_stable_for_same_job(store, input_file, tmp_path):
+    options = job_options.resolve_options(None, {"bw_filter_active": True})
+    job = store.find_or_create(input_file, str(tmp_path), options)
+    assert job["state"] == "queued"
+    assert store.find_or_create(input_file, str(tmp_path), dict(options))["id"] == job["id"]
+    assert store.find_or_create(input_file, str(tmp_path / "other"), options)["id"] != job["id"]
+    assert store.find_or_create(input_file, str(tmp_path), dict(options, bw_filter_active=False))["id"] != job["id"]
+    assert len(store.list_jobs()) == 3
+
+def test_set_segments_replaces_previous_rows(store, input_file, tmp_path):
+    job_id = store.find_or_create(input_file, str(tmp_path), {})["id"]
+    store.set_segments(job_id, ["a.mp4", "b.mp4", "c.mp4"])
+    store.mark_segment(job_id, 1, "done", "b_out.mp4")
+    store.set_segments(job_id, ["x.mp4", "y.mp4"])
+    segments = store.segments(job_id)
+    assert [(s["idx"], s["source_path"], s["state"], s["output_path"]) for s in segments] == \
+        [(0, "x.mp4", "pending", None), (1, "y.mp4", "pending", None)]
+    assert store.get(job_id)["split_done"] == 1
+
+def _ready_segments(statuses):
+    """ Номери сегментів (з 1), про готовність яких повідомив запуск. """
+    return {int(m.group(1)) for m in (re.match(r"Сегмент (\d+)/\d+ готовий", s) for s in statuses) if m}
+
+def test_rerun_skips_done_segments_and_reencodes_missing(store, tmp_path, ffmpeg_available, monkeypatch):
+    monkeypatch.setattr(resumable_encode, "RESUME_SEGMENT_SECONDS", 1.0)
+    input_path = make_test_clip(tmp_path / "long.mp4", duration=4.0)
+    output_folder = str(tmp_path / "out")
+    os.makedirs(output_folder)
+    options = job_options.resolve_options(None, {"engine": "ffmpeg", "resumable": True})
+
+    # Перша спроба "падає" після двох готових сегментів
+    statuses = []
+    def _cancel_after_two():
+        return len(_ready_segments(statuses)) >= 2
+    assert process_video_task_resumable(input_path, output_folder, options, statuses.append, noop,
+                                        _cancel_after_two, store=store) is None
+    job_id = store.find_or_create(input_path, output_folder, options)["id"]
+    assert store.get(job_id)["state"] == "cancelled"
+    segments = store.segments(job_id)
+    assert len(segments) == 4
+    done = [s for s in segments if s["state"] == "done"]
+    assert len(done) >= 2
+    lost = done[0] # Позначений готовим, але файл результату зник
+    os.remove(lost["output_path"])
+
+    statuses = []
+    output_path = process_video_task_resumable(input_path, output_folder, options, statuses.append, noop,
+                                               lambda: False, store=store)
+    assert output_path and os.path.isfile(output_path)
+    kept = {s["idx"] + 1 for s in done if s is not lost}
+    assert f"Відновлення: {len(kept)} з 4 сегментів уже готові, кодуються лише {4 - len(kept)}." in statuses
+    assert _ready_segments(statuses) == {1, 2, 3, 4} - kept
+    assert lost["idx"] + 1 in _ready_segments(statuses)
+    assert store.get(job_id)["state"] == "done"
+    assert abs(probe_media(output_path, use_cache=False).duration - 4.0) < 0.2
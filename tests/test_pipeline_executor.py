@@ -0,0 +1,86 @@
+# tests/test_pipeline_executor.py
+# Конвеєр у трьох потоках: порядок кадрів зберігається, помилка етапу доходить до run() і зупиняє решту,
+# скасування посеред потоку не блокується на повних чергах.
+import itertools
+import random
+import threading
+import time
+
+import pytest
+
+from app_logic.pipeline_executor import PipelinedExecutor
+from app_logic.video_processor import ProcessingCancelledError
+
+RUN_TIMEOUT = 30.0
+
+def _counter_source(limit=None):
+    counter = itertools.count()
+    calls = []
+    def source():
+        value = next(counter)
+        calls.append(value)
+        return None if limit is not None and value >= limit else value
+    return source, calls
+
+def _run_with_timeout(executor):
+    """ run() в окремому потоці: якщо конвеєр заблокувався, тест падає, а не зависає. """
+    outcome = {}
+    def _target():
+        try:
+            outcome["metrics"] = executor.run()
+        except BaseException as e:
+            outcome["error"] = e
+    thread = threading.Thread(target=_target, daemon=True)
+    thread.start()
+    thread.join(RUN_TIMEOUT)
+    assert not thread.is_alive(), "PipelinedExecutor.run() заблокувався"
+    return outcome
+
+def _pipeline_threads():
+    return [thread for thread in threading.enumerate() if thread.name.startswith("pipeline-")]
+
+def test_frame_order_is_preserved():
+    source, _ = _counter_source(limit=500)
+    rng = random.Random(0)
+    def transform(item):
+        if rng.random() < 0.05:
+            time.sleep(0.001)
+        return item * 2
+    received = []
+    outcome = _run_with_timeout(PipelinedExecutor(source, transform, received.append, queue_depth=3))
+    assert "error" not in outcome
+    assert received == [i * 2 for i in range(500)]
+    metrics = outcome["metrics"]
+    assert [metrics.stages[name].items for name in ("decode", "filter", "encode")] == [500, 500, 500]
+    assert metrics.queues["decode>filter"].max_depth <= 3
+
+@pytest.mark.parametrize("failing_stage", ["filter", "encode"])
+def test_stage_error_reaches_caller_and_stops_other_stages(failing_stage):
+    source, calls = _counter_source()
+    def transform(item):
+        if failing_stage == "filter" and item == 50:
+            raise ValueError("filter failed")
+        return item
+    def sink(item):
+        if failing_stage == "encode" and item == 50:
+            raise ValueError("encode failed")
+    queue_depth = 4
+    outcome = _run_with_timeout(PipelinedExecutor(source, transform, sink, queue_depth=queue_depth))
+    assert isinstance(outcome.get("error"), ValueError)
+    assert str(outcome["error"]) == f"{failing_stage} failed"
+    assert not _pipeline_threads()
+    # Нескінченне джерело зупинилося: не далі, ніж дозволяють дві обмежені черги
+    assert len(calls) <= 50 + 2 * queue_depth + 3
+
+def test_cancel_mid_stream_does_not_deadlock():
+    source, calls = _counter_source()
+    received = []
+    def slow_sink(item):
+        time.sleep(0.002) # Повільне кодування: обидві черги заповнені, джерело чекає на місце
+        received.append(item)
+    outcome = _run_with_timeout(PipelinedExecutor(source, lambda item: item, slow_sink, queue_depth=2,
+                                                  monitor=lambda items_done: items_done >= 20, poll_interval=0.01))
+    assert isinstance(outcome.get("error"), ProcessingCancelledError)
+    assert not _pipeline_threads()
+    assert received == list(range(len(received)))
+    assert len(received) >= 20
@@ -0,0 +1,39 @@
+# tests/test_raw_pipes.py
+# Канали FFmpeg рушія "pipes": непарний розмір кадру кодується (yuv444p), помилка декодера до кінця потоку
+# не губиться, а зупинка декодера при скасуванні помилкою не вважається.
+import numpy as np
+import pytest
+
+from app_logic.ffmpeg_backend import FfmpegEngineError
+from app_logic.media_probe import probe_media
+from app_logic.raw_pipes import RawFrameReader, RawFrameWriter
+
+def test_writer_encodes_odd_size(tmp_path, ffmpeg_available):
+    output_path = str(tmp_path / "odd.mp4")
+    writer = RawFrameWriter(output_path, (161, 121), 25.0)
+    frame = np.zeros((121, 161, 3), dtype=np.uint8)
+    for i in range(10):
+        frame[:] = i * 20
+        writer.write(frame)
+    writer.close()
+    assert probe_media(output_path).size == (161, 121)
+
+def test_reader_reads_to_end_without_error(sample_clip):
+    with RawFrameReader(sample_clip, (160, 120)) as reader:
+        frames = sum(1 for _ in reader)
+    assert frames == 25
+
+def test_reader_raises_when_decoder_dies_mid_stream(sample_clip):
+    reader = RawFrameReader(sample_clip, (160, 120), decoder_args=["-re"])
+    assert reader.read() is not None
+    reader.proc.kill() # Збій декодера після кількох кадрів
+    while reader.read() is not None:
+        pass
+    with pytest.raises(FfmpegEngineError):
+        reader.close()
+
+def test_reader_stopped_early_is_not_an_error(sample_clip):
+    reader = RawFrameReader(sample_clip, (160, 120), decoder_args=["-re"])
+    assert reader.read() is not None
+    reader.close() # Скасування: декодер зупиняється до кінця потоку
+    reader.close()
@@ -0,0 +1,61 @@
+# tests/test_result_cache.py
+# Кеш результатів: повторне детерміноване завдання береться з кешу, випадковий шум "Унік" без noise_seed - ні.
+import os
+
+from app_logic.result_cache import ResultCache, is_deterministic
+from conftest import noop, never_cancelled
+
+class _Producer:
+    """ Замість справжньої обробки записує у вихідну папку файл з порядковим номером запуску. """
+
+    def __init__(self, input_path, output_folder):
+        self.input_path = input_path
+        self.output_folder = output_folder
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        stem = os.path.splitext(os.path.basename(self.input_path))[0]
+        output_path = os.path.join(self.output_folder, f"{stem}_uniq.mp4")
+        with open(output_path, "wb") as f:
+            f.write(f"run {self.calls}".encode("ascii"))
+        return output_path
+
+def _run(cache, input_path, output_folder, options, produce, statuses):
+    return cache.run(input_path, output_folder, options, statuses.append, noop, never_cancelled, produce)
+
+def _setup(tmp_path):
+    input_path = tmp_path / "clip.mp4"
+    input_path.write_bytes(b"source" * 1000)
+    output_folder = tmp_path / "out"
+    output_folder.mkdir()
+    cache = ResultCache(cache_dir=str(tmp_path / "cache"))
+    return cache, str(input_path), str(output_folder)
+
+def test_deterministic_job_is_reused(tmp_path):
+    cache, input_path, output_folder = _setup(tmp_path)
+    produce = _Producer(input_path, output_folder)
+    statuses = []
+    options = {"uniek_filter_active": True, "noise_seed": 7}
+    first = _run(cache, input_path, output_folder, options, produce, statuses)
+    assert statuses[-1] == f"Відео успішно збережено: {first}"
+    second = _run(cache, input_path, output_folder, options, produce, statuses)
+    assert produce.calls == 1
+    assert second == first
+    assert "з кешу" in statuses[-1]
+
+def test_random_noise_is_not_cached(tmp_path):
+    cache, input_path, output_folder = _setup(tmp_path)
+    produce = _Producer(input_path, output_folder)
+    options = {"uniek_filter_active": True}
+    assert not is_deterministic(options)
+    for _ in range(2):
+        output_path = _run(cache, input_path, output_folder, options, produce, [])
+    assert produce.calls == 2
+    with open(output_path, "rb") as f:
+        assert f.read() == b"run 2"
+    assert cache.entries() == []
+
+def test_uniek_without_noise_is_deterministic():
+    assert is_deterministic({})
+    assert is_deterministic({"uniek_filter_active": True, "uniek_params": {"noise_sigma": 0}})
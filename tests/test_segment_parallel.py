@@ -0,0 +1,55 @@
+# tests/test_segment_parallel.py
+# Паралельне кодування сегментами: кількість сегментів, опції окремого сегмента і склеювання шляхів з апострофом.
+import os
+
+import pytest
+
+from app_logic import segment_parallel
+from app_logic.media_probe import probe_media
+from app_logic.segment_parallel import (MIN_SEGMENT_SECONDS, concat_segments, resolve_segment_count,
+                                        segment_job_options, split_at_keyframes)
+from conftest import make_test_clip, never_cancelled
+
+@pytest.mark.parametrize("requested,duration,expected", [
+    (4, 120.0, 4),
+    ("3", 120.0, 3),
+    (8, 25.0, 2), # Не коротші за MIN_SEGMENT_SECONDS
+    (4, MIN_SEGMENT_SECONDS - 1, 1), # Закоротке відео - один сегмент
+    (4, None, 1),
+    (4, 0, 1),
+    ("abc", 120.0, 1),
+    (None, 120.0, 1),
+    (0, 120.0, 1),
+    (-3, 120.0, 1),
+])
+def test_resolve_segment_count(requested, duration, expected):
+    assert resolve_segment_count(requested, duration) == expected
+
+def test_resolve_segment_count_auto_uses_half_the_cores(monkeypatch):
+    monkeypatch.setattr(segment_parallel.os, "cpu_count", lambda: 8)
+    assert resolve_segment_count("auto", 600.0) == 4
+    assert resolve_segment_count("auto", 25.0) == 2
+    monkeypatch.setattr(segment_parallel.os, "cpu_count", lambda: None)
+    assert resolve_segment_count("auto", 600.0) == 1
+
+def test_segment_job_options_drop_recursive_keys_and_shift_seed():
+    options = {"segment_parallel": "auto", "resumable": True, "use_result_cache": True,
+               "noise_seed": 10, "bw_filter_active": True}
+    segment_options = segment_job_options(options, 3)
+    assert segment_options == {"noise_seed": 13, "bw_filter_active": True}
+    assert options["noise_seed"] == 10 and "segment_parallel" in options # Вихідні опції не змінюються
+    assert "noise_seed" not in segment_job_options({"uniek_filter_active": True}, 2)
+
+def test_concat_segments_quotes_apostrophe_in_path(tmp_path, ffmpeg_available):
+    work_dir = tmp_path / "it's here"
+    work_dir.mkdir()
+    input_path = make_test_clip(work_dir / "o'clock.mp4", duration=3.0, with_audio=False)
+    segments = split_at_keyframes(input_path, 3, 3.0, str(work_dir), never_cancelled)
+    assert len(segments) == 3
+    output_path = str(work_dir / "joined.mp4")
+    concat_segments(segments, None, output_path, str(work_dir), never_cancelled)
+
+    with open(work_dir / "concat_list.txt", encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == "file '" + os.path.abspath(segments[0]).replace("'", "'\\''") + "'"
+    assert abs(probe_media(output_path, use_cache=False).duration - 3.0) < 0.2
@@ -0,0 +1,54 @@
+# tests/test_shared_queue.py
+# Черга на спільній файловій системі: кілька процесів-воркерів над однією папкою виконують кожне завдання
+# рівно один раз, навіть якщо завдання чекали в pending довше за lease_seconds.
+import multiprocessing
+import os
+import time
+
+from app_logic.shared_queue import SharedJobQueue, run_queue_worker
+
+WORKERS = 4
+JOBS = 24
+LEASE_SECONDS = 1.0
+
+def touch_runner(input_path, output_folder, options, status_callback, progress_callback, check_if_cancelled_callback):
+    """ Замість обробки відео: коротка пауза і порожній файл результату. """
+    time.sleep(0.05)
+    output_path = os.path.join(output_folder, os.path.basename(input_path) + ".out")
+    with open(output_path, "w"):
+        pass
+    return output_path
+
+def _worker_process(root, worker_id, results):
+    results.put((worker_id, run_queue_worker(root, worker_id=worker_id, exit_when_empty=True, poll_interval=0.1,
+                                             lease_seconds=LEASE_SECONDS, job_runner=touch_runner)))
+
+def test_workers_process_each_stale_job_once(tmp_path):
+    root = str(tmp_path / "queue")
+    output_folder = str(tmp_path / "out")
+    queue = SharedJobQueue(root, lease_seconds=LEASE_SECONDS)
+    for i in range(JOBS):
+        queue.submit(f"input_{i:02d}.mp4", output_folder, {})
+    # Завдання чекали в черзі значно довше за оренду
+    stale = time.time() - 3600
+    pending = os.path.join(root, "pending")
+    for name in os.listdir(pending):
+        os.utime(os.path.join(pending, name), (stale, stale))
+
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    processes = [ctx.Process(target=_worker_process, args=(root, f"worker{i}", results)) for i in range(WORKERS)]
+    for process in processes:
+        process.start()
+    counts = [results.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join(timeout=10)
+        assert process.exitcode == 0
+
+    assert sum(succeeded for _, (succeeded, _) in counts) == JOBS
+    assert sum(failed for _, (_, failed) in counts) == 0
+    assert queue.counts() == {"pending": 0, "leased": 0, "done": JOBS, "failed": 0}
+    for state, job in (queue.find(job_id) for job_id in (name[:-len(".json")] for name in queue._list("done"))):
+        assert state == "done"
+        assert "history" not in job # Жодна оренда не прострочилася
+    assert len(os.listdir(output_folder)) == JOBS
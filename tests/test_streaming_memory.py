@@ -0,0 +1,25 @@
+# tests/test_streaming_memory.py
+# Потоковий режим (options['memory_budget_mb']): пікова пам'ять процесу обробки й FFmpeg не зростає
+# з тривалістю відео. Та сама перевірка, що й benchmarks/bench_streaming_memory.py, на коротких кліпах 480p.
+import sys
+
+import pytest
+
+from conftest import project_root
+
+if str(project_root / "benchmarks") not in sys.path:
+    sys.path.insert(0, str(project_root / "benchmarks"))
+
+from bench_streaming_memory import check_flat, run_memory_benchmark
+
+DURATIONS = (2.0, 8.0)
+BUDGET_MB = 200
+THRESHOLD = 0.15
+
+@pytest.mark.slow
+def test_peak_rss_does_not_grow_with_duration(tmp_path_factory, ffmpeg_available):
+    results = run_memory_benchmark("480p", DURATIONS, ["streaming"], BUDGET_MB, {},
+                                   media_dir=str(tmp_path_factory.mktemp("streaming_media")), log=lambda line: None)
+    assert all(r.get("success") for r in results), [r.get("error") for r in results]
+    lines, passed = check_flat(results, "streaming", THRESHOLD)
+    assert passed, "\n".join(lines)
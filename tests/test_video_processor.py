@@ -0,0 +1,14 @@
+# tests/test_video_processor.py
+# process_video_task повертає шлях або None: несподівана помилка рушія лише повідомляється через status_callback.
+from app_logic import ffmpeg_backend, job_options
+from app_logic.video_processor import process_video_task
+from conftest import never_cancelled, noop
+
+def test_unexpected_engine_error_returns_none(sample_clip, tmp_path, monkeypatch):
+    def _failing_engine(*args, **kwargs):
+        raise PermissionError("output folder is read-only")
+    monkeypatch.setattr(ffmpeg_backend, "process_video_task_ffmpeg", _failing_engine)
+    statuses = []
+    options = job_options.resolve_options(None, {"engine": "ffmpeg"})
+    assert process_video_task(sample_clip, str(tmp_path), options, statuses.append, noop, never_cancelled) is None
+    assert "PermissionError" in statuses[-1]
@@ -0,0 +1,50 @@
+# tests/test_watch_folder.py
+# Демон вхідної папки: аварія воркера не позначає failed файли, що оброблялися поруч.
+import os
+import shutil
+import threading
+import time
+
+from app_logic import job_options
+from app_logic.watch_folder import WatchConfig, WatchFolderDaemon, WatchLedger, file_key
+from test_batch_processor import CRASH_MARKER, SLOW_MARKER, WAKE_MARKER, crashing_runner
+
+def _run_until(daemon, stop_event, condition, timeout=180):
+    thread = threading.Thread(target=daemon.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline and not condition():
+        time.sleep(0.1)
+    stop_event.set()
+    thread.join(timeout=60)
+    assert not thread.is_alive()
+
+def test_crash_fails_only_the_crashing_file(sample_clip, tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    ok_path = inbox / f"a_{SLOW_MARKER}ok.mp4"
+    shutil.copy(sample_clip, ok_path)
+    crash_path = inbox / f"b_{CRASH_MARKER}.mp4"
+    crash_path.write_bytes(b"not a video")
+    wake_path = inbox / f"c_{WAKE_MARKER}.mp4"
+    shutil.copy(sample_clip, wake_path)
+    ok_key = file_key(str(ok_path))
+    config = WatchConfig(inbox=str(inbox), output_folder=str(tmp_path / "out"),
+                         options=job_options.resolve_options(None, {"engine": "ffmpeg"}),
+                         workers=3, poll_interval=0.1, stable_seconds=0)
+    stop_event = threading.Event()
+    events = []
+    daemon = WatchFolderDaemon(config, lambda event, **fields: events.append((event, fields)), stop_event,
+                               job_runner=crashing_runner)
+    _run_until(daemon, stop_event, lambda: daemon.processed + daemon.failed >= 3)
+
+    assert (daemon.processed, daemon.failed) == (2, 1)
+    retried = {fields.get("input") for event, fields in events if event == "status" and "повторно окремо" in fields["message"]}
+    assert {str(ok_path), str(crash_path)} <= retried # Обидва файли були в пулі, коли воркер упав
+    assert os.path.isfile(os.path.join(config.done_folder, ok_path.name))
+    assert os.path.isfile(os.path.join(config.failed_folder, crash_path.name))
+    ledger = WatchLedger(config.ledger_path)
+    try:
+        assert ledger.status(ok_key) == "done"
+    finally:
+        ledger.close()
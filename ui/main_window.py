@@ -2,19 +2,23 @@
 import os
 from pathlib import Path
 from PySide6.QtWidgets import (
-    QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
+    QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout,
     QPushButton, QLabel, QLineEdit, QCheckBox, QProgressBar, QComboBox,
     QFileDialog, QMessageBox, QSizePolicy, QSpacerItem, QGroupBox
 )
-from PySide6.QtCore import Qt, Slot, Signal, QThread
-from PySide6.QtGui import QIcon
+from PySide6.QtCore import Qt, Slot, Signal, QThread, QTimer
+from PySide6.QtGui import QIcon, QImage, QPixmap
 
-from moviepy.editor import VideoFileClip
-from app_logic.video_processor import process_video_task 
+from app_logic import job_options
+from app_logic.encode_progress import format_eta
+from app_logic.media_probe import probe_media
+# app_logic.preview (NumPy, Pillow) і app_logic.video_processor (MoviePy) імпортуються в потоках
+# попереднього перегляду та обробки, щоб не затримувати появу вікна
 
 class VideoProcessingThread(QThread):
     status_updated = Signal(str)
     progress_updated = Signal(int) 
+    progress_details_updated = Signal(str) # Кадри, fps та залишок часу під час кодування
     processing_finished = Signal(bool, str) 
 
     def __init__(self, input_path, output_folder, options):
@@ -26,10 +30,17 @@ class VideoProcessingThread(QThread):
 
     def run(self):
         try:
+            from app_logic.video_processor import process_video_task
             def _emit_status(message):
                 if not self.is_cancelled_flag: self.status_updated.emit(message)
-            def _emit_progress(value_0_to_1):
-                if not self.is_cancelled_flag: self.progress_updated.emit(int(value_0_to_1 * 100))
+            def _emit_progress(value_0_to_1, details=None):
+                if self.is_cancelled_flag: return
+                self.progress_updated.emit(int(value_0_to_1 * 100))
+                if details:
+                    fps_text = f"{details['fps']:.1f} к/с" if details.get("fps") else "-- к/с"
+                    self.progress_details_updated.emit(
+                        f"{details['frames_done']}/{details['total_frames']} кадрів, {fps_text}, "
+                        f"залишилось {format_eta(details.get('eta'))}")
             def _check_if_cancelled():
                 return self.is_cancelled_flag
 
@@ -38,6 +49,8 @@ class VideoProcessingThread(QThread):
                 _emit_status, _emit_progress, _check_if_cancelled
             )
 
+            if isinstance(output_filepath, list): # Fan-out повертає шлях для кожного пресету
+                output_filepath = "\n".join(output_filepath)
             if self.is_cancelled_flag: self.processing_finished.emit(False, "Обробку скасовано користувачем.")
             elif output_filepath: self.processing_finished.emit(True, output_filepath)
             else: self.processing_finished.emit(False, "Не вдалося обробити відео (невідома помилка в завданні).")
@@ -52,24 +65,63 @@ class VideoProcessingThread(QThread):
         self.status_updated.emit("Спроба скасувати обробку...")
         self.is_cancelled_flag = True
 
+class MediaProbeThread(QThread):
+    """ Отримує медіа-інформацію (ffprobe + кеш на диску) поза потоком GUI. """
+    probe_finished = Signal(object)
+    probe_failed = Signal(str, str)
+
+    def __init__(self, filepath):
+        super().__init__()
+        self.filepath = filepath
+
+    def run(self):
+        try:
+            self.probe_finished.emit(probe_media(self.filepath))
+        except Exception as e:
+            self.probe_failed.emit(self.filepath, f"Помилка завантаження медіа-інфо: {type(e).__name__} - {e}")
+
+class PreviewThread(QThread):
+    """ Рендерить проксі-кадр (або коротке вікно) поза потоком GUI; кадри джерела беруться з LRU-кешу. """
+    preview_ready = Signal(str, list)
+    preview_failed = Signal(str, str)
+
+    def __init__(self, filepath, options, window_duration=None):
+        super().__init__()
+        self.filepath = filepath
+        self.options = options
+        self.window_duration = window_duration
+
+    @staticmethod
+    def _to_qimage(frame):
+        height, width = frame.shape[:2]
+        # copy(): QImage не повинен посилатися на пам'ять масиву NumPy після виходу з потоку
+        return QImage(frame.data, width, height, frame.strides[0], QImage.Format.Format_RGB888).copy()
+
+    def run(self):
+        try:
+            from app_logic.preview import PreviewRenderer
+            renderer = PreviewRenderer(self.filepath)
+            if self.window_duration:
+                frames = renderer.render_window(self.options, duration=self.window_duration)
+            else:
+                frames = [renderer.render_frame(self.options)]
+            self.preview_ready.emit(self.filepath, [self._to_qimage(frame) for frame in frames])
+        except Exception as e:
+            self.preview_failed.emit(self.filepath, f"Помилка попереднього перегляду: {type(e).__name__} - {e}")
+
 class MainWindow(QMainWindow):
-    PRESET_SETTINGS = {
-        'tiktok_reels': {'width': "1080", 'height': "1920", 'resize_active': True, 'bw_filter_active': False, 'uniek_filter_active': False, 'name': "TikTok/Reels (1080x1920)"},
-        'instagram_portrait': {'width': "1080", 'height': "1350", 'resize_active': True, 'bw_filter_active': False, 'uniek_filter_active': False, 'name': "Instagram Портрет (1080x1350)"},
-        'instagram_square': {'width': "1080", 'height': "1080", 'resize_active': True, 'bw_filter_active': False, 'uniek_filter_active': False, 'name': "Instagram Квадрат (1080x1080)"},
-        'youtube_1080p': {'width': "1920", 'height': "1080", 'resize_active': True, 'bw_filter_active': False, 'uniek_filter_active': False, 'name': "YouTube 1080p (1920x1080)"},
-        'youtube_720p': {'width': "1280", 'height': "720", 'resize_active': True, 'bw_filter_active': False, 'uniek_filter_active': False, 'name': "YouTube 720p (1280x720)"},
-    }
-    DEFAULT_OPTIONS = {
-        'resize_active': False, 'width': "1280", 'height': "720",
-        'bw_filter_active': False,
-        'uniek_filter_active': False,
-        'rotation_angle': 0, 
-        'flip_h_active': False, 
-        'flip_v_active': False, 
-    }
+    PRESET_SETTINGS = job_options.PRESET_SETTINGS
+    DEFAULT_OPTIONS = job_options.DEFAULT_OPTIONS
     ROTATION_MAP = { "Без повороту": 0, "90° за годинниковою": -90, "180°": 180, "90° проти годинникової": 90 }
     ROTATION_MAP_INV = {v: k for k, v in ROTATION_MAP.items()}
+    ENGINE_MAP = {
+        "MoviePy (стандартний)": "moviepy",
+        "MoviePy + злитий покадровий конвеєр": "fused",
+        "MoviePy + конвеєр OpenCV": "opencv",
+        "Канали FFmpeg + конвеєр (мало пам'яті)": "pipes",
+        "FFmpeg filtergraph (швидкий)": "ffmpeg",
+    }
+    ENGINE_MAP_INV = {v: k for k, v in ENGINE_MAP.items()}
 
     def __init__(self):
         super().__init__()
@@ -83,6 +135,11 @@ class MainWindow(QMainWindow):
         self._init_ui()
         self.reset_all_options(show_status=False) 
         self.processing_thread = None 
+        self.media_probe_threads = set()
+        self.preview_threads = set()
+        self.preview_frames = []
+        self.preview_frame_index = 0
+        self._latest_preview_thread = None
 
     def _init_ui(self):
         central_widget = QWidget(self)
@@ -125,7 +182,32 @@ class MainWindow(QMainWindow):
         media_info_grid.addWidget(self.info_duration_label)
         media_info_grid.addWidget(self.info_fps_label)
         media_info_layout_main.addLayout(media_info_grid)
-        main_layout.addWidget(self.media_info_group)
+        media_info_layout_main.addStretch(1)
+
+        # Попередній перегляд у проксі-роздільній здатності (оновлюється при зміні опцій)
+        preview_group = QGroupBox("Попередній перегляд")
+        preview_layout = QVBoxLayout(preview_group)
+        self.preview_label = QLabel("Оберіть відео для попереднього перегляду")
+        self.preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.preview_label.setMinimumSize(320, 180)
+        preview_layout.addWidget(self.preview_label)
+        self.btn_preview_window = QPushButton("Програти 2 с з ефектами")
+        self.btn_preview_window.clicked.connect(lambda: self.refresh_preview(window_duration=2.0))
+        preview_layout.addWidget(self.btn_preview_window)
+
+        media_and_preview_layout = QHBoxLayout()
+        media_and_preview_layout.addWidget(self.media_info_group, 1)
+        media_and_preview_layout.addWidget(preview_group, 1)
+        main_layout.addLayout(media_and_preview_layout)
+
+        # Перемальовування з невеликою затримкою, щоб застосування пресету (кілька змін поспіль) давало один рендер
+        self.preview_debounce_timer = QTimer(self)
+        self.preview_debounce_timer.setSingleShot(True)
+        self.preview_debounce_timer.setInterval(150)
+        self.preview_debounce_timer.timeout.connect(self.refresh_preview)
+        self.preview_playback_timer = QTimer(self)
+        self.preview_playback_timer.setInterval(100) # PREVIEW_WINDOW_FPS = 10
+        self.preview_playback_timer.timeout.connect(self.show_next_preview_frame)
         
         # --- Горизонтальний макет для пресетів та детальних опцій ---
         presets_and_options_HLayout = QHBoxLayout()
@@ -155,6 +237,9 @@ class MainWindow(QMainWindow):
         btn_reset_options.clicked.connect(self.reset_all_options)
         presets_grid_layout.addWidget(btn_reset_options, 1, 2) 
         presets_main_layout.addLayout(presets_grid_layout)
+        # Fan-out: усі пресети з одного декодування (поточні фільтри спільні, пресет задає лише розмір)
+        self.cb_fanout_all = QCheckBox("Обробити для всіх пресетів за один прохід")
+        presets_main_layout.addWidget(self.cb_fanout_all)
         presets_main_layout.addStretch(1) # Додаємо розтягувач, щоб кнопки не розтягувалися на всю висоту групи
         
         presets_and_options_HLayout.addWidget(presets_group) # Додаємо групу пресетів до горизонтального макету
@@ -199,6 +284,28 @@ class MainWindow(QMainWindow):
         self.cb_flip_v = QCheckBox("Дзеркально по вертикалі")
         transform_layout.addWidget(self.cb_flip_v)
         options_layout.addWidget(transform_group) 
+
+        # Вибір рушія обробки
+        engine_layout = QHBoxLayout()
+        engine_layout.addWidget(QLabel("Рушій обробки:"))
+        self.engine_combobox = QComboBox()
+        self.engine_combobox.addItems(list(self.ENGINE_MAP.keys()))
+        engine_layout.addWidget(self.engine_combobox)
+        options_layout.addLayout(engine_layout)
+        # Діагностика: профіль етапів у <папка збереження>/profiles (Chrome trace + зведена таблиця)
+        self.cb_profile = QCheckBox("Профілювання етапів (Chrome trace)")
+        options_layout.addWidget(self.cb_profile)
+        # Повторне завдання з тим самим файлом і опціями береться з кешу результатів без кодування
+        self.cb_result_cache = QCheckBox("Кеш результатів (не обробляти повторно)")
+        options_layout.addWidget(self.cb_result_cache)
+        # Кодування сегментами зі станом у базі завдань: після збою програми обробка продовжується з готових сегментів
+        self.cb_resumable = QCheckBox("Відновлювати перервану обробку (сегментами)")
+        options_layout.addWidget(self.cb_resumable)
+        for checkbox in (self.cb_resize, self.cb_bw_filter, self.cb_uniek_filter, self.cb_flip_h, self.cb_flip_v):
+            checkbox.toggled.connect(self.schedule_preview)
+        self.rotation_combobox.currentTextChanged.connect(self.schedule_preview)
+        self.le_width.editingFinished.connect(self.schedule_preview)
+        self.le_height.editingFinished.connect(self.schedule_preview)
         options_layout.addStretch(1) # Додаємо розтягувач, щоб опції не розтягувалися на всю висоту групи
         
         presets_and_options_HLayout.addWidget(options_group) # Додаємо групу опцій до горизонтального макету
@@ -255,31 +362,84 @@ class MainWindow(QMainWindow):
             self.status_label.setText(f"Папку для збереження змінено на: {foldername}")
 
     def load_media_info(self, filepath):
+        """ Запускає ffprobe у фоновому потоці; повторний вибір того самого файлу береться з кешу миттєво. """
         self.status_label.setText(f"Завантаження інформації про {os.path.basename(filepath)}...")
-        QApplication.processEvents() 
-        try:
-            print(f"DEBUG: Завантаження медіа-інфо для: {filepath}")
-            clip = VideoFileClip(filepath)
-            self.info_filename_label.setText(f"Файл: {os.path.basename(filepath)}")
-            if clip.size: 
-                self.info_resolution_label.setText(f"Роздільна здатність: {clip.size[0]}x{clip.size[1]}")
-            else:
-                self.info_resolution_label.setText("Роздільна здатність: невідомо")
-            self.info_duration_label.setText(f"Тривалість: {clip.duration:.2f} сек")
-            self.info_fps_label.setText(f"FPS: {clip.fps:.2f}")
-            clip.close() 
-            self.status_label.setText(f"Медіа-інформацію для '{os.path.basename(filepath)}' завантажено.")
-            print(f"DEBUG: Медіа-інфо завантажено: Розмір={self.info_resolution_label.text()}, Трив={self.info_duration_label.text()}, FPS={self.info_fps_label.text()}")
-        except Exception as e:
-            self.info_filename_label.setText(f"Файл: {os.path.basename(filepath)}")
-            self.info_resolution_label.setText("Роздільна здатність: Помилка")
-            self.info_duration_label.setText("Тривалість: Помилка")
-            self.info_fps_label.setText("FPS: Помилка")
-            error_msg = f"Помилка завантаження медіа-інфо: {type(e).__name__} - {e}"
-            self.status_label.setText(error_msg)
-            print(f"ERROR: {error_msg}")
-            import traceback
-            traceback.print_exc() 
+        probe_thread = MediaProbeThread(filepath)
+        probe_thread.probe_finished.connect(self.on_media_info_loaded)
+        probe_thread.probe_failed.connect(self.on_media_info_failed)
+        # Тримаємо посилання, доки потік не завершиться (попередній може ще працювати)
+        probe_thread.finished.connect(lambda t=probe_thread: self.media_probe_threads.discard(t))
+        self.media_probe_threads.add(probe_thread)
+        probe_thread.start()
+
+    @Slot(object)
+    def on_media_info_loaded(self, info):
+        if info.path != self.current_input_file:
+            return # Користувач уже обрав інший файл
+        self.info_filename_label.setText(f"Файл: {os.path.basename(info.path)}")
+        if info.width and info.height:
+            self.info_resolution_label.setText(f"Роздільна здатність: {info.width}x{info.height}")
+        else:
+            self.info_resolution_label.setText("Роздільна здатність: невідомо")
+        self.info_duration_label.setText(f"Тривалість: {info.duration:.2f} сек" if info.duration else "Тривалість: невідомо")
+        self.info_fps_label.setText(f"FPS: {info.fps:.2f}" if info.fps else "FPS: невідомо")
+        self.status_label.setText(f"Медіа-інформацію для '{os.path.basename(info.path)}' завантажено.")
+        self.schedule_preview()
+
+    def schedule_preview(self, *args):
+        if self.current_input_file:
+            self.preview_debounce_timer.start()
+
+    def refresh_preview(self, window_duration=None):
+        """ Запускає рендер у фоновому потоці; результат застарілих запитів відкидається в on_preview_ready. """
+        if not self.current_input_file:
+            return
+        self.preview_playback_timer.stop()
+        preview_thread = PreviewThread(self.current_input_file, self._collect_options(), window_duration)
+        preview_thread.preview_ready.connect(self.on_preview_ready)
+        preview_thread.preview_failed.connect(self.on_preview_failed)
+        preview_thread.finished.connect(lambda t=preview_thread: self.preview_threads.discard(t))
+        self.preview_threads.add(preview_thread)
+        self._latest_preview_thread = preview_thread
+        preview_thread.start()
+
+    @Slot(str, list)
+    def on_preview_ready(self, filepath, images):
+        if filepath != self.current_input_file or self.sender() is not self._latest_preview_thread:
+            return # Опції або файл уже змінилися
+        self.preview_frames = images
+        self.preview_frame_index = 0
+        self.show_next_preview_frame()
+        if len(images) > 1:
+            self.preview_playback_timer.start()
+
+    @Slot()
+    def show_next_preview_frame(self):
+        if self.preview_frame_index >= len(self.preview_frames):
+            self.preview_playback_timer.stop()
+            return
+        pixmap = QPixmap.fromImage(self.preview_frames[self.preview_frame_index])
+        self.preview_label.setPixmap(pixmap.scaled(self.preview_label.size(), Qt.AspectRatioMode.KeepAspectRatio,
+                                                   Qt.TransformationMode.SmoothTransformation))
+        self.preview_frame_index += 1
+
+    @Slot(str, str)
+    def on_preview_failed(self, filepath, error_msg):
+        if filepath != self.current_input_file:
+            return
+        self.preview_label.setText("Попередній перегляд недоступний")
+        self.status_label.setText(error_msg)
+
+    @Slot(str, str)
+    def on_media_info_failed(self, filepath, error_msg):
+        if filepath != self.current_input_file:
+            return
+        self.info_filename_label.setText(f"Файл: {os.path.basename(filepath)}")
+        self.info_resolution_label.setText("Роздільна здатність: Помилка")
+        self.info_duration_label.setText("Тривалість: Помилка")
+        self.info_fps_label.setText("FPS: Помилка")
+        self.status_label.setText(error_msg)
+        print(f"ERROR: {error_msg}")
 
     @Slot(str) 
     def apply_preset(self, preset_name):
@@ -296,6 +456,8 @@ class MainWindow(QMainWindow):
         self.rotation_combobox.setCurrentText(self.ROTATION_MAP_INV[preset_data.get('rotation_angle', self.DEFAULT_OPTIONS['rotation_angle'])])
         self.cb_flip_h.setChecked(preset_data.get('flip_h_active', self.DEFAULT_OPTIONS['flip_h_active']))
         self.cb_flip_v.setChecked(preset_data.get('flip_v_active', self.DEFAULT_OPTIONS['flip_v_active']))
+        if 'engine' in preset_data:
+            self.engine_combobox.setCurrentText(self.ENGINE_MAP_INV[preset_data['engine']])
         
         applied_preset_name = preset_data.get('name', preset_name.replace("_", " ").title())
         self.update_status_label(f"Застосовано пресет: {applied_preset_name}")
@@ -310,19 +472,13 @@ class MainWindow(QMainWindow):
         self.rotation_combobox.setCurrentText(self.ROTATION_MAP_INV[self.DEFAULT_OPTIONS['rotation_angle']])
         self.cb_flip_h.setChecked(self.DEFAULT_OPTIONS['flip_h_active'])
         self.cb_flip_v.setChecked(self.DEFAULT_OPTIONS['flip_v_active'])
+        self.engine_combobox.setCurrentText(self.ENGINE_MAP_INV[self.DEFAULT_OPTIONS['engine']])
         if show_status:
             self.update_status_label("Усі опції скинуто до значень за замовчуванням.")
     
-    @Slot()
-    def start_processing(self):
-        if not self.current_input_file:
-            QMessageBox.warning(self, "Помилка", "Будь ласка, оберіть вхідний відеофайл.")
-            return
-        if not self.current_output_folder:
-            QMessageBox.warning(self, "Помилка", "Будь ласка, оберіть папку для збереження.")
-            return
-
-        options = {
+    def _collect_options(self):
+        """ Словник опцій завдання з поточного стану віджетів (для обробки та попереднього перегляду). """
+        return {
             "resize_active": self.cb_resize.isChecked(),
             "width": self.le_width.text(),
             "height": self.le_height.text(),
@@ -331,8 +487,28 @@ class MainWindow(QMainWindow):
             "rotation_angle": self.ROTATION_MAP[self.rotation_combobox.currentText()],
             "flip_h_active": self.cb_flip_h.isChecked(),
             "flip_v_active": self.cb_flip_v.isChecked(),
+            "engine": self.ENGINE_MAP[self.engine_combobox.currentText()],
         }
 
+    @Slot()
+    def start_processing(self):
+        if not self.current_input_file:
+            QMessageBox.warning(self, "Помилка", "Будь ласка, оберіть вхідний відеофайл.")
+            return
+        if not self.current_output_folder:
+            QMessageBox.warning(self, "Помилка", "Будь ласка, оберіть папку для збереження.")
+            return
+
+        options = self._collect_options()
+        if self.cb_profile.isChecked():
+            options["profile_dir"] = os.path.join(self.current_output_folder, "profiles")
+        if self.cb_fanout_all.isChecked():
+            options["fanout_presets"] = list(self.PRESET_SETTINGS)
+        if self.cb_result_cache.isChecked():
+            options["use_result_cache"] = True
+        if self.cb_resumable.isChecked():
+            options["resumable"] = True
+
         if self.processing_thread and self.processing_thread.isRunning():
             self.processing_thread.cancel() 
             if not self.processing_thread.wait(3000):
@@ -343,10 +519,12 @@ class MainWindow(QMainWindow):
         )
         self.processing_thread.status_updated.connect(self.update_status_label)
         self.processing_thread.progress_updated.connect(self.update_progress_bar)
+        self.processing_thread.progress_details_updated.connect(self.update_progress_details)
         self.processing_thread.processing_finished.connect(self.on_processing_finished)
         
         self.btn_process.setEnabled(False) 
         self.progress_bar.setValue(0) 
+        self.progress_bar.setFormat("%p%")
         self.processing_thread.start() 
 
     @Slot(str)
@@ -357,9 +535,14 @@ class MainWindow(QMainWindow):
     def update_progress_bar(self, value):
         self.progress_bar.setValue(value)
 
+    @Slot(str)
+    def update_progress_details(self, text):
+        self.progress_bar.setFormat(f"%p% - {text}")
+
     @Slot(bool, str)
     def on_processing_finished(self, success, message_or_filepath):
         self.btn_process.setEnabled(True) 
+        self.progress_bar.setFormat("%p%")
         self.progress_bar.setValue(100 if success else self.progress_bar.value()) 
         if success:
             QMessageBox.information(self, "Завершено", f"Обробку завершено!\nФайл збережено: {message_or_filepath}")
@@ -372,4 +555,7 @@ class MainWindow(QMainWindow):
             self.processing_thread.cancel()
             if not self.processing_thread.wait(3000): 
                 print("Потік обробки не завершився вчасно при закритті вікна.")
+        self.preview_playback_timer.stop()
+        for preview_thread in list(self.preview_threads):
+            preview_thread.wait(2000) # Рендер проксі-кадру короткий, просто чекаємо
         event.accept()
\ No newline at end of file